@@ -1,5 +1,23 @@
+from app.services.idempotency import IdempotencyStore
 from app.services.image_generator import ImageGenerationService
+from app.services.jobs.image_job_service import ImageJobService
+from app.services.service_container import ServiceContainer
 
 
-def get_image_generation_service() -> ImageGenerationService:
-    return ImageGenerationService()
+def get_services(context: dict) -> ServiceContainer:
+    services = context.get("services")
+    if services is None:
+        raise RuntimeError("Service container is not initialised")
+    return services
+
+
+def get_image_generation_service(context: dict) -> ImageGenerationService:
+    return get_services(context).image_generation_service
+
+
+def get_image_job_service(context: dict) -> ImageJobService:
+    return get_services(context).image_job_service
+
+
+def get_idempotency_store(context: dict) -> IdempotencyStore:
+    return get_services(context).idempotency
@@ -17,6 +17,7 @@ class ResolverLoadingStatus:
         self.start_time = datetime.now()
         self.query_resolvers = []
         self.mutation_resolvers = []
+        self.subscription_resolvers = []
 
     def print_summary(self):
         """Prints a beautiful summary table of the loading process"""
@@ -34,5 +35,8 @@ class ResolverLoadingStatus:
 
         table.add_row("Loaded Query Resolvers", "\n".join(self.query_resolvers))
         table.add_row("Loaded Mutation Resolvers", "\n".join(self.mutation_resolvers))
+        table.add_row(
+            "Loaded Subscription Resolvers", "\n".join(self.subscription_resolvers)
+        )
 
         console.print(Panel(table, border_style="green"))
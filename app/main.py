@@ -5,7 +5,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import RedirectResponse
+from fastapi.requests import HTTPConnection
+from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from strawberry.fastapi import GraphQLRouter
 from pathlib import Path
@@ -19,7 +20,13 @@ from fastapi_login.exceptions import InvalidCredentialsException
 from app.schema import schema
 from app.services.api_key_service.admin.main import create_admin_routes
 from app.services.api_key_service.api_key_service_driver import create_api_key_routes
+from app.services.api_key_service.database_service.query_counter import (
+    QueryStats,
+    count_queries,
+)
 from app.services.auth import get_context
+from app.services.metrics import MetricsRegistry
+from app.services.service_container import ServiceContainer
 
 from dotenv import load_dotenv
 import torch
@@ -72,7 +79,15 @@ async def lifespan(app: FastAPI):
             print("Spectaql not installed")
     except Exception as e:
         print(f"Documentation generation failed: {e}")
-    yield
+
+    # Build long-lived services once per worker
+    app.state.services = ServiceContainer.build()
+    app.state.services.start()
+
+    try:
+        yield
+    finally:
+        await app.state.services.shutdown()
 
 
 # Create FastAPI app
@@ -99,9 +114,43 @@ async def auth_exception_handler(request: Request, exc: HTTPException):
     return RedirectResponse(url="/auth/login", status_code=302)
 
 
-async def dev_context():
+database_queries = QueryStats()
+MetricsRegistry.register("database_queries", database_queries.stats)
+
+
+@app.middleware("http")
+async def count_database_queries(request: Request, call_next):
+    """Report the database round trips of each request in X-DB-Queries and
+    per route in the metrics query"""
+    with count_queries() as counter:
+        response = await call_next(request)
+
+    route = request.scope.get("route")
+    if route is not None:
+        database_queries.record(getattr(route, "path", str(route)), counter.count)
+    response.headers["X-DB-Queries"] = str(counter.count)
+    return response
+
+
+async def dev_context(connection: HTTPConnection):
     """Development context with no auth"""
-    return {}
+    return {"services": getattr(connection.app.state, "services", None)}
+
+
+@app.get("/health/ready")
+async def readiness_probe(request: Request):
+    """Load balancer probe: 200 once every prewarmed model is ready, 503 before"""
+    readiness = await request.app.state.services.inference.readiness()
+    return JSONResponse(
+        status_code=200 if readiness.is_ready else 503,
+        content={
+            "ready": readiness.is_ready,
+            "models": {
+                m.model_type.name: m.state.value for m in readiness.models()
+            },
+            "error": readiness.error,
+        },
+    )
 
 
 initialize_torch_env()
@@ -148,4 +197,18 @@ if __name__ == "__main__":
             "/etc/letsencrypt/live/api.rank3.dev/privkey.pem"
         )
 
-    uvicorn.run(**uvicorn_kwargs, workers=4)
+    # In shared mode one inference process holds the models for all workers
+    inference_server = None
+    if os.getenv("INFERENCE_MODE", "local").lower() == "shared":
+        from app.services.inference.inference_server import (
+            start_inference_server_process,
+        )
+
+        inference_server = start_inference_server_process()
+
+    try:
+        uvicorn.run(**uvicorn_kwargs, workers=4)
+    finally:
+        if inference_server is not None:
+            inference_server.terminate()
+            inference_server.wait()
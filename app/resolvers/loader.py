@@ -67,6 +67,8 @@ def load_resolvers(
                         status.successful_loads += 1
                         if resolver_type == "query":
                             status.query_resolvers.append(attr.__name__)
+                        elif resolver_type == "subscription":
+                            status.subscription_resolvers.append(attr.__name__)
                         else:
                             status.mutation_resolvers.append(attr.__name__)
 
@@ -1,104 +1,145 @@
-from app.dependencies import get_image_generation_service
+from typing import Annotated, Optional
+
+from app.dependencies import get_idempotency_store, get_image_generation_service
+from app.services.delivery import DeliveryPlan, plan_delivery, selected_subfields
+from app.services.idempotency import (
+    IdempotencyConflictError,
+    IdempotencyStoreFullError,
+    request_fingerprint,
+)
+from app.services.inference.executor import InferenceQueueFullError
+from app.services.result_builder import build_image_result
 import strawberry
 from strawberry.types import Info
 
 from app.types.image_generation_input import ImageGenerationInput
 from app.types.responses import (
     ImageGenerationResponse,
-    ImageGenerationResult,
     ImageGenerationError,
 )
-from datetime import datetime
-import uuid
-import base64
 
 # from rich.console import Console
 # from rich.table import Table, box
 # from rich.panel import Panel
 
 
-@strawberry.type
-class GenerateImageMutations:
-    @strawberry.mutation(
-        description="Generate one or more images based on the provided prompt and options"
-    )
-    async def generate_images(
-        self,
-        image_gen_input: ImageGenerationInput,
-        info: Info,
-    ) -> ImageGenerationResponse:
-        """Generate images based on the input parameters."""
-        try:
-            context = info.context
+async def _generate_images(
+    image_gen_input: ImageGenerationInput, delivery: DeliveryPlan, info: Info
+) -> ImageGenerationResponse:
+    """Generate images based on the input parameters."""
+    try:
+        context = info.context
 
-            print(f"Context: {context}")
+        print(f"Context: {context}")
 
-            api_key = context["api_key"]
+        api_key = context["api_key"]
 
-            print(f"API Key: {api_key}")
+        print(f"API Key: {api_key}")
 
-            image_service = get_image_generation_service()
+        image_service = get_image_generation_service(context)
 
-            results = []
-            print("\nImage Generation Settings:")
-            print("------------------------")
-            print(f"Prompt: {image_gen_input.prompt}")
-            print(f"Format: {image_gen_input.image_format}")
-            print(f"Width: {image_gen_input.width}")
-            print(f"Height: {image_gen_input.height}")
-            print(f"Style: {image_gen_input.style}")
-            print(f"Number of Images: {image_gen_input.num_images}")
-            print("------------------------\n")
+        results = []
+        print("\nImage Generation Settings:")
+        print("------------------------")
+        print(f"Prompt: {image_gen_input.prompt}")
+        print(f"Format: {image_gen_input.image_format}")
+        print(f"Width: {image_gen_input.width}")
+        print(f"Height: {image_gen_input.height}")
+        print(f"Style: {image_gen_input.style}")
+        print(f"Number of Images: {image_gen_input.num_images}")
+        print(f"Delivery: {image_gen_input.delivery}")
+        print("------------------------\n")
 
-            for _ in range(image_gen_input.num_images):
+        print("we're in generate")
 
-                print("we're in generate")
+        try:
+            generated_images = await image_service.generate(
+                image_gen_input=image_gen_input,
+                api_key=api_key,
+                upload=delivery.upload,
+                derivatives=delivery.derivatives,
+            )
 
-                try:
-                    image_bytes, image_url = await image_service.generate(
-                        image_gen_input=image_gen_input,
-                        api_key=api_key,
-                    )
+        except Exception as e:
+            print(f"Error generating image: {e}")
+            raise
 
-                except Exception as e:
-                    print(f"Error generating image: {e}")
-                    raise
+        for generated in generated_images:
+            print(f"Image url: {generated.url}")
 
-                # print("printing an image")
-                # print(f"Image bytes: {image_bytes}")
+            result = build_image_result(
+                image_gen_input, generated, inline=delivery.inline
+            )
 
-                image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+            results.append(result)
 
-                print(f"Image url: {image_url}")
+            print(f"Generated image result:")
+            print(f"  ID: {result.id}")
+            print(f"  Created at: {result.created_at}")
+            print(f"  Prompt: {result.prompt}")
+            print(f"  Format: {result.image_format}")
+            print(f"  Dimensions: {result.width}x{result.height}")
+            print(f"  Style: {result.style}")
+            print(f"  Image URL: {result.url}")
+            print("----------------------------------------")
 
-                result = ImageGenerationResult(
-                    id=str(uuid.uuid4()),
-                    image_base64=image_base64,
-                    created_at=datetime.utcnow().isoformat(),
-                    prompt=image_gen_input.prompt,
-                    image_format=image_gen_input.image_format,
-                    width=image_gen_input.width,
-                    height=image_gen_input.height,
-                    style=image_gen_input.style,
-                    url=image_url,
-                )
+        return ImageGenerationResponse(success=True, results=results)
 
-                results.append(result)
+    except InferenceQueueFullError as e:
+        return ImageGenerationResponse(
+            success=False,
+            error=ImageGenerationError(message=str(e), code="OVERLOADED"),
+        )
+    except Exception as e:
+        return ImageGenerationResponse(
+            success=False,
+            error=ImageGenerationError(message=str(e), code="INTERNAL_ERROR"),
+        )
 
-                print(f"Generated image result:")
-                print(f"  ID: {result.id}")
-                print(f"  Created at: {result.created_at}")
-                print(f"  Prompt: {result.prompt}")
-                print(f"  Format: {result.image_format}")
-                print(f"  Dimensions: {result.width}x{result.height}")
-                print(f"  Style: {result.style}")
-                print(f"  Image URL: {result.url}")
-                print("----------------------------------------")
 
-            return ImageGenerationResponse(success=True, results=results)
+@strawberry.type
+class GenerateImageMutations:
+    @strawberry.mutation(
+        description="Generate one or more images based on the provided prompt and options"
+    )
+    async def generate_images(
+        self,
+        image_gen_input: ImageGenerationInput,
+        info: Info,
+        idempotency_key: Annotated[
+            Optional[str],
+            strawberry.argument(
+                description=(
+                    "Retries with the same key get the first successful "
+                    "response instead of generating (and billing) again"
+                )
+            ),
+        ] = None,
+    ) -> ImageGenerationResponse:
+        # Skip uploading or inlining images the client did not ask for
+        delivery = plan_delivery(
+            image_gen_input.delivery, selected_subfields(info, "results")
+        )
 
-        except Exception as e:
+        if idempotency_key is None:
+            return await _generate_images(image_gen_input, delivery, info)
+
+        context = info.context
+        try:
+            # The selection shapes the response, so a replay must match it too
+            return await get_idempotency_store(context).run(
+                context["api_key"],
+                idempotency_key,
+                request_fingerprint(image_gen_input, delivery),
+                lambda: _generate_images(image_gen_input, delivery, info),
+            )
+        except IdempotencyConflictError as e:
+            return ImageGenerationResponse(
+                success=False,
+                error=ImageGenerationError(message=str(e), code="IDEMPOTENCY_CONFLICT"),
+            )
+        except IdempotencyStoreFullError as e:
             return ImageGenerationResponse(
                 success=False,
-                error=ImageGenerationError(message=str(e), code="INTERNAL_ERROR"),
+                error=ImageGenerationError(message=str(e), code="OVERLOADED"),
             )
@@ -0,0 +1,38 @@
+from typing import Annotated, Optional
+
+import strawberry
+from strawberry.types import Info
+
+from app.dependencies import get_image_job_service
+from app.services.result_builder import build_image_job
+from app.types.image_generation_input import ImageGenerationInput
+from app.types.responses import ImageJob
+
+
+@strawberry.type
+class ImageJobMutations:
+    @strawberry.mutation(
+        description="Queue an image generation and return its job id immediately"
+    )
+    async def submit_image_generation(
+        self,
+        image_gen_input: ImageGenerationInput,
+        info: Info,
+        preview_every: Annotated[
+            Optional[int],
+            strawberry.argument(
+                description="Attach a latent preview to progress events every N steps"
+            ),
+        ] = None,
+    ) -> ImageJob:
+        """Poll the job with `imageJob`, follow it with `imageJobUpdates` and
+        watch steps with `imageJobProgress`."""
+        context = info.context
+
+        job = get_image_job_service(context).submit(
+            image_gen_input=image_gen_input,
+            api_key=context["api_key"],
+            preview_every=preview_every,
+        )
+
+        return build_image_job(job)
@@ -1,9 +1,37 @@
 import strawberry
+from strawberry.types import Info
+
+from app.dependencies import get_services
+from app.types.responses import ModelReadiness, Readiness
 
 
 @strawberry.type
 class Query:
     @strawberry.field(description="Check if the API is healthy")
-    async def health(self) -> str:
-        """Returns OK if the service is healthy."""
-        return "OK"
+    async def health(self, info: Info) -> str:
+        """Returns OK once prewarmed models are ready, WARMING_UP while they
+        load and DEGRADED if any of them failed."""
+        readiness = await get_services(info.context).inference.readiness()
+
+        if readiness.is_ready:
+            return "OK"
+        if readiness.has_failures:
+            return "DEGRADED"
+        return "WARMING_UP"
+
+    @strawberry.field(description="Per-model prewarm state of this worker")
+    async def readiness(self, info: Info) -> Readiness:
+        readiness = await get_services(info.context).inference.readiness()
+
+        return Readiness(
+            ready=readiness.is_ready,
+            models=[
+                ModelReadiness(
+                    model_type=m.model_type,
+                    state=m.state,
+                    error=m.error,
+                    warmup_ms=m.warmup_ms,
+                )
+                for m in readiness.models()
+            ],
+        )
@@ -0,0 +1,22 @@
+from typing import Optional
+
+import strawberry
+from strawberry.types import Info
+
+from app.dependencies import get_image_job_service
+from app.services.result_builder import build_image_job
+from app.types.responses import ImageJob
+
+
+@strawberry.type
+class ImageJobQueries:
+    @strawberry.field(description="Status and results of a submitted image job")
+    async def image_job(self, id: str, info: Info) -> Optional[ImageJob]:
+        """Returns null for unknown, expired or foreign jobs."""
+        context = info.context
+
+        job = get_image_job_service(context).job_store.get(id, context["api_key"])
+        if job is None:
+            return None
+
+        return build_image_job(job)
@@ -0,0 +1,13 @@
+import strawberry
+from strawberry.scalars import JSON
+
+from app.services.metrics import MetricsRegistry
+
+
+@strawberry.type
+class MetricsQueries:
+    @strawberry.field(
+        description="Runtime counters of the worker's services (model pool, caches, queues)"
+    )
+    async def metrics(self) -> JSON:
+        return await MetricsRegistry.snapshot()
@@ -0,0 +1,43 @@
+from typing import AsyncGenerator
+
+import strawberry
+from strawberry.types import Info
+
+from app.dependencies import get_image_job_service
+from app.services.result_builder import build_image_job, build_image_job_progress
+from app.types.responses import ImageJob, ImageJobProgress
+
+
+@strawberry.type
+class ImageJobSubscriptions:
+    @strawberry.subscription(
+        description="Push the job's state on every status change until it finishes"
+    )
+    async def image_job_updates(
+        self, id: str, info: Info
+    ) -> AsyncGenerator[ImageJob, None]:
+        context = info.context
+        job_store = get_image_job_service(context).job_store
+
+        job = job_store.get(id, context["api_key"])
+        if job is None:
+            raise ValueError(f"Image job {id} not found")
+
+        async for update in job_store.watch(job):
+            yield build_image_job(update)
+
+    @strawberry.subscription(
+        description="Push step progress (throttled) of a running job until it finishes"
+    )
+    async def image_job_progress(
+        self, id: str, info: Info
+    ) -> AsyncGenerator[ImageJobProgress, None]:
+        context = info.context
+        job_store = get_image_job_service(context).job_store
+
+        job = job_store.get(id, context["api_key"])
+        if job is None:
+            raise ValueError(f"Image job {id} not found")
+
+        async for progress in job_store.watch_progress(job):
+            yield build_image_job_progress(progress)
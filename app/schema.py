@@ -20,6 +20,8 @@ mutations_dir = base_dir / "resolvers" / "mutations"
 
 queries_dir = base_dir / "resolvers" / "queries"
 
+subscriptions_dir = base_dir / "resolvers" / "subscriptions"
+
 
 mutation_classes = load_resolvers(status, mutations_dir, "mutation")
 status.mutation_resolvers = [cls.__name__ for cls in mutation_classes]
@@ -29,14 +31,20 @@ query_classes = load_resolvers(status, queries_dir, "query")
 status.query_resolvers = [cls.__name__ for cls in query_classes]
 Query = create_resolver_type("Query", query_classes)
 
+subscription_classes = load_resolvers(status, subscriptions_dir, "subscription")
+status.subscription_resolvers = [cls.__name__ for cls in subscription_classes]
+Subscription = create_resolver_type("Subscription", subscription_classes)
+
 console.log(f"Loading mutations from: {mutations_dir}")
 console.log(f"Loading queries from: {queries_dir}")
+console.log(f"Loading subscriptions from: {subscriptions_dir}")
 
 status.print_summary()
 
 schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
+    subscription=Subscription,
     extensions=[
         AddValidationRules(load_validators()),
     ],
@@ -29,7 +29,7 @@ class AdminKeyDependency:
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="API key is required"
             )
 
-        if not self.manager.is_admin_api_key(api_key):
+        if not await self.manager.is_admin_api_key(api_key):
             logger.warning(f"Invalid API key: {api_key}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
@@ -1,5 +1,4 @@
 # admin/main.py
-import os
 from fastapi import FastAPI
 
 from app.services.api_key_service.admin.routes.orchestration_routes import (
@@ -9,19 +8,14 @@ from app.services.api_key_service.api_key_manager import ApiKeyManager
 from fastapi import APIRouter
 
 from app.services.api_key_service.database_service.pocketbase_service import (
-    PocketBaseDatabaseService,
+    get_database_service,
 )
 
 
 def create_admin_routes() -> APIRouter:
     router = APIRouter()
 
-    pb_url = os.getenv("POCKETBASE_URL", "http://localhost:8090")
-    pb_email = os.getenv("POCKETBASE_ADMIN_EMAIL")
-    pb_password = os.getenv("POCKETBASE_ADMIN_PASSWORD")
-    db_service = PocketBaseDatabaseService(pb_url, pb_email, pb_password)
-
-    api_key_manager = ApiKeyManager(db_service)
+    api_key_manager = ApiKeyManager(get_database_service())
 
     orchestration_routes = OrchestrationRoutes(api_key_manager)
 
@@ -51,7 +51,7 @@ class OrchestrationService:
 
         try:
             # Step 1: Create user
-            existing_user = self.db_service.get_user(email)
+            existing_user = await self.db_service.get_user(email)
             if existing_user:
                 logger.info(
                     f"User with email {email} already exists. Returning existing user."
@@ -59,7 +59,7 @@ class OrchestrationService:
                 created_user = existing_user
             else:
                 logger.info(f"Creating user with email: {email}")
-                created_user = self.db_service.create_user(email, "")
+                created_user = await self.db_service.create_user(email, "")
 
             logger.info(f"Successfully created user with ID: {created_user.id}")
 
@@ -68,7 +68,7 @@ class OrchestrationService:
                 f"Creating organization '{organization_name}' for user {created_user.id}"
             )
 
-            created_org = self.manager.create_organization(
+            created_org = await self.manager.create_organization(
                 organization_name, created_user.id
             )
 
@@ -80,14 +80,14 @@ class OrchestrationService:
                     logger.info(
                         f"Setting customer ID '{customer_id}' for organization {created_org.id}"
                     )
-                    self.db_service.set_customer_id(created_org.id, customer_id)
+                    await self.db_service.set_customer_id(created_org.id, customer_id)
 
                     logger.info(
                         f"Successfully set customer ID to [{customer_id}] for created organization {created_org.id}"
                     )
                 except Exception as e:
                     logger.error(f"Failed to set customer ID: {str(e)}")
-                    self._handle_cleanup_and_error(
+                    await self._handle_cleanup_and_error(
                         e, created_user, created_org, created_api_key
                     )
 
@@ -96,7 +96,7 @@ class OrchestrationService:
                 f"Generating API key '{api_key_name}' for organization {created_org.id}"
             )
 
-            created_api_key = self.manager.generate_api_key(
+            created_api_key = await self.manager.generate_api_key(
                 created_org.id,
                 api_key_name,
             )
@@ -124,11 +124,11 @@ class OrchestrationService:
 
         except Exception as e:
             print("created user: ", created_user)
-            self._handle_cleanup_and_error(
+            await self._handle_cleanup_and_error(
                 e, created_user, created_org, created_api_key
             )
 
-    def _handle_cleanup_and_error(
+    async def _handle_cleanup_and_error(
         self,
         original_error: Exception,
         created_user: User | None,
@@ -148,17 +148,17 @@ class OrchestrationService:
             print("Check to delete key")
             if created_api_key:
                 logger.info(f"Cleaning up: Deleting API key {created_api_key}")
-                self.manager.delete_api_key(created_api_key.id)
+                await self.manager.delete_api_key(created_api_key.id)
 
             print("Check to delete org")
             if created_org:
                 logger.info(f"Cleaning up: Deleting organization {created_org.id}")
-                self.manager.delete_organization(created_org.id, created_user.id)
+                await self.manager.delete_organization(created_org.id, created_user.id)
 
             print("Check to delete user")
             if created_user:
                 logger.info(f"Cleaning up: Deleting user {created_user.id}")
-                self.db_service.delete_user(created_user.id)
+                await self.db_service.delete_user(created_user.id)
 
         except Exception as cleanup_error:
             # If cleanup fails, log it but don't mask the original error
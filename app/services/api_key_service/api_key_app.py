@@ -1,6 +1,15 @@
 import os
 from typing import Annotated, Optional, List
-from fastapi import FastAPI, Depends, Form, HTTPException, status, Request, Response
+from fastapi import (
+    FastAPI,
+    Depends,
+    Form,
+    HTTPException,
+    Query,
+    status,
+    Request,
+    Response,
+)
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi_login import LoginManager
 from fastapi_login.exceptions import InvalidCredentialsException
@@ -16,6 +25,12 @@ from app.services.api_key_service.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Organizations and API keys listed per dashboard page
+PAGE_SIZE = 50
+
+# Listing cursors are PocketBase record ids
+Cursor = Annotated[Optional[str], Query(pattern="^[a-z0-9]{1,32}$")]
+
 
 class ApiKeyApp:
     def __init__(self, api_key_manager: ApiKeyManager):
@@ -33,14 +48,14 @@ class ApiKeyApp:
         )
 
         @self.login_manager.user_loader()
-        def load_user(email: str):
+        async def load_user(email: str):
             print(f"Loading user: {email}")
             if not email:  # Handle cases where email is None or invalid
                 raise HTTPException(
                     status_code=status.HTTP_307_TEMPORARY_REDIRECT,
                     headers={"Location": "/manage/auth/login"},
                 )
-            return self.manager.db_service.get_user(email)
+            return await self.manager.db_service.get_user(email)
 
         self._setup_routes()
 
@@ -74,7 +89,7 @@ class ApiKeyApp:
             print(password)
 
             # Check if user already exists
-            existing_user = self.manager.db_service.get_user(email)
+            existing_user = await self.manager.db_service.get_user(email)
 
             if existing_user:
                 print("Already registered")
@@ -88,7 +103,7 @@ class ApiKeyApp:
 
             # Create new user
             try:
-                user = self.manager.db_service.create_user(email, password)
+                user = await self.manager.db_service.create_user(email, password)
 
                 # Generate token directly here instead of calling login
                 token = self.login_manager.create_access_token(data={"sub": email})
@@ -127,7 +142,7 @@ class ApiKeyApp:
             print(password)
 
             # First use your service to authenticate the user
-            user = self.manager.db_service.authenticate_user(email, password)
+            user = await self.manager.db_service.authenticate_user(email, password)
 
             print("got user")
             print(user)
@@ -161,7 +176,7 @@ class ApiKeyApp:
 
         @self.router.get("/organizations")
         async def list_organizations(
-            request: Request, user=Depends(self.login_manager)
+            request: Request, cursor: Cursor = None, user=Depends(self.login_manager)
         ):
             print("list_organizations")
             print(user)
@@ -169,7 +184,9 @@ class ApiKeyApp:
                 print("user.email")
                 print(user.email)
 
-                organizations = self.manager.db_service.get_organizations(user.id)
+                organizations = await self.manager.get_organizations(
+                    user.id, cursor, PAGE_SIZE
+                )
 
                 print("organizations")
                 print(organizations)
@@ -178,7 +195,8 @@ class ApiKeyApp:
                     "organizations.html",
                     {
                         "request": request,
-                        "organizations": organizations,
+                        "organizations": organizations.items,
+                        "next_cursor": organizations.next_cursor,
                         "user_email": user.email,
                     },
                 )
@@ -199,7 +217,7 @@ class ApiKeyApp:
             print("create_organization")
             print(name)
 
-            org_record = self.manager.create_organization(name, user.id)
+            org_record = await self.manager.create_organization(name, user.id)
 
             print(org_record)
 
@@ -208,9 +226,12 @@ class ApiKeyApp:
 
         @self.router.get("/organizations/{org_id}")
         async def get_api_keys(
-            request: Request, org_id: str, user=Depends(self.login_manager)
+            request: Request,
+            org_id: str,
+            cursor: Cursor = None,
+            user=Depends(self.login_manager),
         ):
-            org = self.manager.get_organization(org_id, user.id)
+            org = await self.manager.get_organization(org_id, user.id)
 
             if not org:
                 raise HTTPException(
@@ -218,12 +239,13 @@ class ApiKeyApp:
                     detail="Organization not found",
                 )
 
-            api_keys = self.manager.get_api_keys(org_id)
+            api_keys = await self.manager.get_api_keys(org_id, cursor, PAGE_SIZE)
             return self.templates.TemplateResponse(
                 "organizationpage.html",
                 {
                     "request": request,
-                    "api_keys": api_keys,
+                    "api_keys": api_keys.items,
+                    "next_cursor": api_keys.next_cursor,
                     "organization_id": org_id,
                     "organization_name": org.name,
                     "user_email": user.email,
@@ -240,7 +262,7 @@ class ApiKeyApp:
             user=Depends(self.login_manager),
         ):
             print("generate_api_key")
-            org = self.manager.get_organization(organization_id, user.id)
+            org = await self.manager.get_organization(organization_id, user.id)
 
             if not org:
                 raise HTTPException(
@@ -248,15 +270,18 @@ class ApiKeyApp:
                     detail="Organization not found.",
                 )
 
-            old_api_keys = self.manager.get_api_keys(organization_id)
+            old_api_keys = await self.manager.get_api_keys(
+                organization_id, limit=PAGE_SIZE
+            )
 
-            api_key = self.manager.generate_api_key(organization_id, name)
+            api_key = await self.manager.generate_api_key(organization_id, name)
 
             return self.templates.TemplateResponse(
                 "organizationpage.html",
                 {
                     "request": request,
-                    "api_keys": old_api_keys,
+                    "api_keys": old_api_keys.items,
+                    "next_cursor": old_api_keys.next_cursor,
                     "organization_id": organization_id,
                     "api_key": api_key,
                     "organization_name": org.name,
@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.api_key_service.api_key_filter import ApiKeyFilter
+from app.services.api_key_service.database_service.database_service import (
+    DatabaseService,
+)
+from app.services.api_key_service.helpers.api_key_generation import hash_api_key
+from app.services.api_key_service.models.apikey import ApiKeyIdentity
+from app.services.metrics import MetricsRegistry
+
+
+class InvalidationLog:
+    """Append-only file through which the workers of a host share cache
+    invalidations.
+
+    Each line is `key <key id>` or `organization <organization id>`. A worker
+    starts reading at the end of the file and then only reads what was
+    appended since it last looked; a stat shows whether there is anything.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            self._offset = os.stat(path).st_size
+        except FileNotFoundError:
+            self._offset = 0
+
+    def append(self, kind: str, record_id: str):
+        # One short O_APPEND write, so lines from several workers never mix
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, f"{kind} {record_id}\n".encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def read_new(self) -> List[Tuple[str, str]]:
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            return []
+        if size < self._offset:
+            # Truncated or replaced; start over
+            self._offset = 0
+        if size == self._offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+
+        # A line still being written is picked up next time
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        return [
+            tuple(line.split(" ", 1))
+            for line in data[:end].decode("utf-8").splitlines()
+            if " " in line
+        ]
+
+
+class ApiKeyCache:
+    """LRU of hashed API key -> ApiKeyIdentity, entries expiring after
+    `ttl_seconds`.
+
+    Only keys found in the database are cached, so a verified request costs
+    a hash and a dict lookup; on a miss, `key_filter` rejects keys that
+    cannot exist before the database is asked. Deleting a key or changing an
+    organization's customer ID invalidates the entries of this process and,
+    through `invalidation_log`, those of the other workers of the host, which
+    check it at most every `sync_seconds`. Without a log, other workers see
+    the change once their entries expire.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300,
+        max_entries: int = 10_000,
+        key_filter: Optional[ApiKeyFilter] = None,
+        invalidation_log: Optional[InvalidationLog] = None,
+        sync_seconds: float = 1,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.key_filter = key_filter or ApiKeyFilter(rebuild_seconds=0)
+        self.invalidation_log = invalidation_log
+        self.sync_seconds = sync_seconds
+        self._next_sync = 0.0
+
+        # hashed key -> (identity, expires at)
+        self._entries: "OrderedDict[str, Tuple[ApiKeyIdentity, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.shared_invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "ApiKeyCache":
+        return cls(
+            ttl_seconds=float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "300")),
+            max_entries=int(os.getenv("API_KEY_CACHE_MAX_ENTRIES", "10000")),
+            key_filter=ApiKeyFilter.from_env(),
+            invalidation_log=InvalidationLog(
+                os.getenv(
+                    "API_KEY_INVALIDATION_LOG",
+                    "/tmp/image-gen-api-key-invalidations.log",
+                )
+            ),
+        )
+
+    async def resolve(
+        self, api_key: str, db_service: DatabaseService
+    ) -> Optional[ApiKeyIdentity]:
+        """Identity of `api_key`, looked up in the database on a miss; None
+        if the key does not exist"""
+        hashed_key = hash_api_key(api_key)
+
+        identity = self.get(hashed_key)
+        if identity is not None:
+            return identity
+
+        if not await self.key_filter.check(hashed_key, db_service):
+            return None
+
+        identity = await db_service.get_api_key_identity(api_key)
+        if identity is None:
+            self.key_filter.record_missing(hashed_key)
+        else:
+            self.put(hashed_key, identity)
+
+        return identity
+
+    def get(self, hashed_key: str) -> Optional[ApiKeyIdentity]:
+        self._sync()
+
+        with self._lock:
+            entry = self._entries.get(hashed_key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            identity, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[hashed_key]
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(hashed_key)
+            self.hits += 1
+            return identity
+
+    def put(self, hashed_key: str, identity: ApiKeyIdentity):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[hashed_key] = (
+                identity,
+                time.monotonic() + self.ttl_seconds,
+            )
+            self._entries.move_to_end(hashed_key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_key(self, key_id: str):
+        self._invalidate_key(key_id)
+        self._share("key", key_id)
+
+    def invalidate_organization(self, organization_id: str):
+        self._invalidate_organization(organization_id)
+        self._share("organization", organization_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "shared_invalidations": self.shared_invalidations,
+            }
+
+    def _invalidate_key(self, key_id: str):
+        self._invalidate(lambda identity: identity.key_id == key_id)
+
+    def _invalidate_organization(self, organization_id: str):
+        self._invalidate(lambda identity: identity.organization_id == organization_id)
+
+    def _share(self, kind: str, record_id: str):
+        if self.invalidation_log is None:
+            return
+        try:
+            self.invalidation_log.append(kind, record_id)
+        except OSError as e:
+            print(f"Could not share API key cache invalidation: {e}")
+
+    def _sync(self):
+        """Apply invalidations made by other workers, at most every
+        `sync_seconds`"""
+        if self.invalidation_log is None or time.monotonic() < self._next_sync:
+            return
+        self._next_sync = time.monotonic() + self.sync_seconds
+
+        try:
+            invalidations = self.invalidation_log.read_new()
+        except OSError as e:
+            print(f"Could not read API key cache invalidations: {e}")
+            return
+
+        # Includes this worker's own, which are already applied; harmless
+        for kind, record_id in invalidations:
+            if kind == "key":
+                self._invalidate_key(record_id)
+            elif kind == "organization":
+                self._invalidate_organization(record_id)
+            self.shared_invalidations += 1
+
+    def _invalidate(self, matches):
+        # Deletes are rare, a scan keeps the cache a single map
+        with self._lock:
+            for hashed_key, (identity, _) in list(self._entries.items()):
+                if matches(identity):
+                    del self._entries[hashed_key]
+                    self.invalidations += 1
+
+
+_api_key_cache: Optional[ApiKeyCache] = None
+_api_key_cache_lock = threading.Lock()
+
+
+def get_api_key_cache() -> ApiKeyCache:
+    """Return the process-wide API key cache, creating it on first use"""
+    global _api_key_cache
+
+    with _api_key_cache_lock:
+        if _api_key_cache is None:
+            _api_key_cache = ApiKeyCache.from_env()
+            MetricsRegistry.register("api_key_cache", _api_key_cache.stats)
+            MetricsRegistry.register(
+                "api_key_filter", _api_key_cache.key_filter.stats
+            )
+
+        return _api_key_cache
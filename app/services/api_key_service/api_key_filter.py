@@ -0,0 +1,312 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.api_key_service.database_service.database_service import (
+    DatabaseService,
+)
+
+# Keys are fetched from a bit before the last read, in case the database's
+# clock is behind this one
+_CLOCK_SKEW_SECONDS = 30
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a false-positive rate of
+    about `error_rate` up to `capacity` members.
+
+    Members are sha256 hex digests (hashed API keys), which are already
+    uniform, so bit positions are derived from the digest itself by double
+    hashing instead of hashing again.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        self.num_bits = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.members = 0
+
+    def add(self, hashed_key: str):
+        for position in self._positions(hashed_key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.members += 1
+
+    def __contains__(self, hashed_key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(hashed_key)
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_false_positive_rate(self) -> float:
+        """Chance a non-member is reported present, from the share of set bits"""
+        set_bits = int.from_bytes(self._bits, "little").bit_count()
+        return (set_bits / self.num_bits) ** self.num_hashes
+
+    def _positions(self, hashed_key: str) -> Iterable[int]:
+        h1 = int(hashed_key[:16], 16)
+        h2 = int(hashed_key[16:32], 16) | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+
+class ApiKeyFilter:
+    """Rejects unknown API keys without asking the database.
+
+    A Bloom filter of every valid hashed key (user and admin keys) is rebuilt
+    from the database every `rebuild_seconds`; keys it has never seen are
+    rejected in-process. Keys the database reported missing are remembered
+    in a negative cache for `negative_ttl_seconds`, which covers the filter's
+    false positives, keys revoked since the last rebuild and the time before
+    the first build.
+
+    Keys created by this process are added right away. Before `check`
+    rejects a key the filter has not seen, it fetches the keys created since
+    the last read (at most once per `refresh_seconds`, up to
+    `refresh_max_keys` of them), so a key created by another worker works
+    without waiting for the next rebuild.
+    """
+
+    def __init__(
+        self,
+        rebuild_seconds: float = 60,
+        error_rate: float = 0.001,
+        negative_ttl_seconds: float = 60,
+        negative_max_entries: int = 100_000,
+        refresh_seconds: float = 1,
+        refresh_max_keys: int = 1000,
+    ):
+        self.rebuild_seconds = rebuild_seconds
+        self.error_rate = error_rate
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.negative_max_entries = negative_max_entries
+        self.refresh_seconds = refresh_seconds
+        self.refresh_max_keys = refresh_max_keys
+
+        self._bloom: Optional[BloomFilter] = None
+        # Keys added while a rebuild reads the database, merged into its result
+        self._added_during_rebuild: Optional[List[str]] = None
+        # hashed key -> expires at
+        self._missing: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Wall-clock time of the last database read the filter holds
+        self._read_at = 0.0
+        self._refresh_lock = asyncio.Lock()
+        self._next_refresh = 0.0
+
+        self.rejected = 0
+        self.negative_hits = 0
+        self.passed = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+        self.rebuild_failures = 0
+        self.last_rebuild_ms = 0.0
+        self.last_rebuild_at: Optional[float] = None
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refresh_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "ApiKeyFilter":
+        return cls(
+            rebuild_seconds=float(os.getenv("API_KEY_FILTER_REBUILD_SECONDS", "60")),
+            error_rate=float(os.getenv("API_KEY_FILTER_ERROR_RATE", "0.001")),
+            negative_ttl_seconds=float(
+                os.getenv("API_KEY_NEGATIVE_TTL_SECONDS", "60")
+            ),
+            negative_max_entries=int(
+                os.getenv("API_KEY_NEGATIVE_MAX_ENTRIES", "100000")
+            ),
+            refresh_seconds=float(os.getenv("API_KEY_FILTER_REFRESH_SECONDS", "1")),
+        )
+
+    def might_exist(self, hashed_key: str) -> bool:
+        """False if `hashed_key` is certainly not a valid key, as of the
+        filter's last read of the database"""
+        with self._lock:
+            if self._known_missing(hashed_key):
+                self.negative_hits += 1
+                return False
+
+            if self._bloom is not None and hashed_key not in self._bloom:
+                self.rejected += 1
+                return False
+
+            self.passed += 1
+            return True
+
+    async def check(self, hashed_key: str, db_service: DatabaseService) -> bool:
+        """`might_exist`, refreshing the filter with recently created keys
+        before rejecting a key it has not seen"""
+        with self._lock:
+            unseen = (
+                not self._known_missing(hashed_key)
+                and self._bloom is not None
+                and hashed_key not in self._bloom
+            )
+        if not unseen:
+            return self.might_exist(hashed_key)
+
+        await self.refresh(db_service)
+        exists = self.might_exist(hashed_key)
+        if exists:
+            self.refresh_hits += 1
+        return exists
+
+    async def refresh(self, db_service: DatabaseService):
+        """Add the keys created since the last read of the database. Runs at
+        most once per `refresh_seconds`; callers arriving meanwhile wait for
+        the refresh in progress."""
+        if self.refresh_seconds <= 0 or self._bloom is None:
+            return
+
+        async with self._refresh_lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+
+            read_at = time.time()
+            try:
+                hashed_keys = await db_service.get_hashed_keys_created_since(
+                    self._read_at - _CLOCK_SKEW_SECONDS, self.refresh_max_keys
+                )
+            except Exception as e:
+                # Reject as before; the next rebuild catches up
+                print(f"Error refreshing API key filter: {e}")
+                self.refresh_failures += 1
+                return
+
+            for hashed_key in hashed_keys:
+                self.add(hashed_key)
+            with self._lock:
+                self._read_at = max(self._read_at, read_at)
+                self.refreshes += 1
+
+    def add(self, hashed_key: str):
+        """Accept a key created by this process before the next rebuild"""
+        with self._lock:
+            self._missing.pop(hashed_key, None)
+            if self._bloom is not None:
+                self._bloom.add(hashed_key)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(hashed_key)
+
+    def record_missing(self, hashed_key: str):
+        """Remember a key the database did not find"""
+        if self.negative_max_entries <= 0:
+            return
+
+        with self._lock:
+            if self._bloom is not None and hashed_key in self._bloom:
+                self.false_positives += 1
+
+            self._missing[hashed_key] = time.monotonic() + self.negative_ttl_seconds
+            self._missing.move_to_end(hashed_key)
+            while len(self._missing) > self.negative_max_entries:
+                self._missing.popitem(last=False)
+
+    async def rebuild(self, db_service: DatabaseService):
+        with self._lock:
+            self._added_during_rebuild = []
+
+        try:
+            start = time.perf_counter()
+            read_at = time.time()
+            hashed_keys = await db_service.get_all_hashed_keys()
+            # Hashing every key takes a while; keep it off the event loop
+            bloom = await asyncio.to_thread(self._build, hashed_keys)
+
+            with self._lock:
+                for hashed_key in self._added_during_rebuild:
+                    bloom.add(hashed_key)
+                self._bloom = bloom
+                self.rebuilds += 1
+                self.last_rebuild_ms = (time.perf_counter() - start) * 1000
+                self.last_rebuild_at = time.time()
+                # Keys refreshed meanwhile were merged above
+                self._read_at = max(self._read_at, read_at)
+        finally:
+            with self._lock:
+                self._added_during_rebuild = None
+
+    def start(self, db_service: DatabaseService):
+        if self.rebuild_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(db_service))
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            bloom = self._bloom
+            # Lookups of keys the database does not have
+            negatives = self.rejected + self.false_positives
+            return {
+                "enabled": self.rebuild_seconds > 0,
+                "built": bloom is not None,
+                "keys": bloom.members if bloom else 0,
+                "capacity": bloom.capacity if bloom else 0,
+                "size_bytes": bloom.size_bytes if bloom else 0,
+                "estimated_false_positive_rate": (
+                    bloom.estimated_false_positive_rate() if bloom else None
+                ),
+                "observed_false_positive_rate": (
+                    self.false_positives / negatives if negatives else 0.0
+                ),
+                "rejected": self.rejected,
+                "negative_hits": self.negative_hits,
+                "negative_entries": len(self._missing),
+                "passed": self.passed,
+                "false_positives": self.false_positives,
+                "rebuilds": self.rebuilds,
+                "rebuild_failures": self.rebuild_failures,
+                "last_rebuild_ms": round(self.last_rebuild_ms, 2),
+                "last_rebuild_at": self.last_rebuild_at,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+                "refresh_hits": self.refresh_hits,
+            }
+
+    def _known_missing(self, hashed_key: str) -> bool:
+        """Whether the negative cache holds `hashed_key`. Caller must hold
+        `_lock`."""
+        expires_at = self._missing.get(hashed_key)
+        if expires_at is None:
+            return False
+        if time.monotonic() < expires_at:
+            return True
+        del self._missing[hashed_key]
+        return False
+
+    def _build(self, hashed_keys: List[str]) -> BloomFilter:
+        # Room to grow until the next rebuild without losing accuracy
+        bloom = BloomFilter(max(1024, 2 * len(hashed_keys)), self.error_rate)
+        for hashed_key in hashed_keys:
+            bloom.add(hashed_key)
+        return bloom
+
+    async def _run(self, db_service: DatabaseService):
+        while True:
+            try:
+                await self.rebuild(db_service)
+            except Exception as e:
+                # Keep the previous filter; the negative cache still applies
+                print(f"Error rebuilding API key filter: {e}")
+                self.rebuild_failures += 1
+            await asyncio.sleep(self.rebuild_seconds)
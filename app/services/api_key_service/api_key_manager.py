@@ -1,8 +1,8 @@
 import uuid
+from app.services.api_key_service.api_key_cache import get_api_key_cache
 from app.services.api_key_service.database_service.database_service import (
     DatabaseService,
 )
-from pocketbase.models.record import Record
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi_login import LoginManager
 from fastapi.templating import Jinja2Templates
@@ -10,20 +10,23 @@ from fastapi.responses import HTMLResponse
 
 from app.services.api_key_service.helpers.api_key_generation import (
     create_api_key,
+    hash_api_key,
     verify_api_key,
 )
 from app.services.api_key_service.models.apikey import ApiKey, ApiKeyFull
 from app.services.api_key_service.models.organization import Organization
+from app.services.api_key_service.models.page import Page
 
 
 class ApiKeyManager:
     def __init__(self, db_service: DatabaseService):
         self.db_service = db_service
 
-    def generate_api_key(self, org_id, key_name) -> ApiKeyFull:
+    async def generate_api_key(self, org_id, key_name) -> ApiKeyFull:
         api_key, hashed_key = create_api_key()
 
-        record = self.db_service.set_api_key(org_id, hashed_key, key_name)
+        record = await self.db_service.set_api_key(org_id, hashed_key, key_name)
+        get_api_key_cache().key_filter.add(hashed_key)
 
         return ApiKeyFull(
             id=record.id,
@@ -33,8 +36,8 @@ class ApiKeyManager:
             raw_key=api_key,
         )
 
-    def verify_api_key(self, incoming_key: str):
-        api_key_data = self.db_service.find_api_key_data(incoming_key)
+    async def verify_api_key(self, incoming_key: str):
+        api_key_data = await self.db_service.find_api_key_data(incoming_key)
 
         if not api_key_data:
             raise HTTPException(
@@ -47,32 +50,41 @@ class ApiKeyManager:
             )
         return True
 
-    def fetch_api_key(self, org_id, key_name):
-        return self.db_service.get_api_key(org_id, key_name)
+    async def fetch_api_key(self, org_id, key_name):
+        return await self.db_service.get_api_key(org_id, key_name)
 
-    def create_organization(self, org_name, admin_id) -> Organization:
-        return self.db_service.create_organization(org_name, admin_id)
+    async def create_organization(self, org_name, admin_id) -> Organization:
+        return await self.db_service.create_organization(org_name, admin_id)
 
-    def add_user_to_organization(self, org_id, user_email):
-        return self.db_service.add_user_to_organization(org_id, user_email)
+    async def add_user_to_organization(self, org_id, user_email):
+        return await self.db_service.add_user_to_organization(org_id, user_email)
 
-    def get_organization(self, org_id, user_id) -> Organization:
-        return self.db_service.get_organization(org_id, user_id)
+    async def get_organization(self, org_id, user_id) -> Organization:
+        return await self.db_service.get_organization(org_id, user_id)
 
-    def get_organizations(self, user_email):
-        return self.db_service.get_organizations(user_email)
+    async def get_organizations(self, user_id, cursor=None, limit=50) -> Page:
+        return await self.db_service.get_organizations(user_id, cursor, limit)
 
-    def get_api_keys(self, org_id):
-        return self.db_service.get_api_keys(org_id)
+    async def get_api_keys(self, org_id, cursor=None, limit=50) -> Page:
+        return await self.db_service.get_api_keys(org_id, cursor, limit)
 
-    def delete_user_from_organization(self, org_id, user_email):
-        return self.db_service.delete_user_from_organization(org_id, user_email)
+    async def delete_user_from_organization(self, org_id, user_email):
+        return await self.db_service.delete_user_from_organization(org_id, user_email)
 
-    def delete_organization(self, org_id, admin):
-        return self.db_service.delete_organization(org_id, admin)
+    async def delete_organization(self, org_id, admin):
+        deleted = await self.db_service.delete_organization(org_id, admin)
+        get_api_key_cache().invalidate_organization(org_id)
+        return deleted
 
-    def is_admin_api_key(self, api_key):
-        api_key_data = self.db_service.find_admin_api_key_data(api_key)
+    async def is_admin_api_key(self, api_key):
+        key_filter = get_api_key_cache().key_filter
+        hashed_key = hash_api_key(api_key)
+        if await key_filter.check(hashed_key, self.db_service):
+            api_key_data = await self.db_service.find_admin_api_key_data(api_key)
+            if not api_key_data:
+                key_filter.record_missing(hashed_key)
+        else:
+            api_key_data = None
 
         if not api_key_data:
             raise HTTPException(
@@ -86,5 +98,7 @@ class ApiKeyManager:
 
         return api_key_data
 
-    def delete_api_key(self, id):
-        return self.db_service.delete_api_key(id)
+    async def delete_api_key(self, id):
+        deleted = await self.db_service.delete_api_key(id)
+        get_api_key_cache().invalidate_key(id)
+        return deleted
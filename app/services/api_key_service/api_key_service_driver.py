@@ -1,8 +1,11 @@
 from fastapi import FastAPI
 from app.services.api_key_service.api_key_app import ApiKeyApp
 from app.services.api_key_service.api_key_manager import ApiKeyManager
+from app.services.api_key_service.database_service.database_service import (
+    DatabaseService,
+)
 from app.services.api_key_service.database_service.pocketbase_service import (
-    PocketBaseDatabaseService,
+    get_database_service,
 )
 import os
 from typing import Optional
@@ -12,23 +15,21 @@ import logging
 class ApiKeyAppDriver:
     def __init__(
         self,
-        pb_url: Optional[str] = None,
-        pb_email: Optional[str] = None,
-        pb_password: Optional[str] = None,
+        db_service: Optional[DatabaseService] = None,
         jwt_key: Optional[str] = None,
     ):
-        # Initialize PocketBase connection details
-        self.pb_url = pb_url or os.getenv("POCKETBASE_URL", "http://localhost:8090")
-        self.pb_email = pb_email or os.getenv("POCKETBASE_ADMIN_EMAIL")
-        self.pb_password = pb_password or os.getenv("POCKETBASE_ADMIN_PASSWORD")
+        # Defaults to the worker's shared PocketBase service
+        self.db_service = db_service
 
         # JWT encoder key for token generation
         self.jwt_key = jwt_key or os.getenv("JWT_ENCODER_KEY")
 
-        if not all([self.pb_email, self.pb_password, self.jwt_key]):
-            raise ValueError(
-                "PocketBase admin credentials and JWT key must be provided"
-            )
+        credentials = ["POCKETBASE_ADMIN_EMAIL", "POCKETBASE_ADMIN_PASSWORD"]
+        if db_service is None and not all(os.getenv(name) for name in credentials):
+            raise ValueError("PocketBase admin credentials must be provided")
+
+        if not self.jwt_key:
+            raise ValueError("JWT key must be provided")
 
         # Set up the environment variable for JWT encoding
         os.environ["JWT_ENCODER_KEY"] = self.jwt_key
@@ -38,13 +39,8 @@ class ApiKeyAppDriver:
         logging.basicConfig(level=logging.INFO)
         logger = logging.getLogger(__name__)
 
-        # Log the database service initialization
-        logger.info(f"Initializing PocketBaseDatabaseService with URL: {self.pb_url}, Email: {self.pb_email}")
-
-        # Initialize database service
-        db_service = PocketBaseDatabaseService(
-            self.pb_url, self.pb_email, self.pb_password
-        )
+        db_service = self.db_service or get_database_service()
+        logger.info(f"Using database service {type(db_service).__name__}")
 
         # Create API key manager with database service
         api_key_manager = ApiKeyManager(db_service)
@@ -56,10 +52,8 @@ class ApiKeyAppDriver:
 
 
 def create_api_key_routes(
-    pb_url: Optional[str] = None,
-    pb_email: Optional[str] = None,
-    pb_password: Optional[str] = None,
+    db_service: Optional[DatabaseService] = None,
     jwt_key: Optional[str] = None,
 ):
-    driver = ApiKeyAppDriver(pb_url, pb_email, pb_password, jwt_key)
+    driver = ApiKeyAppDriver(db_service, jwt_key)
     return driver.create_routes()
@@ -1,68 +1,98 @@
 from typing import Optional
-from app.services.api_key_service.models.apikey import AdminApiKey, ApiKey
+from app.services.api_key_service.models.apikey import (
+    AdminApiKey,
+    ApiKey,
+    ApiKeyIdentity,
+)
 from app.services.api_key_service.models.organization import Organization
+from app.services.api_key_service.models.page import Page
 from app.services.api_key_service.models.user import User
 
 
 class DatabaseService:
-    def get_organization_by_api_key(self, api_key):
+    """Storage for users, organizations and API keys. Every method is a
+    coroutine; implementations must not block the event loop."""
+
+    async def get_organization_by_api_key(self, api_key):
+        raise NotImplementedError
+
+    async def get_organization_customer_id_by_api_key(self, api_key):
+        raise NotImplementedError
+
+    async def get_api_key_identity(self, api_key) -> Optional[ApiKeyIdentity]:
+        """Key id, organization and customer ID of an API key, None if unknown"""
+        raise NotImplementedError
+
+    async def get_all_hashed_keys(self) -> list[str]:
+        """Hashed keys of every API key and admin API key"""
         raise NotImplementedError
 
-    def get_organization_customer_id_by_api_key(self, api_key):
+    async def get_hashed_keys_created_since(
+        self, since: float, limit: int = 1000
+    ) -> list[str]:
+        """Hashed keys of the API keys and admin API keys created at or after
+        the Unix time `since`, at most `limit` (the newest) of each"""
         raise NotImplementedError
 
-    def get_organization(self, org_id, user_id) -> Organization:
+    async def get_organization(self, org_id, user_id) -> Organization:
         raise NotImplementedError
 
-    def set_api_key(self, org_id, api_key, key_name) -> ApiKey:
+    async def set_api_key(self, org_id, api_key, key_name) -> ApiKey:
         raise NotImplementedError
 
-    def get_api_key(self, org_id, key_name):
+    async def get_api_key(self, org_id, key_name):
         raise NotImplementedError
 
-    def get_api_keys(self, org_id):
+    async def get_api_keys(self, org_id, cursor=None, limit=50) -> Page:
+        """One page of an organization's keys, without their hashes"""
         raise NotImplementedError
 
-    def add_user_to_organization(self, org_id, user_email):
+    async def add_user_to_organization(self, org_id, user_email):
         raise NotImplementedError
 
-    def delete_user_from_organization(self, org_id, user_email):
+    async def delete_user_from_organization(self, org_id, user_email):
         raise NotImplementedError
 
-    def create_organization(self, org_name, admin_id) -> Organization:
+    async def create_organization(self, org_name, admin_id) -> Organization:
         raise NotImplementedError
 
-    def get_organizations(self, user_id) -> list[Organization]:
+    async def get_organizations(self, user_id, cursor=None, limit=50) -> Page:
+        """One page of the organizations a user administers or belongs to"""
         raise NotImplementedError
 
-    def delete_organization(self, org_id, admin_email):
+    async def delete_organization(self, org_id, admin_email):
         raise NotImplementedError
 
-    def create_user(self, email: str, password: str, is_admin: bool = False) -> User:
+    async def create_user(
+        self, email: str, password: str, is_admin: bool = False
+    ) -> User:
         raise NotImplementedError
 
-    def get_user(self, email: str) -> User | None:
+    async def get_user(self, email: str) -> User | None:
         raise NotImplementedError
 
-    def authenticate_user(self, email: str, password: str) -> bool:
+    async def authenticate_user(self, email: str, password: str) -> bool:
         raise NotImplementedError
 
-    def find_api_key_data(self, api_key) -> ApiKey:
+    async def find_api_key_data(self, api_key) -> ApiKey:
         raise NotImplementedError
 
-    def find_admin_api_key_data(self, api_key) -> AdminApiKey:
+    async def find_admin_api_key_data(self, api_key) -> AdminApiKey:
         raise NotImplementedError
 
-    def delete_user(self, id: str) -> None:
+    async def delete_user(self, id: str) -> None:
         raise NotImplementedError
 
-    def delete_api_key(self, id):
+    async def delete_api_key(self, id):
         raise NotImplementedError
 
-    def get_customer_id(self, org_id: str) -> Optional[str]:
+    async def get_customer_id(self, org_id: str) -> Optional[str]:
         """Get stripe customer ID for organization"""
         raise NotImplementedError
 
-    def set_customer_id(self, org_id: str, customer_id: str):
+    async def set_customer_id(self, org_id: str, customer_id: str):
         """Save stripe customer ID for organization"""
         raise NotImplementedError
+
+    async def close(self):
+        """Release connections held by the service"""
@@ -0,0 +1,262 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from jose import jwt
+
+from app.services.api_key_service.database_service.query_counter import record_query
+
+
+class PocketBaseError(Exception):
+    """Raised for a PocketBase response other than 2xx"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"PocketBase returned {status_code}: {message}")
+        self.status_code = status_code
+
+
+class PocketBaseClient:
+    """Async client for the PocketBase records API, authenticated as admin.
+
+    Requests share one pooled httpx.AsyncClient with keep-alive connections,
+    and at most `max_connections` are in flight; others wait their turn
+    instead of failing on an exhausted pool. The admin token is obtained on
+    first use and renewed `token_refresh_margin_s` before it expires, or
+    after a 401, so a long-lived worker never runs on a stale login.
+    """
+
+    # Clients with a live connection pool in this process; each one logs in
+    # on its own, so more than one points at a service building its own
+    open_clients = 0
+
+    def __init__(
+        self,
+        url: str,
+        admin_email: Optional[str],
+        admin_password: Optional[str],
+        max_connections: int = 10,
+        timeout_s: float = 10,
+        keepalive_s: float = 30,
+        token_refresh_margin_s: float = 60,
+    ):
+        self.url = url.rstrip("/")
+        self.admin_email = admin_email
+        self.admin_password = admin_password
+        self.max_connections = max(1, max_connections)
+        self.timeout_s = timeout_s
+        self.keepalive_s = keepalive_s
+        self.token_refresh_margin_s = token_refresh_margin_s
+
+        self._http: Optional[httpx.AsyncClient] = None
+        self._slots = asyncio.Semaphore(self.max_connections)
+        self._auth_lock = asyncio.Lock()
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+
+        self.requests = 0
+        self.failures = 0
+        self.admin_logins = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.request_ms = 0.0
+
+    @classmethod
+    def from_env(cls) -> "PocketBaseClient":
+        return cls(
+            url=os.getenv("POCKETBASE_URL", "http://localhost:8090"),
+            admin_email=os.getenv("POCKETBASE_ADMIN_EMAIL"),
+            admin_password=os.getenv("POCKETBASE_ADMIN_PASSWORD"),
+            max_connections=int(os.getenv("POCKETBASE_MAX_CONNECTIONS", "10")),
+            timeout_s=float(os.getenv("POCKETBASE_TIMEOUT_S", "10")),
+        )
+
+    async def get_list(
+        self,
+        collection: str,
+        page: int = 1,
+        per_page: int = 30,
+        filter: Optional[str] = None,
+        sort: Optional[str] = None,
+        fields: Optional[str] = None,
+        skip_total: bool = False,
+    ) -> Dict[str, Any]:
+        """One page of records, with `items`, `page` and `totalPages`.
+
+        `skip_total` saves the count query when the totals are not needed;
+        `totalPages` is then -1.
+        """
+        params = {"page": page, "perPage": per_page}
+        if skip_total:
+            params["skipTotal"] = 1
+        if filter:
+            params["filter"] = filter
+        if sort:
+            params["sort"] = sort
+        if fields:
+            params["fields"] = fields
+        return await self._request(
+            "GET", f"/api/collections/{collection}/records", params=params
+        )
+
+    async def get_full_list(
+        self,
+        collection: str,
+        filter: Optional[str] = None,
+        fields: Optional[str] = None,
+        batch: int = 500,
+    ) -> List[Dict[str, Any]]:
+        records = []
+        page = 1
+        while True:
+            result = await self.get_list(
+                collection, page=page, per_page=batch, filter=filter, fields=fields
+            )
+            records.extend(result["items"])
+            if page >= result["totalPages"]:
+                return records
+            page += 1
+
+    async def get_first(
+        self, collection: str, filter: str, fields: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        result = await self.get_list(
+            collection, per_page=1, filter=filter, fields=fields, skip_total=True
+        )
+        return result["items"][0] if result["items"] else None
+
+    async def get_one(self, collection: str, record_id: str) -> Dict[str, Any]:
+        return await self._request(
+            "GET", f"/api/collections/{collection}/records/{record_id}"
+        )
+
+    async def create(self, collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request(
+            "POST", f"/api/collections/{collection}/records", json=data
+        )
+
+    async def update(
+        self, collection: str, record_id: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return await self._request(
+            "PATCH", f"/api/collections/{collection}/records/{record_id}", json=data
+        )
+
+    async def delete(self, collection: str, record_id: str):
+        await self._request(
+            "DELETE", f"/api/collections/{collection}/records/{record_id}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.requests
+        return {
+            "requests": requests,
+            "failures": self.failures,
+            "admin_logins": self.admin_logins,
+            "open_clients": PocketBaseClient.open_clients,
+            "open_connections": self._open_connections(),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_connections": self.max_connections,
+            "avg_request_ms": self.request_ms / requests if requests else 0.0,
+        }
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            PocketBaseClient.open_clients -= 1
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        token = await self._admin_token()
+        response = await self._send(method, path, token, **kwargs)
+
+        if response.status_code == 401:
+            # Token revoked or expired early; log in again once
+            token = await self._admin_token(stale=token)
+            response = await self._send(method, path, token, **kwargs)
+
+        if response.status_code >= 400:
+            self.failures += 1
+            raise PocketBaseError(response.status_code, _error_message(response))
+
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    async def _send(
+        self, method: str, path: str, token: Optional[str], **kwargs
+    ) -> httpx.Response:
+        headers = {"Authorization": token} if token else {}
+
+        record_query()
+        self.waiting += 1
+        async with self._slots:
+            self.waiting -= 1
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                return await self._client().request(
+                    method, path, headers=headers, **kwargs
+                )
+            except httpx.HTTPError:
+                self.failures += 1
+                raise
+            finally:
+                self.in_flight -= 1
+                self.requests += 1
+                self.request_ms += (time.perf_counter() - start) * 1000
+
+    async def _admin_token(self, stale: Optional[str] = None) -> Optional[str]:
+        if not self.admin_email:
+            return None
+
+        async with self._auth_lock:
+            # Another request may have logged in while this one waited
+            refresh_at = self._token_expires_at - self.token_refresh_margin_s
+            if self._token in (None, stale) or time.time() >= refresh_at:
+                await self._login()
+            return self._token
+
+    async def _login(self):
+        response = await self._send(
+            "POST",
+            "/api/admins/auth-with-password",
+            None,
+            json={"identity": self.admin_email, "password": self.admin_password},
+        )
+        if response.status_code >= 400:
+            self.failures += 1
+            raise PocketBaseError(response.status_code, _error_message(response))
+
+        self._token = response.json()["token"]
+        self._token_expires_at = jwt.get_unverified_claims(self._token).get("exp", 0)
+        self.admin_logins += 1
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created on first use so the pool binds to the serving event loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.url,
+                timeout=self.timeout_s,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_s,
+                ),
+            )
+            PocketBaseClient.open_clients += 1
+        return self._http
+
+    def _open_connections(self) -> int:
+        # httpx does not expose its pool; read httpcore's, if it is there
+        pool = getattr(getattr(self._http, "_transport", None), "_pool", None)
+        return len(getattr(pool, "connections", ()))
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        return response.json().get("message", response.text)
+    except ValueError:
+        return response.text
@@ -1,133 +1,208 @@
-from typing import Optional
+import asyncio
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
 from app.services.api_key_service.database_service.database_service import (
     DatabaseService,
 )
-import pocketbase
+from app.services.api_key_service.database_service.pocketbase_client import (
+    PocketBaseClient,
+)
 import bcrypt
 
 from app.services.api_key_service.helpers.api_key_generation import hash_api_key
-from app.services.api_key_service.models.apikey import AdminApiKey, ApiKey
+from app.services.api_key_service.models.apikey import (
+    AdminApiKey,
+    ApiKey,
+    ApiKeyIdentity,
+)
 from app.services.api_key_service.models.organization import Organization
+from app.services.api_key_service.models.page import Page
 from app.services.api_key_service.models.user import User
+from app.services.metrics import MetricsRegistry
+
+
+# PocketBase record ids; cursors are ids and end up in filters
+_RECORD_ID = re.compile(r"[a-z0-9]{1,32}")
+
+
+def _page_filter(filter: str, cursor: Optional[str]) -> str:
+    if cursor is None:
+        return filter
+    if not _RECORD_ID.fullmatch(cursor):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return f'({filter}) && id > "{cursor}"'
 
 
 class PocketBaseDatabaseService(DatabaseService):
-    def __init__(self, pb_url, pb_email, pb_password):
-        self.client = pocketbase.Client(pb_url)
-        self.client.admins.auth_with_password(pb_email, pb_password)
+    def __init__(self, client: PocketBaseClient):
+        self.client = client
+
+    @classmethod
+    def from_env(cls) -> "PocketBaseDatabaseService":
+        return cls(PocketBaseClient.from_env())
+
+    async def close(self):
+        await self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.client.stats()
 
     # START: Billing Service access Customer ID from Organization
-    def get_organization_by_api_key(self, api_key):
-        api_key_data = self.find_api_key_data(api_key)
+    async def get_organization_by_api_key(self, api_key):
+        api_key_data = await self.find_api_key_data(api_key)
 
         if api_key_data:
-            records = self.client.collection("organizations").get_full_list(
-                query_params={"filter": f'id="{api_key_data.organization_id}"'}
+            record = await self.client.get_first(
+                "organizations", filter=f'id="{api_key_data.organization_id}"'
             )
-            if records:
-                return records[0]
+            if record:
+                return Organization.model_validate(record)
 
         return None
 
-    def get_organization_customer_id_by_api_key(self, api_key):
-        organization = self.get_organization_by_api_key(api_key)
+    async def get_organization_customer_id_by_api_key(self, api_key):
+        organization = await self.get_organization_by_api_key(api_key)
         if organization:
             return organization.customer_id
         return None
 
+    async def get_api_key_identity(self, api_key) -> Optional[ApiKeyIdentity]:
+        api_key_data = await self.find_api_key_data(api_key)
+        if not api_key_data:
+            return None
+
+        customer_id = await self.get_customer_id(api_key_data.organization_id)
+        return ApiKeyIdentity(
+            key_id=api_key_data.id,
+            organization_id=api_key_data.organization_id,
+            customer_id=customer_id or None,
+        )
+
     # END: Billing Service access Customer ID from Organization
 
-    def get_organization(self, org_id, user_id) -> Organization:
+    async def get_organization(self, org_id, user_id) -> Organization:
         try:
-            records = self.client.collection("organizations").get_full_list(
-                query_params={
-                    "filter": f'id="{org_id}" && (admin="{user_id}" || members ?~ "{user_id}")'
-                }
+            record = await self.client.get_first(
+                "organizations",
+                filter=f'id="{org_id}" && (admin="{user_id}" || members ?~ "{user_id}")',
             )
 
-            if records:
-                return records[0]
+            if record:
+                return Organization.model_validate(record)
             return None
         except Exception as e:
             print(f"An error occurred while retrieving the organization: {e}")
             return None
 
-    def find_api_key_data_generic(self, api_key, collection_name) -> ApiKey:
+    async def find_api_key_data_generic(self, api_key, collection_name) -> dict:
         hashed_key = hash_api_key(api_key)
-        records = self.client.collection(collection_name).get_full_list(
-            query_params={"filter": f'hashed_key="{hashed_key}"'}
+        return await self.client.get_first(
+            collection_name, filter=f'hashed_key="{hashed_key}"'
         )
-        if records:
-            return records[0]
-        return None
 
-    def find_api_key_data(self, api_key) -> ApiKey:
-        return self.find_api_key_data_generic(api_key, "api_keys")
+    async def get_all_hashed_keys(self) -> list[str]:
+        hashed_keys = []
+        for collection_name in ("api_keys", "admin_api_keys"):
+            records = await self.client.get_full_list(
+                collection_name, fields="hashed_key"
+            )
+            hashed_keys.extend(record["hashed_key"] for record in records)
+        return hashed_keys
+
+    async def get_hashed_keys_created_since(
+        self, since: float, limit: int = 1000
+    ) -> list[str]:
+        # PocketBase stores `created` in UTC as "2006-01-02 15:04:05.000Z"
+        created = datetime.fromtimestamp(since, timezone.utc).strftime(
+            "%Y-%m-%d %H:%M:%S.000Z"
+        )
+        hashed_keys = []
+        for collection_name in ("api_keys", "admin_api_keys"):
+            result = await self.client.get_list(
+                collection_name,
+                per_page=limit,
+                filter=f'created >= "{created}"',
+                sort="-created",
+                fields="hashed_key",
+                skip_total=True,
+            )
+            hashed_keys.extend(record["hashed_key"] for record in result["items"])
+        return hashed_keys
 
-    def find_admin_api_key_data(self, api_key) -> AdminApiKey:
-        return self.find_api_key_data_generic(api_key, "admin_api_keys")
+    async def find_api_key_data(self, api_key) -> ApiKey:
+        record = await self.find_api_key_data_generic(api_key, "api_keys")
+        return ApiKey.model_validate(record) if record else None
 
-    def set_api_key(self, org_id, api_key, key_name) -> ApiKey:
-        record = self.client.collection("api_keys").create(
-            {"organization_id": org_id, "name": key_name, "hashed_key": api_key}
+    async def find_admin_api_key_data(self, api_key) -> AdminApiKey:
+        record = await self.find_api_key_data_generic(api_key, "admin_api_keys")
+        return AdminApiKey.model_validate(record) if record else None
+
+    async def set_api_key(self, org_id, api_key, key_name) -> ApiKey:
+        record = await self.client.create(
+            "api_keys",
+            {"organization_id": org_id, "name": key_name, "hashed_key": api_key},
         )
-        return record
+        return ApiKey.model_validate(record)
 
-    def get_api_key(self, org_id, key_name):
-        records = self.client.collection("api_keys").get_full_list(
-            query_params={
-                "filter": f'organization_id="{org_id}" AND key_name="{key_name}"'
-            }
+    async def get_api_key(self, org_id, key_name):
+        record = await self.client.get_first(
+            "api_keys", filter=f'organization_id="{org_id}" AND key_name="{key_name}"'
         )
-        if records:
-            return records[0].api_key
+        if record:
+            return record.get("api_key")
         return None
 
-    def get_api_keys(self, org_id):
-        records = self.client.collection("api_keys").get_full_list(
-            query_params={"filter": f'organization_id="{org_id}"'}
-        )
-        return [
-            ({"name": record.name, "organization_id": record.organization_id})
-            for record in records
-        ]
-
-    def create_organization(self, org_name, admin_id) -> Organization:
-        org_record = self.client.collection("organizations").create(
-            {"name": org_name, "admin": admin_id}
+    async def get_api_keys(self, org_id, cursor=None, limit=50) -> Page:
+        records = await self._get_page(
+            "api_keys",
+            f'organization_id="{org_id}"',
+            cursor,
+            limit,
+            fields="id,name,organization_id",
         )
-
-        return Organization(
-            id=org_record.id,
-            name=org_record.name,
-            admin=org_record.admin,
-            members=org_record.members,
+        return Page(
+            items=[
+                {
+                    "id": record["id"],
+                    "name": record["name"],
+                    "organization_id": record["organization_id"],
+                }
+                for record in records[:limit]
+            ],
+            next_cursor=records[limit - 1]["id"] if len(records) > limit else None,
         )
 
-    def get_organizations(self, user_id) -> list[Organization]:
-        records = self.client.collection("organizations").get_full_list(
-            query_params={"filter": f'members ?~ "{user_id}" || admin = "{user_id}"'}
+    async def create_organization(self, org_name, admin_id) -> Organization:
+        org_record = await self.client.create(
+            "organizations", {"name": org_name, "admin": admin_id}
         )
 
-        if not records:
-            return []
-
-        org_ids = [record.id for record in records]
-        organizations = []
-        for org_id in org_ids:
-            org_record = self.client.collection("organizations").get_one(org_id)
-            organizations.append(org_record)
+        return Organization.model_validate(org_record)
 
-        return organizations
+    async def get_organizations(self, user_id, cursor=None, limit=50) -> Page:
+        records = await self._get_page(
+            "organizations",
+            f'members ?~ "{user_id}" || admin = "{user_id}"',
+            cursor,
+            limit,
+        )
+        return Page(
+            items=[Organization.model_validate(record) for record in records[:limit]],
+            next_cursor=records[limit - 1]["id"] if len(records) > limit else None,
+        )
 
-    def delete_organization(self, org_id, admin):
-        org_record = self.client.collection("organizations").get_one(org_id)
-        if org_record and org_record.admin == admin:
-            self.client.collection("organizations").delete(org_id)
+    async def delete_organization(self, org_id, admin):
+        org_record = await self.client.get_one("organizations", org_id)
+        if org_record and org_record["admin"] == admin:
+            await self.client.delete("organizations", org_id)
             return True
         return False
 
-    def create_user(self, email: str, password: str, is_admin: bool = False) -> User:
+    async def create_user(
+        self, email: str, password: str, is_admin: bool = False
+    ) -> User:
         """
         Create a new user with hashed password
         """
@@ -139,102 +214,129 @@ class PocketBaseDatabaseService(DatabaseService):
         }
 
         if password:
-            hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+            # bcrypt is slow by design; keep it off the event loop
+            hashed_password = await asyncio.to_thread(
+                bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt()
+            )
             user_data["password"] = hashed_password.decode("utf-8")
 
-        # Print all user data entries
-        all_users = self.client.collection("accounts").get_full_list()
-
-        for user in all_users:
-            print(user)
-
         try:
-            record = self.client.collection("accounts").create(user_data)
+            record = await self.client.create("accounts", user_data)
             print(record)
         except Exception as e:
             print(f"An error occurred while creating the user: {e}")
             return None
 
-        return User(
-            id=record.id,
-            email=record.email,
-            is_admin=record.is_admin,
-            password=record.password,
-        )
+        return User.model_validate(record)
 
-    def get_user(self, email: str) -> User | None:
+    async def get_user(self, email: str) -> User | None:
         """
         Retrieve a user by email, including password for verification
         """
         try:
-            record = self.client.collection("accounts").get_first_list_item(
-                f'email = "{email}"'
-            )
+            record = await self.client.get_first("accounts", f'email = "{email}"')
+            if record is None:
+                return None
 
-            return User(
-                id=record.id,
-                email=record.email,
-                is_admin=record.is_admin,
-                password=record.password,
-            )
+            return User.model_validate(record)
         except Exception:
             return None
 
-    def authenticate_user(self, email: str, password: str) -> bool:
+    async def authenticate_user(self, email: str, password: str) -> bool:
         """
         Authenticate a user by email and password
         """
-        user = self.get_user(email)
+        user = await self.get_user(email)
 
         if not password:
             raise ValueError("Password cannot be empty")
 
-        if user and bcrypt.checkpw(
-            password.encode("utf-8"), user.password.encode("utf-8")
+        if user and await asyncio.to_thread(
+            bcrypt.checkpw, password.encode("utf-8"), user.password.encode("utf-8")
         ):
             return True
         return False
 
-    def delete_user(self, id: str) -> None:
+    async def delete_user(self, id: str) -> None:
         """
         Delete a user by their ID
         """
         try:
-            self.client.collection("accounts").delete(id)
+            await self.client.delete("accounts", id)
             print(f"User with ID {id} has been deleted.")
         except Exception as e:
             print(f"An error occurred while deleting the user: {e}")
 
-    def delete_api_key(self, id):
+    async def delete_api_key(self, id):
         try:
-            self.client.collection("api_keys").delete(id)
+            await self.client.delete("api_keys", id)
             return True
         except Exception as e:
             print(f"An error occurred while deleting the API key: {e}")
             return False
 
-    def get_customer_id(self, org_id: str) -> Optional[str]:
-        org_data = self.client.collection("organizations").get_one(org_id)
+    async def get_customer_id(self, org_id: str) -> Optional[str]:
+        org_data = await self.client.get_one("organizations", org_id)
 
-        return org_data.customer_id
+        return org_data.get("customer_id")
 
-    def set_customer_id(self, org_id: str, customer_id: str):
-        org_record = self.client.collection("organizations").get_one(org_id)
+    async def set_customer_id(self, org_id: str, customer_id: str):
+        org_record = await self.client.get_one("organizations", org_id)
 
         if not org_record:
             msg = f"Organization with ID {org_id} not found."
             print(msg)
             raise Exception(msg)
 
-        if org_record.customer_id:
+        if org_record.get("customer_id"):
             msg = f"Customer ID already exists for organization {org_id}. Overwriting is not allowed. Verify manually."
             print(msg)
             raise Exception(msg)
 
-        update_org = self.client.collection("organizations").update(
-            org_id, {"customer_id": customer_id}
+        update_org = await self.client.update(
+            "organizations", org_id, {"customer_id": customer_id}
         )
 
         print(f"Succesfully set customer ID for organization {org_id}")
 
-        return update_org
+        return Organization.model_validate(update_org)
+
+    async def _get_page(
+        self,
+        collection: str,
+        filter: str,
+        cursor: Optional[str],
+        limit: int,
+        fields: Optional[str] = None,
+    ) -> list[dict]:
+        """Up to `limit` + 1 records after `cursor` in id order, in one query;
+        the extra record tells whether there is a next page"""
+        result = await self.client.get_list(
+            collection,
+            per_page=limit + 1,
+            filter=_page_filter(filter, cursor),
+            sort="id",
+            fields=fields,
+            skip_total=True,
+        )
+        return result["items"]
+
+
+_database_service: Optional[PocketBaseDatabaseService] = None
+_database_service_lock = threading.Lock()
+
+
+def get_database_service() -> PocketBaseDatabaseService:
+    """Return the process-wide database service, creating it on first use.
+
+    Every service of a worker shares it, and with it one connection pool and
+    one admin login, made on the first request rather than here.
+    """
+    global _database_service
+
+    with _database_service_lock:
+        if _database_service is None:
+            _database_service = PocketBaseDatabaseService.from_env()
+            MetricsRegistry.register("database", _database_service.stats)
+
+        return _database_service
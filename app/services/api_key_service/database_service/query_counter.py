@@ -0,0 +1,62 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+
+class QueryCounter:
+    """Database round trips made while serving one HTTP request"""
+
+    def __init__(self):
+        self.count = 0
+
+
+_current: ContextVar[Optional[QueryCounter]] = ContextVar(
+    "database_query_counter", default=None
+)
+
+
+def record_query():
+    """Count a round trip against the request being served, if any"""
+    counter = _current.get()
+    if counter is not None:
+        counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count the queries made inside the block, including in tasks it starts"""
+    counter = QueryCounter()
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+class QueryStats:
+    """Queries per request, aggregated by route so pages whose query count
+    grows with the data stand out in the `metrics` query."""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, queries: int):
+        with self._lock:
+            stats = self._routes.setdefault(
+                route, {"requests": 0, "queries": 0, "max_queries": 0}
+            )
+            stats["requests"] += 1
+            stats["queries"] += queries
+            stats["max_queries"] = max(stats["max_queries"], queries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                route: {
+                    **stats,
+                    "avg_queries": stats["queries"] / stats["requests"],
+                }
+                for route, stats in sorted(self._routes.items())
+            }
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -16,3 +18,11 @@ class AdminApiKey(BaseModel):
 
 class ApiKeyFull(ApiKey):
     raw_key: str
+
+
+class ApiKeyIdentity(BaseModel):
+    """What a verified API key resolves to on the request path"""
+
+    key_id: str
+    organization_id: str
+    customer_id: Optional[str] = None
@@ -0,0 +1,10 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel
+
+
+class Page(BaseModel):
+    """One page of a listing; pass `next_cursor` back for the next one,
+    None on the last page"""
+
+    items: List[Any]
+    next_cursor: Optional[str] = None
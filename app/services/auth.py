@@ -1,6 +1,9 @@
 from fastapi import HTTPException, Security
+from fastapi.requests import HTTPConnection
 from fastapi.security import APIKeyHeader
 
+from app.services.api_key_service.api_key_cache import get_api_key_cache
+
 api_key_header = APIKeyHeader(name="X-API-Key")
 
 
@@ -11,6 +14,31 @@ async def get_api_key(api_key: str = Security(api_key_header)) -> str:
     return api_key
 
 
-async def get_context(api_key: str = Security(api_key_header)):
-    """Create GraphQL context with validated API key."""
-    return {"api_key": await get_api_key(api_key)}
+async def get_context(connection: HTTPConnection):
+    """Create GraphQL context with validated API key.
+
+    Takes an HTTPConnection rather than a Request so the same getter serves
+    HTTP operations and websocket subscriptions (key sent on the handshake).
+    The key is verified against the database through the process-wide
+    ApiKeyCache.
+    """
+    api_key = connection.headers.get(api_key_header.model.name)
+    if not api_key:
+        raise HTTPException(status_code=403, detail="Not authenticated")
+    api_key = await get_api_key(api_key)
+
+    services = getattr(connection.app.state, "services", None)
+    try:
+        identity = await get_api_key_cache().resolve(api_key, services.database)
+    except Exception as e:
+        print(f"Error verifying API key: {e}")
+        raise HTTPException(status_code=503, detail="Could not verify API key")
+
+    if identity is None:
+        raise HTTPException(status_code=403, detail="Invalid API key")
+
+    return {
+        "api_key": api_key,
+        "api_key_identity": identity,
+        "services": services,
+    }
@@ -1,23 +1,20 @@
-import os
 import traceback
-from app.services.api_key_service.database_service.pocketbase_service import (
-    PocketBaseDatabaseService,
+from app.services.api_key_service.api_key_cache import get_api_key_cache
+from app.services.api_key_service.database_service.database_service import (
+    DatabaseService,
 )
 from app.services.billing.models import ComputeUsage
 
 
 class BillingService:
-    def __init__(self):
-        pb_url = os.getenv("POCKETBASE_URL", "http://localhost:8090")
-        pb_email = os.getenv("POCKETBASE_ADMIN_EMAIL")
-        pb_password = os.getenv("POCKETBASE_ADMIN_PASSWORD")
-        self.db_service = PocketBaseDatabaseService(pb_url, pb_email, pb_password)
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
 
     async def record_billing(self, duration: float, api_key: str):
         try:
-            customer_id = self.db_service.get_organization_customer_id_by_api_key(
-                api_key
-            )
+            # Usually cached by the time the request is billed
+            identity = await get_api_key_cache().resolve(api_key, self.db_service)
+            customer_id = identity.customer_id if identity else None
 
             await self.record_compute_time(
                 ComputeUsage(
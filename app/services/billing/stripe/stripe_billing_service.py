@@ -2,6 +2,9 @@ import os
 import logging
 import stripe
 
+from app.services.api_key_service.database_service.database_service import (
+    DatabaseService,
+)
 from app.services.billing.models import ComputeUsage
 from app.services.billing.service import BillingService
 
@@ -11,8 +14,8 @@ logger = logging.getLogger(__name__)
 
 
 class StripeBillingService(BillingService):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, db_service: DatabaseService):
+        super().__init__(db_service)
 
         self.api_key = os.getenv("STRIPE_API_KEY")
 
@@ -8,10 +8,8 @@ import stripe
 from typing import Optional
 
 from app.services.api_key_service.admin.dependencies import AdminKeyDependency
+from app.services.api_key_service.api_key_cache import get_api_key_cache
 from app.services.api_key_service.api_key_manager import ApiKeyManager
-from app.services.api_key_service.database_service.pocketbase_service import (
-    PocketBaseDatabaseService,
-)
 
 from fastapi_login import LoginManager
 import json
@@ -26,9 +24,9 @@ class CustomerManagementService:
     ):
         stripe.api_key = stripe_secret_key
         self.webhook_secret = webhook_secret
-        self._init_database()
 
         self.manager = api_key_manager
+        self.db_service = api_key_manager.db_service
         self.admin_dependency = AdminKeyDependency(api_key_manager)
 
         self.login_manager = LoginManager(
@@ -38,19 +36,19 @@ class CustomerManagementService:
         )
 
         @self.login_manager.user_loader()
-        def load_user(email: str):
+        async def load_user(email: str):
             print(f"Loading user: {email}")
             if not email:
                 raise HTTPException(
                     status_code=status.HTTP_307_TEMPORARY_REDIRECT,
                     headers={"Location": "/manage/auth/login"},
                 )
-            return self.db_service.get_user(email)
+            return await self.db_service.get_user(email)
 
         self.router = self.create_customer_routes("manage")
 
     def form_user_dependency(self):
-        def dependency(request: Request):
+        async def dependency(request: Request):
             session = request.cookies.get("access-token")
             if not session:
                 raise HTTPException(status_code=401)
@@ -62,28 +60,22 @@ class CustomerManagementService:
                 "sub"
             )  # Since your token has the email in the 'sub' claim
 
-            return self.db_service.get_user(email)
+            return await self.db_service.get_user(email)
 
         return dependency
 
-    def _init_database(self):
-        """Initialize database connection"""
-        pb_url = os.getenv("POCKETBASE_URL", "http://localhost:8090")
-        pb_email = os.getenv("POCKETBASE_ADMIN_EMAIL")
-        pb_password = os.getenv("POCKETBASE_ADMIN_PASSWORD")
-        self.db_service = PocketBaseDatabaseService(pb_url, pb_email, pb_password)
-
-    def get_customer_id(self, org_id: str) -> Optional[str]:
+    async def get_customer_id(self, org_id: str) -> Optional[str]:
         """Get stripe customer ID for organization"""
         try:
-            return self.db_service.get_customer_id(org_id)
+            return await self.db_service.get_customer_id(org_id)
         except Exception:
             return None
 
-    def set_customer_id(self, org_id: str, customer_id: str):
+    async def set_customer_id(self, org_id: str, customer_id: str):
         """Save stripe customer ID for organization"""
         try:
-            self.db_service.set_customer_id(org_id, customer_id)
+            await self.db_service.set_customer_id(org_id, customer_id)
+            get_api_key_cache().invalidate_organization(org_id)
         except Exception as e:
             print(f"Error setting customer ID: {e}")
             raise HTTPException(status_code=500, detail="Failed to save customer ID")
@@ -93,7 +85,7 @@ class CustomerManagementService:
     ) -> str:
         """Create either a setup or portal session based on customer status"""
         try:
-            existing_customer = self.get_customer_id(org_id)
+            existing_customer = await self.get_customer_id(org_id)
 
             if existing_customer:
                 session = stripe.billing_portal.Session.create(
@@ -144,7 +136,7 @@ class CustomerManagementService:
             if org_id and customer_id:
                 print(f"Setting customer ID: {customer_id} for org: {org_id}")
 
-                self.set_customer_id(org_id, customer_id)
+                await self.set_customer_id(org_id, customer_id)
 
         return {"status": "success"}
 
@@ -158,7 +150,7 @@ class CustomerManagementService:
             print(f"Creating session for org: {org_id}")
 
             # Verify user has access to this organization
-            org = self.db_service.get_organization(org_id, user.id)
+            org = await self.db_service.get_organization(org_id, user.id)
 
             if not org:
                 raise HTTPException(status_code=404, detail="Organization not found")
@@ -192,7 +184,7 @@ class CustomerManagementService:
             admin_api_key: str = Depends(self.admin_dependency.verify_admin_api_key),
         ):
             try:
-                self.set_customer_id(org_id, customer_id)
+                await self.set_customer_id(org_id, customer_id)
                 return JSONResponse(status_code=200, content={"status": "success"})
             except HTTPException as e:
                 if e.status_code == 401:
@@ -1,5 +1,5 @@
 from app.services.api_key_service.database_service.pocketbase_service import (
-    PocketBaseDatabaseService,
+    get_database_service,
 )
 from app.services.customer_management_service.customer_management_service import (
     CustomerManagementService,
@@ -33,8 +33,5 @@ def get_new_customer_management_router():
 
 
 def make_new_pb_service():
-    pb_url = os.getenv("POCKETBASE_URL", "http://localhost:8090")
-    pb_email = os.getenv("POCKETBASE_ADMIN_EMAIL")
-    pb_password = os.getenv("POCKETBASE_ADMIN_PASSWORD")
-
-    return PocketBaseDatabaseService(pb_url, pb_email, pb_password)
+    # Shared with the rest of the worker rather than a new login per caller
+    return get_database_service()
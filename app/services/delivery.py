@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional, Set
+
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField
+
+from app.types.enums import DeliveryMode
+
+
+@dataclass
+class DeliveryPlan:
+    # Upload to object storage and return `url`
+    upload: bool
+    # Keep the encoded bytes for `imageBase64`
+    inline: bool
+    # Produce and upload the requested derivatives
+    derivatives: bool
+
+
+def plan_delivery(
+    mode: DeliveryMode, selected: Optional[Set[str]] = None
+) -> DeliveryPlan:
+    """Decide what work a request needs from its `delivery` input and,
+    when known, the result fields in its selection set."""
+    upload = mode != DeliveryMode.INLINE_ONLY
+    inline = mode != DeliveryMode.URL_ONLY
+
+    # Derivatives are only ever returned as URLs
+    derivatives = mode != DeliveryMode.INLINE_ONLY
+
+    if selected is not None:
+        upload = upload and "url" in selected
+        inline = inline and "imageBase64" in selected
+        derivatives = derivatives and "derivatives" in selected
+
+    return DeliveryPlan(upload=upload, inline=inline, derivatives=derivatives)
+
+
+def _field_names(selections: Iterable) -> Set[str]:
+    names = set()
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            names.add(selection.name)
+        else:
+            # Fragment spreads and inline fragments
+            names |= _field_names(selection.selections)
+    return names
+
+
+def _find_field(selections: Iterable, name: str) -> Optional[SelectedField]:
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            if selection.name == name:
+                return selection
+        else:
+            found = _find_field(selection.selections, name)
+            if found is not None:
+                return found
+    return None
+
+
+def selected_subfields(info: Info, *path: str) -> Set[str]:
+    """Names of the fields selected below `path` of the current field, e.g.
+    `selected_subfields(info, "results")` for `generateImages { results {..} }`"""
+    field = info.selected_fields[0]
+    for name in path:
+        field = _find_field(field.selections, name)
+        if field is None:
+            return set()
+    return _field_names(field.selections)
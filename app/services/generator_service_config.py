@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from huggingface_hub import HfFolder
 from app.services.utils import pick_device
@@ -46,3 +47,15 @@ def build_gen_service_config(
     console.print(table)
 
     return GeneratorServiceConfig(cache_dir, hf_token, device)
+
+
+def build_gen_service_config_from_env() -> GeneratorServiceConfig:
+    """Build the config from MODEL_CACHE_DIR and HF_TOKEN"""
+    cache_dir = os.getenv("MODEL_CACHE_DIR", "/tmp/model_cache")
+    cache_dir = os.path.expanduser(cache_dir)  # Expands ~ to the home directory
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    hf_token = os.getenv("HF_TOKEN", None)
+
+    return build_gen_service_config(cache_dir=cache_dir, hf_token=hf_token)
@@ -0,0 +1,371 @@
+import asyncio
+import dataclasses
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.types.responses import ImageGenerationResponse
+
+MB = 1024 * 1024
+
+# (api key, idempotency key)
+IdempotencyKey = Tuple[str, str]
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when a key is reused with a different request"""
+
+
+class IdempotencyStoreFullError(Exception):
+    """Raised when every stored key is still in flight"""
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """Hash of a GraphQL input and anything else that shapes the response
+    (e.g. the delivery plan), used to detect a key reused for another
+    request"""
+    canonical = json.dumps(
+        [dataclasses.asdict(part) for part in parts], sort_keys=True, default=repr
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _response_bytes(response: ImageGenerationResponse) -> int:
+    return sum(len(result.image_bytes or b"") for result in response.results or [])
+
+
+class _SharedDir:
+    """Idempotency keys shared by the workers of a host through files.
+
+    The worker running a key holds an flock on `<key>.lock`, which names the
+    request's fingerprint, and writes the successful response to
+    `<key>.response` before letting go. The kernel drops the lock of a
+    worker that dies, so a crashed generation never blocks its key.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        # Responses are pickled; keep them private to this user
+        self.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def load(
+        self, key: IdempotencyKey
+    ) -> Optional[Tuple[str, ImageGenerationResponse]]:
+        """The fingerprint and response stored for `key`, if not expired"""
+        path = self._path(key, "response")
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    def claim(
+        self, key: IdempotencyKey, fingerprint: str
+    ) -> Tuple[Optional[int], Optional[str]]:
+        """Lock `key` for this worker and return the locked fd, or None and
+        the fingerprint of the request holding it (None while unknown)"""
+        path = self._path(key, "lock")
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                holder = os.pread(fd, 64, 0).decode("ascii")
+                os.close(fd)
+                return None, holder or None
+
+            # A sweep may have unlinked the file before it was locked
+            try:
+                if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                    os.pwrite(fd, fingerprint.encode("ascii"), 0)
+                    return fd, None
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def release(self, fd: int):
+        # An unlocked key names no request, so a retry is not a conflict
+        os.ftruncate(fd, 0)
+        os.close(fd)
+
+    def save(
+        self,
+        key: IdempotencyKey,
+        fingerprint: str,
+        response: ImageGenerationResponse,
+    ):
+        data = pickle.dumps((fingerprint, response))
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key, "response"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def sweep(self) -> int:
+        """Delete expired responses and the locks nobody holds; returns the
+        number of responses deleted"""
+        cutoff = time.time() - self.ttl_seconds
+
+        expired = 0
+        for path in self.path.glob("*.response"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    expired += 1
+            except FileNotFoundError:
+                pass
+
+        for path in self.path.glob("*.lock"):
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if os.fstat(fd).st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+            except BlockingIOError:
+                pass
+            finally:
+                os.close(fd)
+
+        return expired
+
+    def _path(self, key: IdempotencyKey, suffix: str) -> Path:
+        name = hashlib.sha256("\0".join(key).encode("utf-8")).hexdigest()
+        return self.path / f"{name}.{suffix}"
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    task: asyncio.Task
+    finished_at: Optional[float] = None
+    result_bytes: int = 0
+
+
+class IdempotencyStore:
+    """Remembers generate responses by idempotency key, per API key.
+
+    The first request with a key runs in its own task, so it completes even
+    if that client disconnects; duplicates arriving meanwhile await the same
+    task (single-flight), and later ones get the stored response without
+    running or billing anything. Only successful responses are kept, for
+    `ttl_seconds`; failures release the key so a retry runs again. Memory
+    is bounded by `max_keys` and `max_result_bytes` of inline image data,
+    the oldest completed keys going first.
+
+    Without `shared_dir` this holds per worker only: a duplicate reaching
+    another worker runs again. With it, the workers of a host coordinate
+    through that directory (see _SharedDir); a duplicate waits for the
+    worker running its key, polling every `poll_seconds`, and then replays
+    the stored response. Expired responses there are swept once a minute.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600,
+        max_keys: int = 10_000,
+        max_result_bytes: int = 256 * MB,
+        shared_dir: Optional[str] = None,
+        poll_seconds: float = 0.25,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self.max_result_bytes = max_result_bytes
+        self.poll_seconds = poll_seconds
+
+        self._entries: "OrderedDict[IdempotencyKey, _Entry]" = OrderedDict()
+        self._result_bytes = 0
+
+        self._shared = _SharedDir(shared_dir, ttl_seconds) if shared_dir else None
+        self._next_sweep = 0.0
+
+        self.started = 0
+        self.joined = 0
+        self.replayed = 0
+        self.conflicts = 0
+        self.expired = 0
+        self.evicted = 0
+        self.rejected = 0
+        self.shared_replayed = 0
+        self.shared_waits = 0
+
+    @classmethod
+    def from_env(cls) -> "IdempotencyStore":
+        return cls(
+            ttl_seconds=float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600")),
+            max_keys=int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000")),
+            max_result_bytes=int(os.getenv("IDEMPOTENCY_MAX_RESULT_MB", "256")) * MB,
+            shared_dir=os.getenv("IDEMPOTENCY_DIR"),
+        )
+
+    async def run(
+        self,
+        api_key: str,
+        idempotency_key: str,
+        fingerprint: str,
+        generate: Callable[[], Awaitable[ImageGenerationResponse]],
+    ) -> ImageGenerationResponse:
+        self._purge()
+        if self._shared is not None and time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + 60
+            self.expired += await asyncio.to_thread(self._shared.sweep)
+        key = (api_key, idempotency_key)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyConflictError(
+                    "Idempotency key was already used for a different request"
+                )
+            if entry.task.done():
+                self.replayed += 1
+            else:
+                self.joined += 1
+            return await asyncio.shield(entry.task)
+
+        if len(self._entries) >= self.max_keys:
+            self.rejected += 1
+            raise IdempotencyStoreFullError("Too many idempotent requests in flight")
+
+        if self._shared is not None:
+            task = asyncio.create_task(self._run_shared(key, fingerprint, generate))
+        else:
+            task = asyncio.create_task(generate())
+        self._entries[key] = _Entry(fingerprint=fingerprint, task=task)
+        task.add_done_callback(lambda done: self._finish(key, done))
+        self.started += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        in_flight = sum(1 for e in self._entries.values() if e.finished_at is None)
+        return {
+            "keys": len(self._entries),
+            "in_flight": in_flight,
+            "result_bytes": self._result_bytes,
+            "max_keys": self.max_keys,
+            "max_result_bytes": self.max_result_bytes,
+            "started": self.started,
+            "joined": self.joined,
+            "replayed": self.replayed,
+            "conflicts": self.conflicts,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "shared": self._shared is not None,
+            "shared_replayed": self.shared_replayed,
+            "shared_waits": self.shared_waits,
+        }
+
+    async def shutdown(self):
+        tasks = [e.task for e in self._entries.values() if not e.task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_shared(
+        self,
+        key: IdempotencyKey,
+        fingerprint: str,
+        generate: Callable[[], Awaitable[ImageGenerationResponse]],
+    ) -> ImageGenerationResponse:
+        """Run `generate` once across the workers sharing the directory"""
+        while True:
+            fd, holder = await asyncio.to_thread(self._shared.claim, key, fingerprint)
+            if fd is not None:
+                break
+            if holder is not None and holder != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyConflictError(
+                    "Idempotency key was already used for a different request"
+                )
+            # Another worker is running it; its response is stored before
+            # the lock is released
+            self.shared_waits += 1
+            await asyncio.sleep(self.poll_seconds)
+
+        try:
+            stored = await asyncio.to_thread(self._shared.load, key)
+            if stored is None:
+                response = await generate()
+                if response.success:
+                    try:
+                        await asyncio.to_thread(
+                            self._shared.save, key, fingerprint, response
+                        )
+                    except OSError as e:
+                        # The response is still good; other workers may
+                        # just run the key again
+                        print(f"Error storing idempotent response: {e}")
+                return response
+        finally:
+            self._shared.release(fd)
+
+        stored_fingerprint, response = stored
+        if stored_fingerprint != fingerprint:
+            self.conflicts += 1
+            raise IdempotencyConflictError(
+                "Idempotency key was already used for a different request"
+            )
+        self.shared_replayed += 1
+        return response
+
+    def _finish(self, key: IdempotencyKey, task: asyncio.Task):
+        entry = self._entries.get(key)
+        if entry is None or entry.task is not task:
+            return
+
+        succeeded = (
+            not task.cancelled()
+            and task.exception() is None
+            and task.result().success
+        )
+        if not succeeded:
+            # Let a retry run again
+            del self._entries[key]
+            return
+
+        entry.finished_at = time.monotonic()
+        entry.result_bytes = _response_bytes(task.result())
+        self._result_bytes += entry.result_bytes
+        self._purge()
+
+    def _remove(self, key: IdempotencyKey):
+        entry = self._entries.pop(key)
+        self._result_bytes -= entry.result_bytes
+
+    def _purge(self):
+        now = time.monotonic()
+
+        for key, entry in list(self._entries.items()):
+            finished_at = entry.finished_at
+            if finished_at is not None and now - finished_at > self.ttl_seconds:
+                self._remove(key)
+                self.expired += 1
+
+        # Oldest completed keys go first when over the count or bytes bound
+        for key, entry in list(self._entries.items()):
+            if (
+                len(self._entries) < self.max_keys
+                and self._result_bytes <= self.max_result_bytes
+            ):
+                break
+            if entry.finished_at is not None:
+                self._remove(key)
+                self.evicted += 1
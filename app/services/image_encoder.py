@@ -0,0 +1,273 @@
+import asyncio
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.types.enums import ImageFormat
+from app.types.image_generation_input import DerivativeSpec, EncodingOptions
+
+MAX_DERIVATIVES = 8
+MAX_DERIVATIVE_SIDE = 4096
+
+
+@dataclass
+class EncodedDerivative:
+    data: bytes
+    image_format: ImageFormat
+    width: int
+    height: int
+    # Resize plus encode
+    encode_ms: float
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    encode_ms: float
+    derivatives: List[EncodedDerivative] = field(default_factory=list)
+
+
+def _check_range(name: str, value: Optional[int], low: int, high: int):
+    if value is not None and not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+
+
+def save_options(
+    image_format: ImageFormat, options: Optional[EncodingOptions]
+) -> Dict[str, Any]:
+    """Translate EncodingOptions into `Image.save` arguments for a format"""
+    if options is None:
+        return {}
+
+    params: Dict[str, Any] = {}
+
+    if image_format == ImageFormat.PNG:
+        _check_range("pngCompressLevel", options.png_compress_level, 0, 9)
+        if options.png_compress_level is not None:
+            params["compress_level"] = options.png_compress_level
+    elif image_format == ImageFormat.JPEG:
+        _check_range("jpegQuality", options.jpeg_quality, 1, 95)
+        if options.jpeg_quality is not None:
+            params["quality"] = options.jpeg_quality
+        if options.jpeg_progressive is not None:
+            params["progressive"] = options.jpeg_progressive
+    elif image_format == ImageFormat.WEBP:
+        _check_range("webpQuality", options.webp_quality, 0, 100)
+        _check_range("webpMethod", options.webp_method, 0, 6)
+        if options.webp_quality is not None:
+            params["quality"] = options.webp_quality
+        if options.webp_method is not None:
+            params["method"] = options.webp_method
+        if options.webp_lossless is not None:
+            params["lossless"] = options.webp_lossless
+
+    return params
+
+
+def check_derivatives(
+    derivatives: List[DerivativeSpec],
+    image_format: ImageFormat,
+    options: Optional[EncodingOptions],
+):
+    """Reject derivative requests the encoder would fail on"""
+    if len(derivatives) > MAX_DERIVATIVES:
+        raise ValueError(f"At most {MAX_DERIVATIVES} derivatives can be requested")
+
+    for spec in derivatives:
+        _check_range("derivative width", spec.width, 1, MAX_DERIVATIVE_SIDE)
+        _check_range("derivative height", spec.height, 1, MAX_DERIVATIVE_SIDE)
+        save_options(spec.image_format or image_format, options)
+
+
+def derivative_size(source: Tuple[int, int], spec: DerivativeSpec) -> Tuple[int, int]:
+    """Target size of a derivative; a missing height keeps the aspect ratio"""
+    if spec.height is not None:
+        return spec.width, spec.height
+    width, height = source
+    return spec.width, max(1, round(spec.width * height / width))
+
+
+def image_size(data: bytes) -> Tuple[int, int]:
+    """Dimensions of an encoded image, read from its header only"""
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def to_pil(image: Any) -> Image.Image:
+    """Accept PIL images or the pipelines' numpy output (HWC, floats in
+    [0, 1] for `output_type="np"`, or uint8)"""
+    if isinstance(image, Image.Image):
+        return image
+
+    array = np.asarray(image)
+    if array.dtype != np.uint8:
+        array = (array * 255).round().clip(0, 255).astype(np.uint8)
+    if array.ndim == 3 and array.shape[-1] == 1:
+        array = array[..., 0]
+    return Image.fromarray(array)
+
+
+def _save(
+    image: Image.Image, image_format: ImageFormat, params: Dict[str, Any]
+) -> bytes:
+    byte_stream = io.BytesIO()
+    image.save(byte_stream, format=image_format.value, **params)
+    return byte_stream.getvalue()
+
+
+class ImageEncoder:
+    """Encodes generated images on a thread pool sized to the CPU.
+
+    Pillow releases the GIL inside its codecs, so the images of a batch are
+    encoded in parallel and the event loop stays free. Numpy pipeline output
+    is converted to pixels here as well, off the inference thread.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="encoder"
+        )
+        self._lock = threading.Lock()
+
+        self.images = 0
+        self.derivatives = 0
+        self.encode_ms = 0.0
+        self.output_bytes = 0
+        self.derivative_ms = 0.0
+        self.derivative_bytes = 0
+        self.by_format: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "ImageEncoder":
+        # 0 sizes the pool to the number of cores
+        return cls(max_workers=int(os.getenv("ENCODER_MAX_WORKERS", "0")) or None)
+
+    async def encode_all(
+        self,
+        images: List[Any],
+        image_format: ImageFormat,
+        options: Optional[EncodingOptions] = None,
+        derivatives: Optional[List[DerivativeSpec]] = None,
+    ) -> List[EncodedImage]:
+        """Encode `images`, plus a resized copy per derivative spec.
+
+        Each image is converted to pixels once; the full-size encode and
+        every resize-and-encode then run as separate jobs on the pool.
+        """
+        params = save_options(image_format, options)
+        derivatives = derivatives or []
+        loop = asyncio.get_running_loop()
+
+        pil_images = await asyncio.gather(
+            *(loop.run_in_executor(self._executor, to_pil, image) for image in images)
+        )
+
+        jobs = []
+        for image in pil_images:
+            jobs.append(
+                loop.run_in_executor(
+                    self._executor, self._encode, image, image_format, params
+                )
+            )
+            for spec in derivatives:
+                spec_format = spec.image_format or image_format
+                jobs.append(
+                    loop.run_in_executor(
+                        self._executor,
+                        self._encode_derivative,
+                        image,
+                        spec,
+                        spec_format,
+                        save_options(spec_format, options),
+                    )
+                )
+
+        results = await asyncio.gather(*jobs)
+
+        # Results are laid out per image: the full-size encode, then its
+        # derivatives in request order
+        per_image = 1 + len(derivatives)
+        encoded = []
+        for offset in range(0, len(results), per_image):
+            image = results[offset]
+            image.derivatives = list(results[offset + 1 : offset + per_image])
+            encoded.append(image)
+        return encoded
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "images": self.images,
+                "derivatives": self.derivatives,
+                "avg_encode_ms": self.encode_ms / self.images if self.images else 0.0,
+                "avg_output_bytes": (
+                    self.output_bytes / self.images if self.images else 0.0
+                ),
+                "by_format": dict(self.by_format),
+                "avg_derivative_ms": (
+                    self.derivative_ms / self.derivatives if self.derivatives else 0.0
+                ),
+                "avg_derivative_bytes": (
+                    self.derivative_bytes / self.derivatives
+                    if self.derivatives
+                    else 0.0
+                ),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _encode(
+        self, image: Any, image_format: ImageFormat, params: Dict[str, Any]
+    ) -> EncodedImage:
+        start = time.perf_counter()
+        data = _save(to_pil(image), image_format, params)
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.images += 1
+            self.encode_ms += encode_ms
+            self.output_bytes += len(data)
+            self.by_format[image_format.name] = (
+                self.by_format.get(image_format.name, 0) + 1
+            )
+
+        return EncodedImage(data=data, encode_ms=encode_ms)
+
+    def _encode_derivative(
+        self,
+        image: Image.Image,
+        spec: DerivativeSpec,
+        image_format: ImageFormat,
+        params: Dict[str, Any],
+    ) -> EncodedDerivative:
+        start = time.perf_counter()
+
+        width, height = derivative_size(image.size, spec)
+        resized = image.resize((width, height), Image.LANCZOS)
+        data = _save(resized, image_format, params)
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        # Counted apart from `images` so derivatives do not skew its averages
+        with self._lock:
+            self.derivatives += 1
+            self.derivative_ms += encode_ms
+            self.derivative_bytes += len(data)
+
+        return EncodedDerivative(
+            data=data,
+            image_format=image_format,
+            width=width,
+            height=height,
+            encode_ms=encode_ms,
+        )
@@ -1,38 +1,95 @@
-import os
-import io
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
 
-from app.services.timer import timer
-from app.services.generator_service_config import build_gen_service_config
-from app.services.model_loaders.load_model import load_model
+from app.services.billing.service import BillingService
+from app.services.generator_service_config import GeneratorServiceConfig
+from app.services.image_encoder import (
+    EncodedDerivative,
+    EncodedImage,
+    ImageEncoder,
+    check_derivatives,
+    image_size,
+    save_options,
+)
+from app.services.inference.backend import InferenceBackend
+from app.services.inference.batch_scheduler import InferenceResult
+from app.services.inference.progress import ProgressListener
 from app.services.model_pipeline_registry.pipeline_registry import PipelineRegistry
-from app.services.utils import get_bytes, merge_inference_params
-from app.types.billing_dependency import get_billing_service
-from app.types.image_generation_input import ImageGenerationInput
+from app.services.result_cache import CachedResult, ResultCache, result_cache_key
+from app.services.stages import PostProcessingStages
+from app.services.storage.content_store import ContentAddressedStore
+from app.services.utils import merge_inference_params
+from app.types.enums import ImageFormat
+from app.types.image_generation_input import DerivativeSpec, ImageGenerationInput
+from app.validators.image_generation_input.image_dimensions_validator import (
+    image_dimension_errors,
+)
 import traceback
-import boto3
-import uuid
 
 
-class ImageGenerationService:
-    def __init__(self):
-        cache_dir = os.getenv("MODEL_CACHE_DIR", "/tmp/model_cache")
-        cache_dir = os.path.expanduser(cache_dir)  # Expands ~ to the home directory
+@dataclass
+class GeneratedDerivative:
+    image_format: ImageFormat
+    width: int
+    height: int
+    size_bytes: int
+    url: Optional[str]
 
-        os.makedirs(cache_dir, exist_ok=True)
 
-        hf_token = os.getenv("HF_TOKEN", None)
+@dataclass
+class GeneratedImage:
+    image_bytes: bytes
+    # None when the image was not uploaded
+    url: Optional[str]
+    # Billed share of the batched inference call
+    inference_ms: float
+    encode_ms: float
+    seed: Optional[int] = None
+    derivatives: List[GeneratedDerivative] = field(default_factory=list)
 
-        self.config = build_gen_service_config(cache_dir=cache_dir, hf_token=hf_token)
 
-        self.billing_service = get_billing_service()
+class ImageGenerationService:
+    def __init__(
+        self,
+        config: GeneratorServiceConfig,
+        billing_service: BillingService,
+        inference: InferenceBackend,
+        storage: ContentAddressedStore,
+        encoder: ImageEncoder,
+        result_cache: ResultCache,
+        stages: PostProcessingStages,
+    ):
+        self.config = config
+        self.billing_service = billing_service
+        self.inference = inference
+        self.storage = storage
+        self.encoder = encoder
+        self.result_cache = result_cache
+        self.stages = stages
 
     async def generate(
         self,
         image_gen_input: ImageGenerationInput,
         api_key: str,
+        progress_listener: Optional[ProgressListener] = None,
+        preview_every: Optional[int] = None,
+        upload: bool = True,
+        derivatives: bool = True,
         **kwargs,
-    ) -> tuple[bytes, str]:
-        """Generate an image and return raw bytes"""
+    ) -> List[GeneratedImage]:
+        """Generate `num_images` images in a single inference call and return
+        their encoded bytes and, when `upload` is set, public URLs. With
+        `derivatives` set, the requested resized copies are encoded from the
+        same output and uploaded too.
+
+        After inference, images pass through the encode, upload and billing
+        stages in that order; a request that fails before billing is not
+        billed.
+
+        `progress_listener` is called on the event loop with step progress
+        (and a latent preview every `preview_every` steps when supported).
+        """
         try:
             print("generate")
             print(f"API Key: {api_key}")
@@ -41,9 +98,21 @@ class ImageGenerationService:
 
             print("Registered pipelines:", PipelineRegistry._registry)
 
-            model = load_model(image_gen_input.model_type, self.config)
+            derivative_specs = image_gen_input.derivatives or []
+            if not derivatives:
+                derivative_specs = []
 
-            print(f"Model loaded: {image_gen_input.model_type}")
+            # Reject bad sizes and encoder settings before spending inference
+            # time; sizes passed in GraphQL variables were not validated yet
+            for name in ("width", "height"):
+                value = getattr(image_gen_input, name)
+                errors = image_dimension_errors(name, value) if value is not None else []
+                if errors:
+                    raise ValueError(errors[0])
+            save_options(image_gen_input.image_format, image_gen_input.encoding)
+            check_derivatives(
+                derivative_specs, image_gen_input.image_format, image_gen_input.encoding
+            )
 
             pipeline_config = PipelineRegistry.get(image_gen_input.model_type)
 
@@ -57,53 +126,208 @@ class ImageGenerationService:
 
             print(f"Final inference parameters: {inference_params}")
 
-            image = None
-
             print(
-                f"\033[94mGenerating an image with Prompt:  {image_gen_input.prompt}\033[0m"
+                f"\033[94mGenerating {image_gen_input.num_images} image(s) with Prompt:  {image_gen_input.prompt}\033[0m"
             )
 
-            with timer(self.config.device) as inference_time:
-                image = model(image_gen_input.prompt, **inference_params).images[0]
+            seeds = None
+            if image_gen_input.seed is not None:
+                seeds = [
+                    image_gen_input.seed + i for i in range(image_gen_input.num_images)
+                ]
 
-            print("Image generated successfully")
+            # Only seeded requests are deterministic, hence cacheable
+            cache_key = None
+            cached = None
+            if seeds is not None:
+                cache_key = result_cache_key(
+                    image_gen_input.model_type,
+                    image_gen_input.prompt,
+                    inference_params,
+                    seeds,
+                    image_gen_input.image_format,
+                    image_gen_input.encoding,
+                    derivative_specs,
+                )
+                cached = await self.result_cache.get(cache_key)
 
-            # Convert PIL Image to bytes
-            byte_stream = get_bytes(image_gen_input, image)
+            if cached is not None:
+                print("Serving seeded request from the result cache")
+                # Billed like the request that produced it; the cache makes
+                # repeats fast, not free
+                billed_ms = cached.inference_ms
+                encoded = self._from_cache(
+                    cached.blobs, image_gen_input.image_format, derivative_specs
+                )
+            else:
+                # The device moves on to the next batch while this one is
+                # post-processed in the stages below
+                result = await self._infer(
+                    image_gen_input,
+                    inference_params,
+                    seeds,
+                    progress_listener,
+                    preview_every,
+                )
+                billed_ms = result.inference_ms
 
-            print(
-                f"Recording billing with inference_time={inference_time.value}, api_key={api_key}"
-            )
-
-            await self.billing_service.record_billing(inference_time.value, api_key)
-
-            print(f"Inference took {inference_time.value:.2f}ms")
-
-            # print(byte_stream.getvalue())
+                encoded = await self.stages.encode.run(
+                    lambda: self._encode(image_gen_input, result.images, derivative_specs)
+                )
+                if cache_key is not None:
+                    blobs = []
+                    for image in encoded:
+                        blobs.append(image.data)
+                        blobs.extend(d.data for d in image.derivatives)
+                    try:
+                        await self.result_cache.put(
+                            cache_key, CachedResult(blobs, billed_ms)
+                        )
+                    except Exception as e:
+                        # Caching is best-effort; the images are already made
+                        print(f"Error caching result: {e}")
 
-            final_bytes = byte_stream.getvalue()
-
-            # Upload to Cloudflare R2
-            r2_client = boto3.client(
-                "s3",
-                endpoint_url=os.getenv("R2_ENDPOINT_URL"),
-                aws_access_key_id=os.getenv("R2_ACCESS_KEY_ID"),
-                aws_secret_access_key=os.getenv("R2_SECRET_ACCESS_KEY"),
-                region_name=os.getenv("R2_REGION_NAME"),
+            # Uploads run concurrently; identical images are stored once
+            image_urls, derivative_urls = await self.stages.upload.run(
+                lambda: asyncio.gather(
+                    self._store_images(encoded, image_gen_input.image_format, upload),
+                    self._store_derivatives(encoded),
+                )
             )
+            if upload:
+                for image_url in image_urls:
+                    print(f"Image uploaded to: {image_url}")
 
-            object_key = f"images/{uuid.uuid4()}.png"
-            r2_client.upload_fileobj(
-                io.BytesIO(final_bytes), os.getenv("R2_BUCKET_NAME"), object_key
+            print(
+                f"Recording billing with inference_time={billed_ms}, api_key={api_key}"
+            )
+            await self.stages.billing.run(
+                lambda: self.billing_service.record_billing(billed_ms, api_key)
             )
 
-            image_url = f"{os.getenv('R2_PUBLIC_URL')}/{object_key}"
-            print(f"Image uploaded to: {image_url}")
+            per_image_ms = billed_ms / len(encoded)
 
-            print("returning final_bytes nextttttt")
+            generated = [
+                GeneratedImage(
+                    image_bytes=image.data,
+                    url=image_url,
+                    inference_ms=per_image_ms,
+                    encode_ms=image.encode_ms,
+                    seed=seeds[i] if seeds is not None else None,
+                    derivatives=[
+                        GeneratedDerivative(
+                            image_format=derivative.image_format,
+                            width=derivative.width,
+                            height=derivative.height,
+                            size_bytes=len(derivative.data),
+                            url=derivative_url,
+                        )
+                        for derivative, derivative_url in zip(
+                            image.derivatives, derivative_urls[i]
+                        )
+                    ],
+                )
+                for i, (image, image_url) in enumerate(zip(encoded, image_urls))
+            ]
 
-            return (final_bytes, image_url)
+            return generated
         except Exception as e:
             print(f"Error generating image: {e}")
             traceback.print_exc()
             raise
+
+    async def _infer(
+        self,
+        image_gen_input: ImageGenerationInput,
+        inference_params: dict,
+        seeds: Optional[List[int]],
+        progress_listener: Optional[ProgressListener],
+        preview_every: Optional[int],
+    ) -> InferenceResult:
+        # Compatible concurrent requests share a single pipeline call
+        result = await self.inference.submit(
+            image_gen_input.model_type,
+            image_gen_input.prompt,
+            inference_params,
+            num_images=image_gen_input.num_images,
+            seeds=seeds,
+            progress_listener=progress_listener,
+            preview_every=preview_every,
+        )
+
+        print(f"Images generated successfully (batch of {result.batch_size})")
+        print(f"Inference took {result.inference_ms:.2f}ms")
+
+        return result
+
+    async def _encode(
+        self,
+        image_gen_input: ImageGenerationInput,
+        images: List[Any],
+        derivative_specs: List[DerivativeSpec],
+    ) -> List[EncodedImage]:
+        # Encoded in parallel off the event loop
+        encoded = await self.encoder.encode_all(
+            images,
+            image_gen_input.image_format,
+            image_gen_input.encoding,
+            derivative_specs,
+        )
+        print(
+            f"Encoded {len(encoded)} image(s) in "
+            f"{max(e.encode_ms for e in encoded):.2f}ms "
+            f"({sum(len(e.data) for e in encoded)} bytes)"
+        )
+
+        return encoded
+
+    async def _store_images(
+        self, encoded: List[EncodedImage], image_format: ImageFormat, upload: bool
+    ) -> List[Optional[str]]:
+        if not upload:
+            return [None] * len(encoded)
+        return await asyncio.gather(
+            *(self.storage.store(image.data, image_format) for image in encoded)
+        )
+
+    async def _store_derivatives(self, encoded: List[EncodedImage]) -> List[List[str]]:
+        return await asyncio.gather(
+            *(
+                asyncio.gather(
+                    *(
+                        self.storage.store(derivative.data, derivative.image_format)
+                        for derivative in image.derivatives
+                    )
+                )
+                for image in encoded
+            )
+        )
+
+    @staticmethod
+    def _from_cache(
+        blobs: List[bytes],
+        image_format: ImageFormat,
+        derivative_specs: List[DerivativeSpec],
+    ) -> List[EncodedImage]:
+        """Rebuild encoded images from a cache entry, where each image is
+        followed by its derivatives"""
+        per_image = 1 + len(derivative_specs)
+        encoded = []
+        for offset in range(0, len(blobs), per_image):
+            derivatives = []
+            image_blobs = blobs[offset + 1 : offset + per_image]
+            for spec, data in zip(derivative_specs, image_blobs):
+                width, height = image_size(data)
+                derivatives.append(
+                    EncodedDerivative(
+                        data=data,
+                        image_format=spec.image_format or image_format,
+                        width=width,
+                        height=height,
+                        encode_ms=0.0,
+                    )
+                )
+            encoded.append(
+                EncodedImage(data=blobs[offset], encode_ms=0.0, derivatives=derivatives)
+            )
+        return encoded
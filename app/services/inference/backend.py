@@ -0,0 +1,160 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+
+from app.services.generator_service_config import GeneratorServiceConfig
+from app.services.inference.batch_scheduler import BatchScheduler, InferenceResult
+from app.services.inference.executor import InferenceExecutor
+from app.services.inference.prompt_cache import PromptEmbeddingCache
+from app.services.inference.sequence_length import SequenceLengthSelector
+from app.services.inference.progress import ProgressListener
+from app.services.metrics import MetricsRegistry
+from app.services.model_pool.model_pool import ModelPool, get_model_pool
+from app.services.model_pool.prewarm import (
+    PrewarmSettings,
+    ReadinessTracker,
+    prewarm_models,
+)
+from app.types.enums import ModelType
+
+
+class InferenceBackend:
+    """Where pipeline calls run for a worker.
+
+    INFERENCE_MODE=local runs models inside the worker; INFERENCE_MODE=shared
+    sends them to the single inference server process so that several
+    uvicorn workers share one copy of each model.
+    """
+
+    def start(self):
+        """Begin background work such as prewarming"""
+
+    async def submit(
+        self,
+        model_type: ModelType,
+        prompt: str,
+        inference_params: Dict[str, Any],
+        num_images: int = 1,
+        seeds: Optional[List[int]] = None,
+        progress_listener: Optional[ProgressListener] = None,
+        preview_every: Optional[int] = None,
+    ) -> InferenceResult:
+        raise NotImplementedError
+
+    async def readiness(self) -> ReadinessTracker:
+        raise NotImplementedError
+
+    async def shutdown(self):
+        raise NotImplementedError
+
+
+class LocalInferenceBackend(InferenceBackend):
+    """Owns the model pool, executor and batch scheduler in this process"""
+
+    def __init__(
+        self,
+        config: GeneratorServiceConfig,
+        model_pool: ModelPool,
+        executor: InferenceExecutor,
+        scheduler: BatchScheduler,
+        prewarm_settings: PrewarmSettings,
+    ):
+        self.config = config
+        self.model_pool = model_pool
+        self.executor = executor
+        self.scheduler = scheduler
+        self.prewarm_settings = prewarm_settings
+        self._readiness = ReadinessTracker(prewarm_settings.model_types)
+        self._prewarm_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def build(cls, config: GeneratorServiceConfig) -> "LocalInferenceBackend":
+        model_pool = get_model_pool()
+
+        executor = InferenceExecutor.from_env(config.device)
+        MetricsRegistry.register("inference_executor", executor.stats)
+
+        prompt_cache = PromptEmbeddingCache.from_env()
+        MetricsRegistry.register("prompt_cache", prompt_cache.stats)
+
+        sequence_lengths = SequenceLengthSelector(config)
+        MetricsRegistry.register("sequence_length", sequence_lengths.stats)
+
+        scheduler = BatchScheduler.from_env(
+            model_pool, config, executor, prompt_cache, sequence_lengths
+        )
+        MetricsRegistry.register("batch_scheduler", scheduler.stats)
+
+        return cls(
+            config=config,
+            model_pool=model_pool,
+            executor=executor,
+            scheduler=scheduler,
+            prewarm_settings=PrewarmSettings.from_env(),
+        )
+
+    def start(self):
+        """Load and warm configured models in the background; readiness is
+        reported through the health query while this runs."""
+        if not self.prewarm_settings.model_types:
+            return
+
+        # Runs on the inference thread so warmup never overlaps live requests
+        self._prewarm_task = asyncio.create_task(
+            self.executor.run(
+                prewarm_models,
+                self.prewarm_settings,
+                self.model_pool,
+                self.config,
+                self._readiness,
+            )
+        )
+
+    async def submit(
+        self,
+        model_type: ModelType,
+        prompt: str,
+        inference_params: Dict[str, Any],
+        num_images: int = 1,
+        seeds: Optional[List[int]] = None,
+        progress_listener: Optional[ProgressListener] = None,
+        preview_every: Optional[int] = None,
+    ) -> InferenceResult:
+        return await self.scheduler.submit(
+            model_type,
+            prompt,
+            inference_params,
+            num_images=num_images,
+            seeds=seeds,
+            progress_listener=progress_listener,
+            preview_every=preview_every,
+        )
+
+    async def readiness(self) -> ReadinessTracker:
+        return self._readiness
+
+    async def shutdown(self):
+        if self._prewarm_task is not None and not self._prewarm_task.done():
+            self._prewarm_task.cancel()
+
+        await self.scheduler.shutdown()
+        self.executor.shutdown()
+        self.model_pool.clear()
+
+
+def build_inference_backend(config: GeneratorServiceConfig) -> InferenceBackend:
+    """Pick the backend for this worker from INFERENCE_MODE (local|shared)"""
+    mode = os.getenv("INFERENCE_MODE", "local").lower()
+
+    if mode == "shared":
+        # remote_backend subclasses InferenceBackend, so import it lazily
+        from app.services.inference.remote_backend import RemoteInferenceBackend
+
+        backend = RemoteInferenceBackend.from_env()
+        MetricsRegistry.register("inference_server", backend.stats)
+        return backend
+
+    if mode != "local":
+        print(f"Warning: unknown INFERENCE_MODE {mode}, using local")
+
+    return LocalInferenceBackend.build(config)
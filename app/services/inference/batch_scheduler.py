@@ -0,0 +1,411 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+
+from app.services.generator_service_config import GeneratorServiceConfig
+from app.services.inference.executor import InferenceExecutor
+from app.services.inference.prompt_cache import PromptEmbeddingCache
+from app.services.inference.sequence_length import SequenceLengthSelector
+from app.services.inference.progress import (
+    ProgressListener,
+    ProgressSubscription,
+    StepProgressReporter,
+)
+from app.services.model_pipeline_registry.pipeline_registry import PipelineRegistry
+from app.services.model_pool.model_pool import ModelPool
+from app.services.timer import timer
+from app.types.enums import ModelType
+
+BatchKey = Tuple[ModelType, str]
+
+
+@dataclass
+class InferenceResult:
+    images: List[Any]
+    # Share of the batch's inference time attributable to this request
+    inference_ms: float
+    batch_size: int
+
+
+@dataclass
+class _PendingRequest:
+    prompt: str
+    num_images: int
+    # One seed per image, or None to let the pipeline sample
+    seeds: Optional[List[int]]
+    future: asyncio.Future
+    progress_listener: Optional[ProgressListener] = None
+    preview_every: Optional[int] = None
+
+
+@dataclass
+class _Batch:
+    key: BatchKey
+    model_type: ModelType
+    inference_params: Dict[str, Any]
+    max_size: int
+    requests: List[_PendingRequest] = field(default_factory=list)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def num_images(self) -> int:
+        return sum(pending.num_images for pending in self.requests)
+
+
+class BatchScheduler:
+    """Coalesces concurrent compatible requests into one pipeline call.
+
+    Requests are compatible when they target the same model with identical
+    merged inference params (size, steps, guidance, sequence length, ...).
+    The first request of a batch opens a window of `max_wait_ms`; the batch
+    runs when the window closes or `max_batch_size` images have been
+    requested, whichever is first. Each caller gets back its own images and
+    a proportional share of the batch's inference time for billing.
+
+    Batches run on the device's InferenceExecutor so the event loop is never
+    blocked by model loading or denoising. For pipelines with a prompt
+    encoder, prompt embeddings come from `prompt_cache` and are encoded only
+    on a miss.
+    """
+
+    def __init__(
+        self,
+        model_pool: ModelPool,
+        config: GeneratorServiceConfig,
+        executor: InferenceExecutor,
+        max_batch_size: int = 4,
+        max_wait_ms: float = 20,
+        progress_interval_ms: float = 200,
+        prompt_cache: Optional[PromptEmbeddingCache] = None,
+        sequence_lengths: Optional[SequenceLengthSelector] = None,
+    ):
+        self.model_pool = model_pool
+        self.config = config
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self.progress_interval_ms = progress_interval_ms
+        self.prompt_cache = prompt_cache
+        self.sequence_lengths = sequence_lengths
+
+        self._open: Dict[BatchKey, _Batch] = {}
+        self._tasks: set = set()
+
+        self.batches_run = 0
+        self.requests_served = 0
+        self.images_generated = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.inference_ms = 0.0
+        self.progress_overhead_ms = 0.0
+
+    @classmethod
+    def from_env(
+        cls,
+        model_pool: ModelPool,
+        config: GeneratorServiceConfig,
+        executor: InferenceExecutor,
+        prompt_cache: Optional[PromptEmbeddingCache] = None,
+        sequence_lengths: Optional[SequenceLengthSelector] = None,
+    ) -> "BatchScheduler":
+        return cls(
+            model_pool,
+            config,
+            executor,
+            max_batch_size=int(os.getenv("BATCH_MAX_SIZE", "4")),
+            max_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", "20")),
+            progress_interval_ms=float(os.getenv("PROGRESS_MIN_INTERVAL_MS", "200")),
+            prompt_cache=prompt_cache,
+            sequence_lengths=sequence_lengths,
+        )
+
+    async def submit(
+        self,
+        model_type: ModelType,
+        prompt: str,
+        inference_params: Dict[str, Any],
+        num_images: int = 1,
+        seeds: Optional[List[int]] = None,
+        progress_listener: Optional[ProgressListener] = None,
+        preview_every: Optional[int] = None,
+    ) -> InferenceResult:
+        if self.sequence_lengths is not None:
+            inference_params = await self.sequence_lengths.apply(
+                model_type, prompt, inference_params
+            )
+
+        key = (model_type, self._canonical_params(inference_params))
+
+        batch = self._open.get(key)
+        if batch is not None and batch.num_images + num_images > batch.max_size:
+            # Joining would overflow the batch; let it run and start a new one
+            self._close(batch)
+            batch = None
+
+        if batch is None:
+            batch = _Batch(
+                key=key,
+                model_type=model_type,
+                inference_params=dict(inference_params),
+                max_size=self._max_size_for(model_type),
+            )
+            self._open[key] = batch
+            self._spawn(self._dispatch(batch))
+
+        pending = _PendingRequest(
+            prompt=prompt,
+            num_images=num_images,
+            seeds=seeds,
+            future=asyncio.get_running_loop().create_future(),
+            progress_listener=progress_listener,
+            preview_every=preview_every,
+        )
+        batch.requests.append(pending)
+
+        if batch.num_images >= batch.max_size:
+            self._close(batch)
+
+        return await pending.future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches_run": self.batches_run,
+            "requests_served": self.requests_served,
+            "images_generated": self.images_generated,
+            "avg_batch_size": (
+                self.images_generated / self.batches_run if self.batches_run else 0.0
+            ),
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "open_batches": len(self._open),
+            "progress_overhead_ratio": (
+                self.progress_overhead_ms / self.inference_ms
+                if self.inference_ms
+                else 0.0
+            ),
+        }
+
+    async def shutdown(self):
+        for batch in list(self._open.values()):
+            self._close(batch)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _max_size_for(self, model_type: ModelType) -> int:
+        pipeline_config = PipelineRegistry.get(model_type)
+        if pipeline_config.max_batch_size is not None:
+            return max(1, min(self.max_batch_size, pipeline_config.max_batch_size))
+        return self.max_batch_size
+
+    @staticmethod
+    def _canonical_params(inference_params: Dict[str, Any]) -> str:
+        return json.dumps(inference_params, sort_keys=True, default=repr)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _close(self, batch: _Batch):
+        """Stop a batch from accepting requests and let it run"""
+        if self._open.get(batch.key) is batch:
+            del self._open[batch.key]
+        batch.full.set()
+
+    async def _dispatch(self, batch: _Batch):
+        try:
+            await asyncio.wait_for(batch.full.wait(), timeout=self.max_wait_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+
+        self._close(batch)
+
+        try:
+            results = await self.executor.run(
+                self._run_batch, batch, asyncio.get_running_loop()
+            )
+        except Exception as e:
+            for pending in batch.requests:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+
+        for pending, result in zip(batch.requests, results):
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+    def _run_batch(
+        self, batch: _Batch, loop: asyncio.AbstractEventLoop
+    ) -> List[InferenceResult]:
+        model = self.model_pool.get(batch.model_type, self.config)
+
+        prompt, inference_params = self._build_call(batch)
+        prompt = self._apply_prompt_embeddings(batch, model, prompt, inference_params)
+
+        reporter = self._progress_reporter(batch, inference_params, loop)
+        if reporter is not None:
+            inference_params["callback_on_step_end"] = reporter
+        size = batch.num_images
+
+        print(
+            f"Running batch of {size} images ({len(batch.requests)} requests) "
+            f"for {batch.model_type.name}"
+        )
+
+        with timer(self.config.device) as inference_time:
+            images = model(prompt, **inference_params).images
+
+        if len(images) != size:
+            raise RuntimeError(
+                f"Pipeline returned {len(images)} images for a batch of {size}"
+            )
+
+        self.batches_run += 1
+        self.requests_served += len(batch.requests)
+        self.images_generated += size
+        self.batch_size_histogram[size] = self.batch_size_histogram.get(size, 0) + 1
+        self.inference_ms += inference_time.value
+        if reporter is not None:
+            self.progress_overhead_ms += reporter.overhead_ms
+
+        # Images come back grouped per request, in submission order
+        per_image_ms = inference_time.value / size
+        results = []
+        offset = 0
+        for pending in batch.requests:
+            results.append(
+                InferenceResult(
+                    images=list(images[offset : offset + pending.num_images]),
+                    inference_ms=per_image_ms * pending.num_images,
+                    batch_size=size,
+                )
+            )
+            offset += pending.num_images
+
+        return results
+
+    def _build_call(self, batch: _Batch) -> Tuple[Any, Dict[str, Any]]:
+        """Shape the prompt argument and params for one pipeline call.
+
+        When every request asks for the same number of images the pipelines'
+        native `num_images_per_prompt` is used so each prompt is encoded
+        once; mixed counts fall back to repeating prompts.
+        """
+        inference_params = dict(batch.inference_params)
+        requests = batch.requests
+        counts = {pending.num_images for pending in requests}
+
+        if len(counts) == 1:
+            prompts = [pending.prompt for pending in requests]
+            inference_params["num_images_per_prompt"] = counts.pop()
+        else:
+            prompts = [
+                pending.prompt for pending in requests for _ in range(pending.num_images)
+            ]
+            inference_params["num_images_per_prompt"] = 1
+
+        if any(pending.seeds is not None for pending in requests):
+            # One generator per image keeps seeded images reproducible
+            # whatever else shares their batch
+            generators = []
+            for pending in requests:
+                if pending.seeds is not None:
+                    generators.extend(self._seeded_generator(s) for s in pending.seeds)
+                else:
+                    generators.extend(
+                        self._random_generator() for _ in range(pending.num_images)
+                    )
+            inference_params["generator"] = generators
+
+        if PipelineRegistry.get(batch.model_type).supports_numpy_output:
+            inference_params["output_type"] = "np"
+
+        prompt = prompts[0] if len(prompts) == 1 else prompts
+        return prompt, inference_params
+
+    def _apply_prompt_embeddings(
+        self,
+        batch: _Batch,
+        model: Any,
+        prompt: Any,
+        inference_params: Dict[str, Any],
+    ) -> Any:
+        """Swap the prompts for cached embeddings when the pipeline allows it.
+
+        Embeddings are laid out one row per image, so `num_images_per_prompt`
+        becomes 1. Returns the prompt argument for the pipeline call.
+        """
+        encoder = PipelineRegistry.get(batch.model_type).prompt_encoder
+        cache = self.prompt_cache
+        if encoder is None or cache is None or not cache.max_bytes:
+            return prompt
+
+        negative_prompt = inference_params.pop("negative_prompt", None)
+        max_sequence_length = inference_params.get("max_sequence_length")
+        prompts = [
+            pending.prompt for pending in batch.requests for _ in range(pending.num_images)
+        ]
+
+        by_prompt: Dict[str, Dict[str, torch.Tensor]] = {}
+        # encode_prompt is not wrapped in no_grad like the pipelines' __call__
+        with torch.no_grad():
+            for text in dict.fromkeys(prompts):
+                key = (batch.model_type, text, negative_prompt, max_sequence_length)
+                by_prompt[text] = cache.get_or_encode(
+                    key,
+                    lambda text=text: encoder.encode(
+                        model, text, negative_prompt, max_sequence_length
+                    ),
+                )
+
+        for name in by_prompt[prompts[0]]:
+            inference_params[name] = torch.cat([by_prompt[p][name] for p in prompts])
+        inference_params["num_images_per_prompt"] = 1
+
+        return prompts if encoder.needs_prompt_text else None
+
+    def _progress_reporter(
+        self,
+        batch: _Batch,
+        inference_params: Dict[str, Any],
+        loop: asyncio.AbstractEventLoop,
+    ) -> Optional[StepProgressReporter]:
+        pipeline_config = PipelineRegistry.get(batch.model_type)
+        if not pipeline_config.supports_step_callback:
+            return None
+
+        subscriptions = []
+        offset = 0
+        for pending in batch.requests:
+            if pending.progress_listener is not None:
+                subscriptions.append(
+                    ProgressSubscription(
+                        listener=pending.progress_listener,
+                        preview_every=pending.preview_every,
+                        latent_index=offset,
+                    )
+                )
+            offset += pending.num_images
+
+        if not subscriptions:
+            return None
+
+        return StepProgressReporter(
+            subscriptions,
+            total_steps=inference_params.get("num_inference_steps") or 50,
+            loop=loop,
+            min_interval_ms=self.progress_interval_ms,
+            latent_rgb_factors=pipeline_config.latent_rgb_factors,
+        )
+
+    def _random_generator(self) -> torch.Generator:
+        generator = torch.Generator(device=self.config.device)
+        generator.seed()
+        return generator
+
+    def _seeded_generator(self, seed: int) -> torch.Generator:
+        return torch.Generator(device=self.config.device).manual_seed(seed)
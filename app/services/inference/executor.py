@@ -0,0 +1,85 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class InferenceQueueFullError(Exception):
+    """Raised when a device already has `max_queue_size` jobs waiting"""
+
+
+class InferenceExecutor:
+    """Runs blocking GPU work for one device on a dedicated thread.
+
+    A single worker keeps jobs on the device serialized (pipelines are not
+    safe to call concurrently) while the event loop only awaits a future.
+    Submissions beyond `max_queue_size` in-flight jobs are rejected rather
+    than queued without bound.
+    """
+
+    def __init__(self, device: str, max_queue_size: int = 16):
+        self.device = device
+        self.max_queue_size = max(1, max_queue_size)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"inference-{device}"
+        )
+        self._in_flight = 0
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_ms = 0.0
+        self._started_at = time.perf_counter()
+
+    @classmethod
+    def from_env(cls, device: str) -> "InferenceExecutor":
+        return cls(device, max_queue_size=int(os.getenv("INFERENCE_QUEUE_SIZE", "16")))
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self._in_flight >= self.max_queue_size:
+            self.rejected += 1
+            raise InferenceQueueFullError(
+                f"Inference queue for {self.device} is full ({self.max_queue_size} jobs)"
+            )
+
+        self._in_flight += 1
+        self.submitted += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(self._timed, fn, *args, **kwargs)
+            )
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        wall_ms = (time.perf_counter() - self._started_at) * 1000
+        return {
+            "device": self.device,
+            "max_queue_size": self.max_queue_size,
+            "in_flight": self._in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "busy_ms": round(self.busy_ms, 2),
+            "utilization": self.busy_ms / wall_ms if wall_ms else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _timed(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.busy_ms += (time.perf_counter() - start) * 1000
@@ -0,0 +1,226 @@
+"""Shared inference process.
+
+Owns every model pipeline (model pool, executor and batch scheduler) so the
+uvicorn workers hold no weights of their own. Workers started with
+INFERENCE_MODE=shared reach it over a unix socket through
+RemoteInferenceBackend.
+
+    python -m app.services.inference.inference_server
+"""
+
+import asyncio
+import dataclasses
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.services.generator_service_config import build_gen_service_config_from_env
+from app.services.inference.backend import LocalInferenceBackend
+from app.services.inference.batch_scheduler import InferenceResult
+from app.services.inference.executor import InferenceQueueFullError
+from app.services.inference.ipc import (
+    Message,
+    default_socket_path,
+    read_message,
+    write_message,
+)
+from app.services.inference.shared_buffers import SharedBufferExporter
+from app.services.metrics import MetricsRegistry
+
+
+class _Connection:
+    """One worker connection; replies and progress leave in order through
+    a single writer task."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self._outbox: "asyncio.Queue[Message]" = asyncio.Queue()
+
+    def send(self, message: Message):
+        self._outbox.put_nowait(message)
+
+    async def flush_forever(self):
+        while True:
+            message = await self._outbox.get()
+            await write_message(self.writer, message)
+
+
+class InferenceServer:
+    """Serves generate, readiness and metrics requests from workers.
+
+    Each connection multiplexes many requests by id, so concurrent requests
+    from every worker reach the same BatchScheduler and can share batches.
+
+    With an `exporter`, generated images are parked in shared memory and
+    only their descriptors are sent, instead of pickling megabytes of pixels
+    through the socket.
+    """
+
+    def __init__(
+        self,
+        backend: LocalInferenceBackend,
+        socket_path: str,
+        exporter: Optional[SharedBufferExporter] = None,
+    ):
+        self.backend = backend
+        self.socket_path = socket_path
+        self.exporter = exporter
+        self.connections = 0
+        self.requests = 0
+
+    async def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        server = await asyncio.start_unix_server(
+            self._handle_connection, path=self.socket_path
+        )
+        os.chmod(self.socket_path, 0o600)
+        print(f"Inference server listening on {self.socket_path}")
+
+        reclaimer = None
+        if self.exporter is not None:
+            reclaimer = asyncio.create_task(self._reclaim_forever())
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if reclaimer is not None:
+                reclaimer.cancel()
+                self.exporter.reclaim(older_than=0)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def stats(self):
+        return {"connections": self.connections, "requests": self.requests}
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        connection = _Connection(writer)
+        flusher = asyncio.create_task(connection.flush_forever())
+        tasks = set()
+        self.connections += 1
+
+        try:
+            while True:
+                message = await read_message(reader)
+                task = asyncio.create_task(self._handle_message(message, connection))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # The worker is gone; nobody is left to receive these replies
+            self.connections -= 1
+            for task in tasks:
+                task.cancel()
+            flusher.cancel()
+            writer.close()
+
+    async def _handle_message(self, message: Message, connection: _Connection):
+        self.requests += 1
+
+        try:
+            if message["op"] == "generate":
+                reply = await self._generate(message, connection)
+            elif message["op"] == "readiness":
+                reply = {"readiness": await self.backend.readiness()}
+            elif message["op"] == "metrics":
+                reply = {"metrics": await MetricsRegistry.snapshot()}
+            else:
+                raise ValueError(f"Unknown inference op: {message['op']}")
+            reply["type"] = "result"
+        except InferenceQueueFullError as e:
+            reply = {"type": "error", "error": str(e), "overloaded": True}
+        except Exception as e:
+            reply = {"type": "error", "error": str(e), "overloaded": False}
+
+        reply["id"] = message["id"]
+        connection.send(reply)
+
+    async def _generate(self, message: Message, connection: _Connection) -> Message:
+        progress_listener = None
+        if message["progress"]:
+
+            def progress_listener(progress):
+                connection.send(
+                    {"id": message["id"], "type": "progress", "progress": progress}
+                )
+
+        result = await self.backend.submit(
+            message["model_type"],
+            message["prompt"],
+            message["inference_params"],
+            num_images=message["num_images"],
+            seeds=message["seeds"],
+            progress_listener=progress_listener,
+            preview_every=message["preview_every"],
+        )
+        return {"result": self._share_images(result)}
+
+    def _share_images(self, result: InferenceResult) -> InferenceResult:
+        if self.exporter is None:
+            return result
+
+        images = []
+        for image in result.images:
+            try:
+                images.append(self.exporter.export_image(image))
+            except (OSError, ValueError) as e:
+                # /dev/shm full or an unsupported mode: pickle this one
+                print(f"Sending image without shared memory: {e}")
+                images.append(image)
+
+        return dataclasses.replace(result, images=images)
+
+    async def _reclaim_forever(self):
+        while True:
+            await asyncio.sleep(self.exporter.ttl_seconds / 2)
+            reclaimed = self.exporter.reclaim()
+            if reclaimed:
+                print(f"Reclaimed {reclaimed} unclaimed shared image buffers")
+
+
+async def serve(socket_path: str):
+    backend = LocalInferenceBackend.build(build_gen_service_config_from_env())
+
+    exporter = None
+    if os.getenv("INFERENCE_SHARED_MEMORY", "1") != "0":
+        exporter = SharedBufferExporter.from_env()
+        MetricsRegistry.register("shared_buffers", exporter.stats)
+
+    server = InferenceServer(backend, socket_path, exporter)
+    MetricsRegistry.register("inference_server", server.stats)
+
+    backend.start()
+    try:
+        await server.serve_forever()
+    finally:
+        await backend.shutdown()
+
+
+def start_inference_server_process() -> subprocess.Popen:
+    """Launch the inference server next to the uvicorn workers.
+
+    A fresh interpreter rather than a fork, so the server never inherits
+    (or initializes) the parent's CUDA state and the workers never import
+    model weights.
+    """
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.services.inference.inference_server"],
+        cwd=Path(__file__).resolve().parents[3],
+    )
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    try:
+        asyncio.run(serve(default_socket_path()))
+    except KeyboardInterrupt:
+        pass
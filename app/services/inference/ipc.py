@@ -0,0 +1,27 @@
+import asyncio
+import os
+import pickle
+import struct
+from typing import Any, Dict
+
+# Length-prefixed pickle frames. Pickle is acceptable only because both ends
+# are processes of this app and the socket is created with mode 0600.
+_HEADER = struct.Struct("!Q")
+
+Message = Dict[str, Any]
+
+
+def default_socket_path() -> str:
+    return os.getenv("INFERENCE_SOCKET_PATH", "/tmp/image-gen-inference.sock")
+
+
+async def write_message(writer: asyncio.StreamWriter, message: Message):
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.write(_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def read_message(reader: asyncio.StreamReader) -> Message:
+    """Read one frame; raises IncompleteReadError when the peer hangs up"""
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return pickle.loads(await reader.readexactly(size))
@@ -0,0 +1,122 @@
+import asyncio
+import io
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+from PIL import Image
+
+
+@dataclass
+class StepProgress:
+    step: int
+    total_steps: int
+    elapsed_ms: float
+    eta_ms: float
+    preview_png: Optional[bytes] = None
+
+
+ProgressListener = Callable[[StepProgress], None]
+
+
+@dataclass
+class ProgressSubscription:
+    """A request's interest in the progress of the batch it runs in"""
+
+    listener: ProgressListener
+    # Emit a latent preview every N steps; None disables previews
+    preview_every: Optional[int] = None
+    # Index of the request's first image in the batch latents
+    latent_index: int = 0
+
+
+def latents_to_preview_png(
+    latents: torch.Tensor, latent_rgb_factors: List[List[float]]
+) -> bytes:
+    """Approximate a (C, H, W) latent as RGB with a linear projection.
+
+    Skips the VAE entirely, so the preview is 1/8 of the output size and
+    costs a single small matmul plus a tiny PNG encode.
+    """
+    factors = torch.tensor(
+        latent_rgb_factors, dtype=latents.dtype, device=latents.device
+    )
+    rgb = torch.einsum("chw,cr->hwr", latents, factors)
+    rgb = ((rgb + 1) / 2).clamp(0, 1).mul(255).to(torch.uint8).cpu().numpy()
+
+    byte_stream = io.BytesIO()
+    Image.fromarray(rgb).save(byte_stream, format="PNG", compress_level=1)
+    return byte_stream.getvalue()
+
+
+class StepProgressReporter:
+    """`callback_on_step_end` hook that fans step progress out to listeners.
+
+    Runs on the inference thread; events are handed to the event loop with
+    `call_soon_threadsafe`. Emission is throttled to one event per
+    `min_interval_ms` (previews and the final step are always emitted) so
+    reporting stays a negligible fraction of step time.
+    """
+
+    def __init__(
+        self,
+        subscriptions: List[ProgressSubscription],
+        total_steps: int,
+        loop: asyncio.AbstractEventLoop,
+        min_interval_ms: float = 200,
+        latent_rgb_factors: Optional[List[List[float]]] = None,
+    ):
+        self.subscriptions = subscriptions
+        self.total_steps = total_steps
+        self.loop = loop
+        self.min_interval_ms = min_interval_ms
+        self.latent_rgb_factors = latent_rgb_factors
+
+        self.events_emitted = 0
+        self.overhead_ms = 0.0
+        self._started_at = time.perf_counter()
+        self._last_emit_ms = float("-inf")
+
+    def __call__(
+        self, pipe: Any, step: int, timestep: Any, callback_kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        hook_start = time.perf_counter()
+
+        done = step + 1
+        elapsed_ms = (hook_start - self._started_at) * 1000
+        is_last = done >= self.total_steps
+        throttled = elapsed_ms - self._last_emit_ms < self.min_interval_ms
+        emitted = False
+
+        for subscription in self.subscriptions:
+            wants_preview = (
+                subscription.preview_every
+                and self.latent_rgb_factors is not None
+                and "latents" in callback_kwargs
+                and done % subscription.preview_every == 0
+            )
+            if throttled and not (wants_preview or is_last):
+                continue
+
+            preview_png = None
+            if wants_preview:
+                latents = callback_kwargs["latents"][subscription.latent_index]
+                preview_png = latents_to_preview_png(latents, self.latent_rgb_factors)
+
+            progress = StepProgress(
+                step=done,
+                total_steps=self.total_steps,
+                elapsed_ms=elapsed_ms,
+                eta_ms=elapsed_ms / done * (self.total_steps - done),
+                preview_png=preview_png,
+            )
+            self.loop.call_soon_threadsafe(subscription.listener, progress)
+            self.events_emitted += 1
+            emitted = True
+
+        if emitted:
+            self._last_emit_ms = elapsed_ms
+
+        self.overhead_ms += (time.perf_counter() - hook_start) * 1000
+        return callback_kwargs
@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import torch
+
+from app.types.enums import ModelType
+
+MB = 1024 * 1024
+
+# (model, prompt, negative prompt, max_sequence_length)
+PromptKey = Tuple[ModelType, str, Optional[str], Optional[int]]
+Embeddings = Dict[str, torch.Tensor]
+
+
+def _size(embeddings: Embeddings) -> int:
+    return sum(t.element_size() * t.nelement() for t in embeddings.values())
+
+
+class PromptEmbeddingCache:
+    """LRU of text encoder outputs, bounded by `max_bytes` of tensor data.
+
+    Entries stay on the device that produced them, so the budget comes out
+    of the same memory as the models; a budget of 0 disables the cache.
+    Embeddings only depend on the prompt and the encoder, so they remain
+    valid when a model is evicted from the pool and loaded again.
+    """
+
+    def __init__(self, max_bytes: int = 256 * MB):
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[PromptKey, Embeddings]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "PromptEmbeddingCache":
+        return cls(max_bytes=int(os.getenv("PROMPT_CACHE_MAX_MB", "256")) * MB)
+
+    def get_or_encode(
+        self, key: PromptKey, encode: Callable[[], Embeddings]
+    ) -> Embeddings:
+        with self._lock:
+            embeddings = self._entries.get(key)
+            if embeddings is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embeddings
+            self.misses += 1
+
+        embeddings = encode()
+        self._put(key, embeddings)
+        return embeddings
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _put(self, key: PromptKey, embeddings: Embeddings):
+        size = _size(embeddings)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _size(previous)
+
+            self._entries[key] = embeddings
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _size(evicted)
+                self.evictions += 1
@@ -0,0 +1,219 @@
+import asyncio
+import dataclasses
+import itertools
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.services.inference.backend import InferenceBackend
+from app.services.inference.batch_scheduler import InferenceResult
+from app.services.inference.executor import InferenceQueueFullError
+from app.services.inference.ipc import (
+    Message,
+    default_socket_path,
+    read_message,
+    write_message,
+)
+from app.services.inference.progress import ProgressListener
+from app.services.inference.shared_buffers import SharedBuffer, import_image
+from app.services.model_pool.prewarm import ReadinessTracker
+from app.types.enums import ModelType
+
+
+class InferenceServerUnavailableError(Exception):
+    """Raised when the shared inference server cannot be reached"""
+
+
+@dataclass
+class _PendingCall:
+    future: asyncio.Future
+    progress_listener: Optional[ProgressListener] = None
+
+
+class RemoteInferenceBackend(InferenceBackend):
+    """Client of the shared inference server (see inference_server.py).
+
+    Keeps one connection per worker and multiplexes concurrent requests over
+    it by id; progress events are delivered to listeners on the event loop,
+    as with the local backend. The connection is (re)opened on demand, so
+    workers may start before the server has finished binding its socket.
+    """
+
+    def __init__(self, socket_path: str, connect_timeout: float = 30):
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._pending: Dict[int, _PendingCall] = {}
+        self._ids = itertools.count()
+
+        self.connects = 0
+        self.requests = 0
+        self.failures = 0
+
+    @classmethod
+    def from_env(cls) -> "RemoteInferenceBackend":
+        return cls(
+            default_socket_path(),
+            connect_timeout=float(os.getenv("INFERENCE_CONNECT_TIMEOUT_S", "30")),
+        )
+
+    async def submit(
+        self,
+        model_type: ModelType,
+        prompt: str,
+        inference_params: Dict[str, Any],
+        num_images: int = 1,
+        seeds: Optional[List[int]] = None,
+        progress_listener: Optional[ProgressListener] = None,
+        preview_every: Optional[int] = None,
+    ) -> InferenceResult:
+        reply = await self._call(
+            {
+                "op": "generate",
+                "model_type": model_type,
+                "prompt": prompt,
+                "inference_params": inference_params,
+                "num_images": num_images,
+                "seeds": seeds,
+                "progress": progress_listener is not None,
+                "preview_every": preview_every,
+            },
+            progress_listener=progress_listener,
+        )
+
+        # Images parked in shared memory by the server are claimed here
+        result = reply["result"]
+        images = [
+            import_image(image) if isinstance(image, SharedBuffer) else image
+            for image in result.images
+        ]
+        return dataclasses.replace(result, images=images)
+
+    async def readiness(self) -> ReadinessTracker:
+        try:
+            # Probes must answer quickly even while the server is down
+            reply = await self._call({"op": "readiness"}, connect_timeout=1)
+        except InferenceServerUnavailableError as e:
+            return ReadinessTracker.unavailable(str(e))
+        return reply["readiness"]
+
+    async def stats(self) -> Dict[str, Any]:
+        # Fetched only when the metrics query asks, not on every reply
+        try:
+            reply = await self._call({"op": "metrics"}, connect_timeout=1)
+            server_metrics = reply["metrics"]
+        except (InferenceServerUnavailableError, RuntimeError) as e:
+            server_metrics = {"error": str(e)}
+
+        return {
+            "socket_path": self.socket_path,
+            "connected": self._is_connected(),
+            "connects": self.connects,
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": len(self._pending),
+            "server": server_metrics,
+        }
+
+    async def shutdown(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+            await asyncio.gather(self._read_task, return_exceptions=True)
+
+    def _is_connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _call(
+        self,
+        message: Message,
+        progress_listener: Optional[ProgressListener] = None,
+        connect_timeout: Optional[float] = None,
+    ) -> Message:
+        await self._connect(connect_timeout or self.connect_timeout)
+
+        request_id = next(self._ids)
+        call = _PendingCall(asyncio.get_running_loop().create_future(), progress_listener)
+        self._pending[request_id] = call
+        self.requests += 1
+
+        try:
+            async with self._write_lock:
+                await write_message(self._writer, {**message, "id": request_id})
+            reply = await call.future
+        except (ConnectionError, InferenceServerUnavailableError) as e:
+            self.failures += 1
+            raise InferenceServerUnavailableError(
+                f"Lost connection to inference server: {e}"
+            ) from e
+        finally:
+            self._pending.pop(request_id, None)
+
+        if reply["type"] == "error":
+            self.failures += 1
+            if reply["overloaded"]:
+                raise InferenceQueueFullError(reply["error"])
+            raise RuntimeError(reply["error"])
+
+        return reply
+
+    async def _connect(self, timeout: float):
+        async with self._connect_lock:
+            if self._is_connected():
+                return
+
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    reader, writer = await asyncio.open_unix_connection(
+                        self.socket_path
+                    )
+                    break
+                except (FileNotFoundError, ConnectionRefusedError) as e:
+                    if time.monotonic() >= deadline:
+                        raise InferenceServerUnavailableError(
+                            f"Inference server not reachable at {self.socket_path}: {e}"
+                        ) from e
+                    await asyncio.sleep(0.2)
+
+            self._reader, self._writer = reader, writer
+            self._read_task = asyncio.create_task(self._read_loop(reader, writer))
+            self.connects += 1
+
+    async def _read_loop(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                message = await read_message(reader)
+                call = self._pending.get(message["id"])
+                if call is None:
+                    continue
+
+                if message["type"] == "progress":
+                    if call.progress_listener is not None:
+                        call.progress_listener(message["progress"])
+                elif not call.future.done():
+                    call.future.set_result(message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            if self._writer is writer:
+                self._reader, self._writer = None, None
+
+            # Requests in flight on this connection will never be answered
+            for call in list(self._pending.values()):
+                if not call.future.done():
+                    call.future.set_exception(
+                        InferenceServerUnavailableError(
+                            "Inference server closed the connection"
+                        )
+                    )
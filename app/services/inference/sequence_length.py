@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from transformers import AutoTokenizer
+
+from app.services.generator_service_config import GeneratorServiceConfig
+from app.services.model_pipeline_registry.pipeline_registry import PipelineRegistry
+from app.types.enums import ModelType
+
+# A tokenizer that failed to load is not retried for this long
+TOKENIZER_RETRY_SECONDS = 60
+
+
+class TokenizerUnavailableError(Exception):
+    """Raised when a pipeline's tokenizer cannot be loaded to pick a bucket"""
+
+
+def pick_bucket(num_tokens: int, buckets: List[int], cap: int) -> int:
+    """Smallest bucket holding `num_tokens`, never above `cap`.
+
+    Prompts longer than every bucket are truncated at `cap` as before.
+    """
+    for bucket in sorted(buckets):
+        if bucket >= cap:
+            break
+        if num_tokens <= bucket:
+            return bucket
+    return cap
+
+
+class SequenceLengthSelector:
+    """Shrinks `max_sequence_length` to fit the prompt for pipelines with
+    `sequence_length_buckets`.
+
+    The configured `max_sequence_length` stays the upper bound. Prompts are
+    tokenized with the pipeline's own tokenizer, loaded on first use without
+    the rest of the model. The bucket only depends on the prompt, so seeded
+    requests stay reproducible, and requests only batch with others of the
+    same bucket. To keep it that way, a request whose prompt cannot be
+    tokenized fails rather than running at another length; a tokenizer that
+    failed to load fails requests for `TOKENIZER_RETRY_SECONDS` before the
+    load is tried again.
+    """
+
+    def __init__(self, config: GeneratorServiceConfig):
+        self.config = config
+
+        self._tokenizers: Dict[ModelType, Any] = {}
+        # model -> (retry at, error)
+        self._load_errors: Dict[ModelType, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+        self.selected: Dict[int, int] = {}
+        self.failures = 0
+
+    async def apply(
+        self, model_type: ModelType, prompt: str, inference_params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Return `inference_params` with the bucket for `prompt` filled in"""
+        buckets = PipelineRegistry.get(model_type).sequence_length_buckets
+        cap = inference_params.get("max_sequence_length")
+        if not buckets or cap is None:
+            return inference_params
+
+        try:
+            num_tokens = await asyncio.to_thread(self._count_tokens, model_type, prompt)
+        except Exception as e:
+            self.failures += 1
+            raise TokenizerUnavailableError(
+                f"Could not tokenize prompt for {model_type.name}: {e}"
+            ) from e
+
+        bucket = pick_bucket(num_tokens, buckets, cap)
+        self.selected[bucket] = self.selected.get(bucket, 0) + 1
+        return {**inference_params, "max_sequence_length": bucket}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "selected": dict(sorted(self.selected.items())),
+            "failures": self.failures,
+        }
+
+    def _count_tokens(self, model_type: ModelType, prompt: str) -> int:
+        # Includes the end-of-sequence token, which also takes a position
+        return len(self._tokenizer(model_type)(prompt).input_ids)
+
+    def _tokenizer(self, model_type: ModelType) -> Any:
+        with self._lock:
+            tokenizer = self._tokenizers.get(model_type)
+            if tokenizer is not None:
+                return tokenizer
+
+            load_error = self._load_errors.get(model_type)
+            if load_error is not None and time.monotonic() < load_error[0]:
+                raise RuntimeError(f"tokenizer failed to load: {load_error[1]}")
+
+            pipeline_config = PipelineRegistry.get(model_type)
+            try:
+                tokenizer = AutoTokenizer.from_pretrained(
+                    model_type.value,
+                    subfolder=pipeline_config.sequence_length_tokenizer,
+                    cache_dir=self.config.cache_dir,
+                    token=self.config.hf_token,
+                )
+            except Exception as e:
+                self._load_errors[model_type] = (
+                    time.monotonic() + TOKENIZER_RETRY_SECONDS,
+                    str(e),
+                )
+                raise
+
+            self._load_errors.pop(model_type, None)
+            self._tokenizers[model_type] = tokenizer
+            return tokenizer
@@ -0,0 +1,181 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# numpy pixel layouts a receiver can rebuild, by number of channels
+_MODES = {1: "L", 3: "RGB", 4: "RGBA"}
+
+
+@dataclass
+class SharedBuffer:
+    """Descriptor of a buffer parked in a shared memory segment.
+
+    Only this small record crosses the process boundary; the receiver maps
+    the segment by name. `shape`/`mode` are set for decoded images
+    and left empty for encoded bytes.
+    """
+
+    name: str
+    size: int
+    shape: Optional[Tuple[int, ...]] = None
+    mode: Optional[str] = None
+
+
+class SharedBufferExporter:
+    """Producer side of the hand-off.
+
+    Each exported buffer gets its own segment. Ownership passes to the
+    receiver, which unlinks the segment once it has read it (see
+    `import_image`/`import_bytes`). Segments the receiver never claimed,
+    e.g. because its connection dropped, are unlinked by `reclaim` after
+    `ttl_seconds` so /dev/shm cannot fill up.
+    """
+
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+
+        self._outstanding: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.exported = 0
+        self.exported_bytes = 0
+        self.reclaimed = 0
+
+    @classmethod
+    def from_env(cls) -> "SharedBufferExporter":
+        return cls(ttl_seconds=float(os.getenv("SHARED_BUFFER_TTL_SECONDS", "60")))
+
+    def export_image(self, image: Any) -> SharedBuffer:
+        """Export a PIL image or numpy pipeline output (HWC, floats in [0, 1]
+        or uint8) as 8-bit pixels.
+
+        Numpy output is written straight into the segment, converting float
+        pixels on the way, with no intermediate PIL image.
+        """
+        if isinstance(image, Image.Image):
+            mode = image.mode
+            array = np.asarray(image)
+            if array.dtype != np.uint8:
+                raise ValueError(f"Cannot share {mode} images")
+        else:
+            array = np.asarray(image)
+            if array.ndim == 3 and array.shape[-1] == 1:
+                array = array[..., 0]
+            channels = 1 if array.ndim == 2 else array.shape[-1]
+            mode = _MODES.get(channels) if array.ndim in (2, 3) else None
+            if mode is None:
+                raise ValueError(f"Cannot share images of shape {array.shape}")
+
+        nbytes = array.size
+        segment = self._create(nbytes)
+        try:
+            _write_pixels(segment.buf, array)
+        finally:
+            segment.close()
+
+        return SharedBuffer(
+            name=segment.name,
+            size=nbytes,
+            shape=array.shape,
+            mode=mode,
+        )
+
+    def export_bytes(self, data: bytes) -> SharedBuffer:
+        segment = self._create(len(data))
+        try:
+            segment.buf[: len(data)] = data
+        finally:
+            segment.close()
+
+        return SharedBuffer(name=segment.name, size=len(data))
+
+    def reclaim(self, older_than: Optional[float] = None) -> int:
+        """Unlink unclaimed segments exported more than `older_than` seconds
+        ago (default: the TTL). Returns how many were still present."""
+        cutoff = time.monotonic() - (
+            self.ttl_seconds if older_than is None else older_than
+        )
+
+        with self._lock:
+            expired = [n for n, t in self._outstanding.items() if t <= cutoff]
+            for name in expired:
+                del self._outstanding[name]
+
+        reclaimed = 0
+        for name in expired:
+            try:
+                segment = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                continue  # Claimed and unlinked by the receiver
+            segment.close()
+            segment.unlink()
+            reclaimed += 1
+
+        self.reclaimed += reclaimed
+        return reclaimed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exported": self.exported,
+            "exported_bytes": self.exported_bytes,
+            # Includes segments already claimed but not yet swept
+            "tracked": len(self._outstanding),
+            "reclaimed": self.reclaimed,
+        }
+
+    def _create(self, size: int) -> shared_memory.SharedMemory:
+        # Zero-sized segments are not allowed
+        segment = shared_memory.SharedMemory(create=True, size=max(1, size))
+        # The receiver unlinks it, so this process' resource tracker must not
+        # also try to at exit (attach + unlink there keeps its tracker even)
+        resource_tracker.unregister(segment._name, "shared_memory")
+
+        with self._lock:
+            self._outstanding[segment.name] = time.monotonic()
+            self.exported += 1
+            self.exported_bytes += size
+
+        return segment
+
+
+def _write_pixels(buffer: memoryview, array: np.ndarray):
+    # A function of its own so no view of the segment outlives the write;
+    # the segment cannot be closed while one exists
+    pixels = np.ndarray(array.shape, dtype=np.uint8, buffer=buffer)
+    if array.dtype == np.uint8:
+        pixels[...] = array
+    else:
+        # Same rounding as to_pil, with a single float temporary
+        scaled = array * 255
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, 0, 255, out=scaled)
+        np.copyto(pixels, scaled, casting="unsafe")
+
+
+def import_image(buffer: SharedBuffer) -> Image.Image:
+    """Materialize an exported image (a single copy) and release its segment"""
+    height, width = buffer.shape[:2]
+    segment = shared_memory.SharedMemory(name=buffer.name)
+    try:
+        with segment.buf[: buffer.size] as view:
+            return Image.frombytes(buffer.mode, (width, height), view)
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def import_bytes(buffer: SharedBuffer) -> bytes:
+    """Copy exported bytes out and release their segment"""
+    segment = shared_memory.SharedMemory(name=buffer.name)
+    try:
+        with segment.buf[: buffer.size] as view:
+            return bytes(view)
+    finally:
+        segment.close()
+        segment.unlink()
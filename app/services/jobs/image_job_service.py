@@ -0,0 +1,83 @@
+import asyncio
+import traceback
+from typing import Any, Dict, Optional
+
+from app.services.delivery import plan_delivery
+from app.services.image_generator import ImageGenerationService
+from app.services.inference.executor import InferenceQueueFullError
+from app.services.jobs.job_store import Job, JobStore
+from app.services.result_builder import build_image_result
+from app.types.image_generation_input import ImageGenerationInput
+
+
+class ImageJobService:
+    """Runs image generation in the background so submitters get a job id
+    back immediately instead of holding the connection open."""
+
+    def __init__(self, image_service: ImageGenerationService, job_store: JobStore):
+        self.image_service = image_service
+        self.job_store = job_store
+        self._tasks: set = set()
+
+    def submit(
+        self,
+        image_gen_input: ImageGenerationInput,
+        api_key: str,
+        preview_every: Optional[int] = None,
+    ) -> Job:
+        job = self.job_store.create(api_key)
+
+        task = asyncio.create_task(
+            self._run(job, image_gen_input, api_key, preview_every)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.job_store.stats(), "running_tasks": len(self._tasks)}
+
+    async def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(
+        self,
+        job: Job,
+        image_gen_input: ImageGenerationInput,
+        api_key: str,
+        preview_every: Optional[int],
+    ):
+        self.job_store.mark_running(job)
+
+        # Results are fetched later, so only the `delivery` input applies
+        delivery = plan_delivery(image_gen_input.delivery)
+
+        try:
+            generated_images = await self.image_service.generate(
+                image_gen_input=image_gen_input,
+                api_key=api_key,
+                progress_listener=lambda progress: self.job_store.update_progress(
+                    job, progress
+                ),
+                preview_every=preview_every,
+                upload=delivery.upload,
+                derivatives=delivery.derivatives,
+            )
+
+            results = [
+                build_image_result(image_gen_input, generated, inline=delivery.inline)
+                for generated in generated_images
+            ]
+            result_bytes = sum(len(result.image_bytes or b"") for result in results)
+
+            self.job_store.complete(job, results, result_bytes)
+        except InferenceQueueFullError as e:
+            self.job_store.fail(job, str(e), code="OVERLOADED")
+        except Exception as e:
+            print(f"Image job {job.id} failed: {e}")
+            traceback.print_exc()
+            self.job_store.fail(job, str(e))
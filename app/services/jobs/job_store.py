@@ -0,0 +1,196 @@
+import asyncio
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.services.inference.progress import StepProgress
+from app.types.enums import JobStatus
+
+MB = 1024 * 1024
+
+
+class JobStoreFullError(Exception):
+    """Raised when the store cannot accept another unfinished job"""
+
+
+@dataclass
+class Job:
+    id: str
+    api_key: str
+    status: JobStatus = JobStatus.QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    results: Optional[List[Any]] = None
+    result_bytes: int = 0
+    error: Optional[str] = None
+    error_code: Optional[str] = None
+    # Latest step progress only; intermediate events are not buffered
+    progress: Optional[StepProgress] = None
+    # Replaced on every update so watchers can await the next change
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobStore:
+    """In-process store of asynchronous image generation jobs.
+
+    Finished jobs are kept for `ttl_seconds` so clients can poll their
+    results. Memory is bounded by `max_jobs` and by `max_result_bytes` of
+    stored results: when either is exceeded the oldest finished jobs are
+    dropped early, and new submissions are refused if only unfinished jobs
+    remain.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        max_jobs: int = 1000,
+        max_result_bytes: int = 512 * MB,
+    ):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_jobs = max_jobs
+        self.max_result_bytes = max_result_bytes
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._result_bytes = 0
+
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "JobStore":
+        return cls(
+            ttl_seconds=float(os.getenv("JOB_RESULT_TTL_SECONDS", "600")),
+            max_jobs=int(os.getenv("JOB_STORE_MAX_JOBS", "1000")),
+            max_result_bytes=int(os.getenv("JOB_STORE_MAX_RESULT_MB", "512")) * MB,
+        )
+
+    def create(self, api_key: str) -> Job:
+        self._purge()
+
+        if len(self._jobs) >= self.max_jobs:
+            self.rejected += 1
+            raise JobStoreFullError("Too many image generation jobs in progress")
+
+        job = Job(id=str(uuid.uuid4()), api_key=api_key)
+        self._jobs[job.id] = job
+        self.created += 1
+        return job
+
+    def get(self, job_id: str, api_key: str) -> Optional[Job]:
+        """Return the job if it exists and belongs to `api_key`"""
+        self._purge()
+
+        job = self._jobs.get(job_id)
+        if job is None or job.api_key != api_key:
+            return None
+        return job
+
+    def mark_running(self, job: Job):
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        self._notify(job)
+
+    def update_progress(self, job: Job, progress: StepProgress):
+        job.progress = progress
+        self._notify(job)
+
+    def complete(self, job: Job, results: List[Any], result_bytes: int):
+        job.status = JobStatus.SUCCEEDED
+        job.finished_at = datetime.utcnow()
+        job.results = results
+        job.result_bytes = result_bytes
+
+        if job.id in self._jobs:
+            self._result_bytes += result_bytes
+
+        self._notify(job)
+        self._purge()
+
+    def fail(self, job: Job, error: str, code: str = "INTERNAL_ERROR"):
+        job.status = JobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+        job.error = error
+        job.error_code = code
+        self._notify(job)
+
+    async def watch(self, job: Job) -> AsyncIterator[Job]:
+        """Yield the job now and after every status change until it finishes"""
+        last_status = None
+        while True:
+            changed = job.changed
+            if job.status != last_status:
+                last_status = job.status
+                yield job
+            if job.is_finished:
+                return
+            await changed.wait()
+
+    async def watch_progress(self, job: Job) -> AsyncIterator[StepProgress]:
+        """Yield the latest step progress as it changes until the job finishes.
+
+        Slow consumers skip intermediate steps rather than queueing them.
+        """
+        last_progress = None
+        while True:
+            changed = job.changed
+            if job.progress is not None and job.progress is not last_progress:
+                last_progress = job.progress
+                yield job.progress
+            if job.is_finished:
+                return
+            await changed.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status.name] = by_status.get(job.status.name, 0) + 1
+
+        return {
+            "jobs": len(self._jobs),
+            "by_status": by_status,
+            "result_bytes": self._result_bytes,
+            "max_jobs": self.max_jobs,
+            "max_result_bytes": self.max_result_bytes,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+        }
+
+    def _notify(self, job: Job):
+        changed = job.changed
+        job.changed = asyncio.Event()
+        changed.set()
+
+    def _remove(self, job: Job):
+        del self._jobs[job.id]
+        self._result_bytes -= job.result_bytes
+
+    def _purge(self):
+        now = datetime.utcnow()
+
+        for job in list(self._jobs.values()):
+            if job.is_finished and now - job.finished_at > self.ttl:
+                self._remove(job)
+                self.expired += 1
+
+        # Oldest finished jobs go first when over the count or bytes bound
+        for job in list(self._jobs.values()):
+            if (
+                len(self._jobs) < self.max_jobs
+                and self._result_bytes <= self.max_result_bytes
+            ):
+                break
+            if job.is_finished:
+                self._remove(job)
+                self.evicted += 1
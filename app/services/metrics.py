@@ -0,0 +1,37 @@
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Union
+
+
+StatsResult = Union[Dict[str, Any], Awaitable[Dict[str, Any]]]
+
+
+class MetricsRegistry:
+    """Process-wide registry of named stats providers.
+
+    Services register a callable returning a JSON-serialisable dict and the
+    `metrics` query snapshots all of them on demand. A provider may be a
+    coroutine function when its stats live in another process.
+    """
+
+    _providers: Dict[str, Callable[[], StatsResult]] = {}
+
+    @classmethod
+    def register(cls, name: str, provider: Callable[[], StatsResult]):
+        cls._providers[name] = provider
+
+    @classmethod
+    def unregister(cls, name: str):
+        cls._providers.pop(name, None)
+
+    @classmethod
+    async def snapshot(cls) -> Dict[str, Any]:
+        snapshot = {}
+        for name, provider in list(cls._providers.items()):
+            try:
+                stats = provider()
+                if inspect.isawaitable(stats):
+                    stats = await stats
+                snapshot[name] = stats
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+        return snapshot
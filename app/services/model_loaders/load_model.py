@@ -27,6 +27,13 @@ def display_pipeline_info(
     console.print(table)
 
 
+def resolve_torch_dtype(device: str) -> torch.dtype:
+    """The dtype `load_model` requests for weights on the given device"""
+    if device in ("cuda", "mps"):
+        return torch.float16
+    return torch.float32
+
+
 def load_model(model_type: ModelType, config: GeneratorServiceConfig) -> Any:
     display_pipeline_info(model_type, config)
 
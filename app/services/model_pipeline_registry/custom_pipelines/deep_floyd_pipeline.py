@@ -62,11 +62,30 @@ class DeepFloydCombinedPipeline:
        for stage in [self.stage_1, self.stage_2, self.stage_3]:
            stage.enable_model_cpu_offload()
 
-   def __call__(self, prompt, **inference_params):
+   def __call__(
+        self,
+        prompt,
+        num_images_per_prompt=1,
+        prompt_embeds=None,
+        negative_prompt_embeds=None,
+        **inference_params
+   ):
         # Extract generator if it exists in inf params
         generator = inference_params.pop('generator', None)
 
-        prompt_embeds, negative_embeds = self.stage_1.encode_prompt(prompt)
+        prompts = prompt if isinstance(prompt, list) else [prompt]
+
+        if prompt_embeds is None:
+            # Embeddings come back already repeated num_images_per_prompt times
+            prompt_embeds, negative_embeds = self.stage_1.encode_prompt(
+                prompts, num_images_per_prompt=num_images_per_prompt
+            )
+        else:
+            # Precomputed embeddings hold one row per prompt
+            prompt_embeds = prompt_embeds.repeat_interleave(num_images_per_prompt, dim=0)
+            negative_embeds = negative_prompt_embeds.repeat_interleave(
+                num_images_per_prompt, dim=0
+            )
 
         image = self.stage_1(
             prompt_embeds=prompt_embeds,
@@ -83,10 +102,13 @@ class DeepFloydCombinedPipeline:
             output_type="pt"
         ).images
 
+        # The upscaler takes one prompt per image in the batch
+        upscale_prompts = [p for p in prompts for _ in range(num_images_per_prompt)]
+
         # Pass remaining inference_params to stage 3
         return self.stage_3(
-            prompt=prompt,
+            prompt=upscale_prompts,
             image=image,
             generator=generator,
             **inference_params
-        ).images[0]
\ No newline at end of file
+        )
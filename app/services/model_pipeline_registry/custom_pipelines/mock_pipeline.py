@@ -26,8 +26,12 @@ class MockPipeline:
       enable_model_cpu_offload(self):
         Simulates enabling model CPU offload by printing a message.
 
-      __call__(self, prompt, **inference_params):
-        Simulates processing a prompt with a processing time of 10 seconds and returns a mock generated image.
+      encode_prompt(self, prompt):
+        Simulates the text encoder, returning a dummy embedding for one prompt.
+
+      __call__(self, prompt=None, num_images_per_prompt=1, prompt_embeds=None, **inference_params):
+        Simulates processing a prompt (or list of prompts, or precomputed embeddings) with a processing
+        time of 10 seconds and returns num_images_per_prompt mock generated images per prompt.
     """
 
     @classmethod
@@ -52,14 +56,44 @@ class MockPipeline:
     def enable_model_cpu_offload(self):
         print("Model CPU offload enabled")
 
-    def __call__(self, prompt, **inference_params):
+    def encode_prompt(self, prompt):
+        time.sleep(0.05)  # Simulate the text encoder
+        return {"prompt_embeds": torch.zeros((1, 8), dtype=self.dtype)}
+
+    def __call__(
+        self,
+        prompt=None,
+        num_images_per_prompt=1,
+        prompt_embeds=None,
+        callback_on_step_end=None,
+        output_type="pil",
+        **inference_params,
+    ):
         print(f"Processing prompt: {prompt}")
-        time.sleep(1)  # Simulate processing time
-
-        # Create a small mock PIL image (10x10 black square)
-        mock_image = Image.fromarray(np.zeros((10, 10, 3), dtype=np.uint8))
 
-        return Response(images=[mock_image])
+        # Simulate processing time, reporting each step like diffusers does
+        steps = inference_params.get("num_inference_steps") or 50
+        for step in range(steps):
+            time.sleep(1 / steps)
+            if callback_on_step_end is not None:
+                callback_on_step_end(self, step, None, {})
+
+        if prompt_embeds is not None:
+            num_prompts = prompt_embeds.shape[0]
+        else:
+            num_prompts = len(prompt) if isinstance(prompt, list) else 1
+
+        # Create a small mock image (10x10 black square) per output image
+        num_images = num_prompts * num_images_per_prompt
+        if output_type == "np":
+            return Response(images=np.zeros((num_images, 10, 10, 3), dtype=np.float32))
+
+        mock_images = [
+            Image.fromarray(np.zeros((10, 10, 3), dtype=np.uint8))
+            for _ in range(num_images)
+        ]
+
+        return Response(images=mock_images)
 
     def to(self, _):
         return self
@@ -2,6 +2,12 @@ from typing import Dict
 from app.services.model_pipeline_registry.custom_pipelines.mock_pipeline import (
     MockPipeline,
 )
+from app.services.model_pipeline_registry.prompt_encoders import (
+    DeepFloydPromptEncoder,
+    FluxPromptEncoder,
+    MockPromptEncoder,
+    StableDiffusionPromptEncoder,
+)
 from app.services.model_pipeline_registry.types import PipelineConfig
 from app.types.enums import ModelType
 from diffusers import StableDiffusionPipeline, FluxPipeline
@@ -11,6 +17,19 @@ from app.services.model_pipeline_registry.custom_pipelines.deep_floyd_pipeline i
 )
 
 
+# Approximate RGB contribution of each of the 4 SD VAE latent channels
+SD_LATENT_RGB_FACTORS = [
+    [0.3512, 0.2297, 0.3227],
+    [0.3250, 0.4974, 0.2350],
+    [-0.2829, 0.1762, 0.2721],
+    [-0.2120, -0.2616, -0.7177],
+]
+
+# T5 token counts FLUX prompts are padded to; joint attention in every
+# transformer block scales with this length
+FLUX_SEQUENCE_LENGTH_BUCKETS = [128, 256, 512]
+
+
 class PipelineRegistry:
     _registry: Dict[ModelType, PipelineConfig] = {}
 
@@ -33,6 +52,8 @@ class PipelineRegistry:
                 pipeline_class=StableDiffusionPipeline,
                 default_params={"safety_checker": None},
                 inference_params={"num_inference_steps": 50},
+                latent_rgb_factors=SD_LATENT_RGB_FACTORS,
+                prompt_encoder=StableDiffusionPromptEncoder(),
             ),
         )
 
@@ -48,6 +69,8 @@ class PipelineRegistry:
                     "num_inference_steps": 50,
                     "max_sequence_length": 512,
                 },
+                prompt_encoder=FluxPromptEncoder(),
+                sequence_length_buckets=FLUX_SEQUENCE_LENGTH_BUCKETS,
             ),
         )
 
@@ -67,6 +90,8 @@ class PipelineRegistry:
                     "num_inference_steps": 50,
                     "max_sequence_length": 512,
                 },
+                prompt_encoder=FluxPromptEncoder(),
+                sequence_length_buckets=FLUX_SEQUENCE_LENGTH_BUCKETS,
             ),
         )
 
@@ -77,6 +102,8 @@ class PipelineRegistry:
                 pipeline_class=StableDiffusionPipeline,
                 default_params={"safety_checker": None},
                 inference_params={"num_inference_steps": 50},
+                latent_rgb_factors=SD_LATENT_RGB_FACTORS,
+                prompt_encoder=StableDiffusionPromptEncoder(),
             ),
         )
 
@@ -86,6 +113,8 @@ class PipelineRegistry:
                 pipeline_class=StableDiffusionPipeline,
                 default_params={"safety_checker": None},
                 inference_params={"num_inference_steps": 50},
+                latent_rgb_factors=SD_LATENT_RGB_FACTORS,
+                prompt_encoder=StableDiffusionPromptEncoder(),
             ),
         )
 
@@ -114,6 +143,10 @@ class PipelineRegistry:
                 pipeline_class=DeepFloydCombinedPipeline,
                 default_params=df_default_params,
                 inference_params=df_inference_params,
+                # IF stages only expose the legacy `callback` hook
+                supports_step_callback=False,
+                supports_numpy_output=False,
+                prompt_encoder=DeepFloydPromptEncoder(),
             ),
         )
 
@@ -123,6 +156,7 @@ class PipelineRegistry:
                 pipeline_class=MockPipeline,
                 default_params={"device": "mps"},
                 inference_params={},
+                prompt_encoder=MockPromptEncoder(),
             ),
         )
 
@@ -0,0 +1,83 @@
+from typing import Any, Dict, Optional
+
+import torch
+
+
+class PromptEncoder:
+    """Runs a pipeline's text encoders for a single prompt.
+
+    `encode` returns the keyword arguments the pipeline accepts instead of a
+    prompt, each tensor with a batch dimension of 1, so that results can be
+    cached per prompt and concatenated into a batch.
+    """
+
+    # Whether the pipeline still needs the prompt text next to the embeddings
+    needs_prompt_text = False
+
+    def encode(
+        self,
+        pipeline: Any,
+        prompt: str,
+        negative_prompt: Optional[str] = None,
+        max_sequence_length: Optional[int] = None,
+    ) -> Dict[str, torch.Tensor]:
+        raise NotImplementedError
+
+
+class StableDiffusionPromptEncoder(PromptEncoder):
+    """CLIP embeddings for the prompt and the classifier-free guidance
+    negative, which the pipeline would otherwise re-encode on every call"""
+
+    def encode(self, pipeline, prompt, negative_prompt=None, max_sequence_length=None):
+        prompt_embeds, negative_prompt_embeds = pipeline.encode_prompt(
+            prompt,
+            device=pipeline._execution_device,
+            num_images_per_prompt=1,
+            do_classifier_free_guidance=True,
+            negative_prompt=negative_prompt,
+        )
+        return {
+            "prompt_embeds": prompt_embeds,
+            "negative_prompt_embeds": negative_prompt_embeds,
+        }
+
+
+class FluxPromptEncoder(PromptEncoder):
+    """T5 sequence embeddings and the pooled CLIP embedding"""
+
+    def encode(self, pipeline, prompt, negative_prompt=None, max_sequence_length=None):
+        prompt_embeds, pooled_prompt_embeds, _ = pipeline.encode_prompt(
+            prompt=prompt,
+            prompt_2=None,
+            device=pipeline._execution_device,
+            num_images_per_prompt=1,
+            max_sequence_length=max_sequence_length or 512,
+        )
+        return {
+            "prompt_embeds": prompt_embeds,
+            "pooled_prompt_embeds": pooled_prompt_embeds,
+        }
+
+
+class DeepFloydPromptEncoder(PromptEncoder):
+    """T5 embeddings from stage 1, shared by stages 1 and 2"""
+
+    # The x4 upscaler of stage 3 encodes the prompt text itself
+    needs_prompt_text = True
+
+    def encode(self, pipeline, prompt, negative_prompt=None, max_sequence_length=None):
+        prompt_embeds, negative_prompt_embeds = pipeline.stage_1.encode_prompt(
+            prompt,
+            do_classifier_free_guidance=True,
+            num_images_per_prompt=1,
+            negative_prompt=negative_prompt,
+        )
+        return {
+            "prompt_embeds": prompt_embeds,
+            "negative_prompt_embeds": negative_prompt_embeds,
+        }
+
+
+class MockPromptEncoder(PromptEncoder):
+    def encode(self, pipeline, prompt, negative_prompt=None, max_sequence_length=None):
+        return pipeline.encode_prompt(prompt)
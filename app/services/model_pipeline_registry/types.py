@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-from typing import Any, Dict, Type
+from typing import Any, Dict, List, Optional, Type
+
+from app.services.model_pipeline_registry.prompt_encoders import PromptEncoder
 
 
 @dataclass
@@ -8,3 +10,20 @@ class PipelineConfig:
     default_params: Dict[str, Any]
     inference_params: Dict[str, Any]
     use_cpu_offload: bool = False
+    # Upper bound on prompts coalesced into one call; None uses the scheduler's
+    max_batch_size: Optional[int] = None
+    # Whether the pipeline accepts diffusers' `callback_on_step_end`
+    supports_step_callback: bool = True
+    # Linear latent -> RGB projection used for cheap progress previews
+    latent_rgb_factors: Optional[List[List[float]]] = None
+    # Whether the pipeline accepts `output_type="np"`; numpy output is turned
+    # into pixels by the ImageEncoder instead of on the inference thread
+    supports_numpy_output: bool = True
+    # Runs the text encoders on their own so prompt embeddings can be cached
+    # and passed in; None always hands the pipeline the prompt text
+    prompt_encoder: Optional[PromptEncoder] = None
+    # Candidate `max_sequence_length` values; the smallest one that fits the
+    # tokenized prompt is used, up to the configured max_sequence_length
+    sequence_length_buckets: Optional[List[int]] = None
+    # Subfolder of the tokenizer that counts prompt tokens for the buckets
+    sequence_length_tokenizer: str = "tokenizer_2"
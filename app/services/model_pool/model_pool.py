@@ -0,0 +1,338 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import torch
+from rich.console import Console
+from rich.table import Table
+
+from app.services.generator_service_config import GeneratorServiceConfig
+from app.services.metrics import MetricsRegistry
+from app.services.model_loaders.load_model import load_model, resolve_torch_dtype
+from app.types.enums import ModelType
+
+MB = 1024 * 1024
+
+
+class ModelKey(NamedTuple):
+    model_type: ModelType
+    device: str
+    dtype: str
+
+
+@dataclass
+class ModelFootprint:
+    host_bytes: int = 0
+    device_bytes: int = 0
+
+
+@dataclass
+class PooledModel:
+    key: ModelKey
+    pipeline: Any
+    footprint: ModelFootprint
+    load_ms: float
+    hits: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def _iter_modules(pipeline: Any) -> Iterable[torch.nn.Module]:
+    """Yield every torch module held by a pipeline.
+
+    Handles diffusers pipelines (via `components`) as well as composite
+    pipelines such as DeepFloydCombinedPipeline that hold sub-pipelines as
+    plain attributes.
+    """
+    seen = set()
+    stack = [pipeline]
+
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, torch.nn.Module):
+            yield obj
+            continue
+
+        components = getattr(obj, "components", None)
+        if isinstance(components, dict):
+            stack.extend(v for v in components.values() if v is not None)
+        elif hasattr(obj, "__dict__"):
+            # Composite pipelines keep their stages as plain attributes
+            stack.extend(
+                v for v in vars(obj).values() if hasattr(v, "components")
+            )
+
+
+def measure_footprint(pipeline: Any) -> ModelFootprint:
+    """Sum parameter and buffer bytes of a pipeline, split by host/device"""
+    footprint = ModelFootprint()
+    seen_storage = set()
+
+    for module in _iter_modules(pipeline):
+        tensors = list(module.parameters()) + list(module.buffers())
+        for tensor in tensors:
+            if tensor.device.type == "meta":
+                continue
+
+            storage_key = (tensor.device, tensor.data_ptr())
+            if storage_key in seen_storage:
+                continue
+            seen_storage.add(storage_key)
+
+            size = tensor.numel() * tensor.element_size()
+            if tensor.device.type == "cpu":
+                footprint.host_bytes += size
+            else:
+                footprint.device_bytes += size
+
+    return footprint
+
+
+class ModelPool:
+    """Keeps loaded pipelines resident across requests.
+
+    Models are keyed by (ModelType, device, dtype). When the summed footprint
+    of resident models exceeds the host or device budget, least recently used
+    models are evicted until it fits again. A budget of 0 means unlimited.
+    """
+
+    def __init__(self, host_budget_bytes: int = 0, device_budget_bytes: int = 0):
+        self.host_budget_bytes = host_budget_bytes
+        self.device_budget_bytes = device_budget_bytes
+
+        self._models: "OrderedDict[ModelKey, PooledModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_durations_ms: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def key_for(model_type: ModelType, config: GeneratorServiceConfig) -> ModelKey:
+        dtype = str(resolve_torch_dtype(config.device)).replace("torch.", "")
+        return ModelKey(model_type, config.device, dtype)
+
+    def get(self, model_type: ModelType, config: GeneratorServiceConfig) -> Any:
+        """Return a resident pipeline, loading (and possibly evicting) on a miss"""
+        key = self.key_for(model_type, config)
+
+        pooled = self._touch(key)
+        if pooled is not None:
+            return pooled.pipeline
+
+        with self._load_lock(key):
+            # Another caller may have loaded the model while we waited
+            pooled = self._touch(key)
+            if pooled is not None:
+                return pooled.pipeline
+
+            with self._lock:
+                self.misses += 1
+
+            start = time.perf_counter()
+            pipeline = load_model(model_type, config)
+            load_ms = (time.perf_counter() - start) * 1000
+
+            if pipeline is None:
+                raise ValueError(f"Model {model_type} could not be loaded")
+
+            pooled = PooledModel(
+                key=key,
+                pipeline=pipeline,
+                footprint=measure_footprint(pipeline),
+                load_ms=load_ms,
+            )
+
+            with self._lock:
+                self._models[key] = pooled
+                self.load_durations_ms.setdefault(model_type.name, []).append(
+                    load_ms
+                )
+                evicted = self._evict_over_budget(keep=key)
+
+            if evicted:
+                self._release(evicted)
+
+            print(
+                f"Model {model_type.name} loaded into pool in {load_ms:.0f}ms "
+                f"(host={pooled.footprint.host_bytes / MB:.0f}MB, "
+                f"device={pooled.footprint.device_bytes / MB:.0f}MB)"
+            )
+
+            return pipeline
+
+    def is_resident(self, model_type: ModelType, config: GeneratorServiceConfig) -> bool:
+        with self._lock:
+            return self.key_for(model_type, config) in self._models
+
+    def evict(self, model_type: ModelType, config: GeneratorServiceConfig) -> bool:
+        key = self.key_for(model_type, config)
+        with self._lock:
+            pooled = self._models.pop(key, None)
+            if pooled is not None:
+                self.evictions += 1
+
+        if pooled is None:
+            return False
+
+        self._release([pooled])
+        return True
+
+    def clear(self):
+        with self._lock:
+            models = list(self._models.values())
+            self._models.clear()
+
+        self._release(models)
+
+    def usage(self) -> ModelFootprint:
+        with self._lock:
+            return self._usage()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            usage = self._usage()
+            lookups = self.hits + self.misses
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "host_bytes": usage.host_bytes,
+                "device_bytes": usage.device_bytes,
+                "host_budget_bytes": self.host_budget_bytes,
+                "device_budget_bytes": self.device_budget_bytes,
+                "resident": [
+                    {
+                        "model_type": pooled.key.model_type.name,
+                        "device": pooled.key.device,
+                        "dtype": pooled.key.dtype,
+                        "host_bytes": pooled.footprint.host_bytes,
+                        "device_bytes": pooled.footprint.device_bytes,
+                        "load_ms": round(pooled.load_ms, 2),
+                        "hits": pooled.hits,
+                    }
+                    for pooled in self._models.values()
+                ],
+                "load_durations_ms": {
+                    name: [round(d, 2) for d in durations]
+                    for name, durations in self.load_durations_ms.items()
+                },
+            }
+
+    def print_summary(self):
+        stats = self.stats()
+
+        table = Table(title="Model Pool")
+        table.add_column("Model", style="cyan")
+        table.add_column("Device", style="green")
+        table.add_column("Host MB", justify="right", style="magenta")
+        table.add_column("Device MB", justify="right", style="magenta")
+        table.add_column("Load ms", justify="right")
+        table.add_column("Hits", justify="right")
+
+        for model in stats["resident"]:
+            table.add_row(
+                model["model_type"],
+                f"{model['device']}/{model['dtype']}",
+                f"{model['host_bytes'] / MB:.0f}",
+                f"{model['device_bytes'] / MB:.0f}",
+                f"{model['load_ms']:.0f}",
+                str(model["hits"]),
+            )
+
+        table.caption = (
+            f"hits={stats['hits']} misses={stats['misses']} "
+            f"evictions={stats['evictions']}"
+        )
+        Console().print(table)
+
+    def _touch(self, key: ModelKey) -> Optional[PooledModel]:
+        with self._lock:
+            pooled = self._models.get(key)
+            if pooled is None:
+                return None
+
+            self._models.move_to_end(key)
+            pooled.hits += 1
+            pooled.last_used = time.monotonic()
+            self.hits += 1
+            return pooled
+
+    def _load_lock(self, key: ModelKey) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _usage(self) -> ModelFootprint:
+        usage = ModelFootprint()
+        for pooled in self._models.values():
+            usage.host_bytes += pooled.footprint.host_bytes
+            usage.device_bytes += pooled.footprint.device_bytes
+        return usage
+
+    def _over_budget(self) -> bool:
+        usage = self._usage()
+        if self.host_budget_bytes and usage.host_bytes > self.host_budget_bytes:
+            return True
+        if self.device_budget_bytes and usage.device_bytes > self.device_budget_bytes:
+            return True
+        return False
+
+    def _evict_over_budget(self, keep: ModelKey) -> List[PooledModel]:
+        """Pop LRU models until within budget. Caller must hold `_lock`."""
+        evicted = []
+
+        while self._over_budget():
+            victim_key = next((k for k in self._models if k != keep), None)
+            if victim_key is None:
+                print(
+                    f"Warning: {keep.model_type.name} alone exceeds the model pool budget"
+                )
+                break
+
+            evicted.append(self._models.pop(victim_key))
+            self.evictions += 1
+
+        return evicted
+
+    def _release(self, models: List[PooledModel]):
+        for pooled in models:
+            print(f"Evicting {pooled.key.model_type.name} from model pool")
+            pooled.pipeline = None
+
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+_model_pool: Optional[ModelPool] = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    """Return the process-wide model pool, creating it on first use"""
+    global _model_pool
+
+    with _model_pool_lock:
+        if _model_pool is None:
+            _model_pool = ModelPool(
+                host_budget_bytes=int(os.getenv("MODEL_POOL_HOST_BUDGET_MB", "0"))
+                * MB,
+                device_budget_bytes=int(
+                    os.getenv("MODEL_POOL_DEVICE_BUDGET_MB", "0")
+                )
+                * MB,
+            )
+            MetricsRegistry.register("model_pool", _model_pool.stats)
+
+        return _model_pool
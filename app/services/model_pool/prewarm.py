@@ -0,0 +1,135 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.services.generator_service_config import GeneratorServiceConfig
+from app.services.model_pipeline_registry.pipeline_registry import PipelineRegistry
+from app.services.model_pool.model_pool import ModelPool
+from app.types.enums import ModelReadinessState, ModelType
+
+
+@dataclass
+class PrewarmSettings:
+    model_types: List[ModelType]
+    resolutions: List[Tuple[int, int]]
+    warmup_steps: int = 2
+
+    @classmethod
+    def from_env(cls) -> "PrewarmSettings":
+        """
+        PREWARM_MODELS=STABLE_V2_1,FLUX_1_SCHNELL
+        PREWARM_RESOLUTIONS=512x512,1024x1024
+        PREWARM_STEPS=2
+        """
+        model_types = []
+        for name in os.getenv("PREWARM_MODELS", "").split(","):
+            name = name.strip()
+            if not name:
+                continue
+            try:
+                model_types.append(ModelType[name])
+            except KeyError:
+                print(f"Warning: unknown model in PREWARM_MODELS: {name}")
+
+        resolutions = []
+        for size in os.getenv("PREWARM_RESOLUTIONS", "512x512").split(","):
+            size = size.strip().lower()
+            if not size:
+                continue
+            width, _, height = size.partition("x")
+            resolutions.append((int(width), int(height)))
+
+        return cls(
+            model_types=model_types,
+            resolutions=resolutions,
+            warmup_steps=int(os.getenv("PREWARM_STEPS", "2")),
+        )
+
+
+@dataclass
+class ModelReadiness:
+    model_type: ModelType
+    state: ModelReadinessState
+    error: Optional[str] = None
+    warmup_ms: Optional[float] = None
+
+
+class ReadinessTracker:
+    """Per-model prewarm state. The worker is ready once every model is READY."""
+
+    def __init__(self, model_types: List[ModelType]):
+        self._models: Dict[ModelType, ModelReadiness] = {
+            model_type: ModelReadiness(model_type, ModelReadinessState.LOADING)
+            for model_type in model_types
+        }
+        # Set when readiness could not be determined at all
+        self.error: Optional[str] = None
+
+    @classmethod
+    def unavailable(cls, error: str) -> "ReadinessTracker":
+        """Readiness of an inference backend that could not be reached"""
+        tracker = cls([])
+        tracker.error = error
+        return tracker
+
+    @property
+    def is_ready(self) -> bool:
+        return self.error is None and all(
+            m.state == ModelReadinessState.READY for m in self._models.values()
+        )
+
+    @property
+    def has_failures(self) -> bool:
+        return self.error is not None or any(
+            m.state == ModelReadinessState.FAILED for m in self._models.values()
+        )
+
+    def models(self) -> List[ModelReadiness]:
+        return list(self._models.values())
+
+    def mark_ready(self, model_type: ModelType, warmup_ms: float):
+        self._models[model_type] = ModelReadiness(
+            model_type, ModelReadinessState.READY, warmup_ms=warmup_ms
+        )
+
+    def mark_failed(self, model_type: ModelType, error: str):
+        self._models[model_type] = ModelReadiness(
+            model_type, ModelReadinessState.FAILED, error=error
+        )
+
+
+def prewarm_models(
+    settings: PrewarmSettings,
+    model_pool: ModelPool,
+    config: GeneratorServiceConfig,
+    readiness: ReadinessTracker,
+):
+    """Load each configured model into the pool and run a short warmup
+    inference per resolution so CUDA kernels and allocator pools are primed.
+
+    Blocking; run it off the event loop.
+    """
+    for model_type in settings.model_types:
+        print(f"Prewarming {model_type.name}...")
+        start = time.perf_counter()
+
+        try:
+            model = model_pool.get(model_type, config)
+            pipeline_config = PipelineRegistry.get(model_type)
+
+            for width, height in settings.resolutions:
+                inference_params = {
+                    **pipeline_config.inference_params,
+                    "width": width,
+                    "height": height,
+                    "num_inference_steps": settings.warmup_steps,
+                }
+                model("warmup", **inference_params)
+
+            warmup_ms = (time.perf_counter() - start) * 1000
+            readiness.mark_ready(model_type, warmup_ms)
+            print(f"{model_type.name} ready after {warmup_ms:.0f}ms")
+        except Exception as e:
+            print(f"Prewarming {model_type.name} failed: {e}")
+            readiness.mark_failed(model_type, str(e))
@@ -0,0 +1,81 @@
+import base64
+import uuid
+from datetime import datetime
+
+from app.services.image_generator import GeneratedImage
+from app.services.inference.progress import StepProgress
+from app.services.jobs.job_store import Job
+from app.types.image_generation_input import ImageGenerationInput
+from app.types.responses import (
+    ImageDerivative,
+    ImageGenerationError,
+    ImageGenerationResult,
+    ImageJob,
+    ImageJobProgress,
+)
+
+
+def build_image_result(
+    image_gen_input: ImageGenerationInput, generated: GeneratedImage, inline: bool
+) -> ImageGenerationResult:
+    """Convert a generated image into its GraphQL result; base64 encoding is
+    left to the `imageBase64` resolver and only possible when `inline`."""
+    return ImageGenerationResult(
+        id=str(uuid.uuid4()),
+        created_at=datetime.utcnow().isoformat(),
+        prompt=image_gen_input.prompt,
+        image_format=image_gen_input.image_format,
+        width=image_gen_input.width,
+        height=image_gen_input.height,
+        style=image_gen_input.style,
+        url=generated.url,
+        encode_ms=round(generated.encode_ms, 2),
+        size_bytes=len(generated.image_bytes),
+        seed=generated.seed,
+        derivatives=(
+            [
+                ImageDerivative(
+                    image_format=derivative.image_format,
+                    width=derivative.width,
+                    height=derivative.height,
+                    size_bytes=derivative.size_bytes,
+                    url=derivative.url,
+                )
+                for derivative in generated.derivatives
+            ]
+            if generated.derivatives
+            else None
+        ),
+        image_bytes=generated.image_bytes if inline else None,
+    )
+
+
+def build_image_job(job: Job) -> ImageJob:
+    """Snapshot a stored job as its GraphQL type"""
+    return ImageJob(
+        id=job.id,
+        status=job.status,
+        created_at=job.created_at.isoformat(),
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        finished_at=job.finished_at.isoformat() if job.finished_at else None,
+        results=list(job.results) if job.results is not None else None,
+        error=(
+            ImageGenerationError(message=job.error, code=job.error_code)
+            if job.error
+            else None
+        ),
+    )
+
+
+def build_image_job_progress(progress: StepProgress) -> ImageJobProgress:
+    return ImageJobProgress(
+        step=progress.step,
+        total_steps=progress.total_steps,
+        elapsed_ms=round(progress.elapsed_ms, 2),
+        eta_ms=round(progress.eta_ms, 2),
+        preview_base64=(
+            base64.b64encode(progress.preview_png).decode("utf-8")
+            if progress.preview_png
+            else None
+        ),
+    )
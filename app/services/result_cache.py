@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.types.enums import ImageFormat, ModelType
+from app.types.image_generation_input import DerivativeSpec, EncodingOptions
+
+MB = 1024 * 1024
+
+# Bump when a change would make old cache entries produce different output
+CACHE_VERSION = 3
+
+_COUNT = struct.Struct("!I")
+_INFERENCE_MS = struct.Struct("!d")
+_LENGTH = struct.Struct("!Q")
+
+
+def result_cache_key(
+    model_type: ModelType,
+    prompt: str,
+    inference_params: Dict[str, Any],
+    seeds: List[int],
+    image_format: ImageFormat,
+    encoding: Optional[EncodingOptions] = None,
+    derivatives: Optional[List[DerivativeSpec]] = None,
+) -> str:
+    """Canonical hash of everything that determines a seeded result.
+
+    The merged inference params already carry size and step count.
+    """
+    fields = {
+        "version": CACHE_VERSION,
+        "model_type": model_type.name,
+        "prompt": prompt,
+        "inference_params": inference_params,
+        "seeds": seeds,
+        "image_format": image_format.name,
+        "encoding": vars(encoding) if encoding is not None else None,
+    }
+    # Only present when requested, so existing entries keep their keys
+    if derivatives:
+        fields["derivatives"] = [vars(spec) for spec in derivatives]
+
+    canonical = json.dumps(fields, sort_keys=True, default=repr)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    # Each encoded image followed by its derivatives
+    blobs: List[bytes]
+    # Measured when the result was generated; cache hits are billed for it
+    inference_ms: float
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(b) for b in self.blobs)
+
+
+def _pack(entry: CachedResult) -> bytes:
+    blobs = entry.blobs
+    header = (
+        _INFERENCE_MS.pack(entry.inference_ms)
+        + _COUNT.pack(len(blobs))
+        + b"".join(_LENGTH.pack(len(b)) for b in blobs)
+    )
+    return header + b"".join(blobs)
+
+
+def _unpack(data: bytes) -> CachedResult:
+    (inference_ms,) = _INFERENCE_MS.unpack_from(data, 0)
+    (count,) = _COUNT.unpack_from(data, _INFERENCE_MS.size)
+    offset = _INFERENCE_MS.size + _COUNT.size
+    lengths = []
+    for _ in range(count):
+        lengths.append(_LENGTH.unpack_from(data, offset)[0])
+        offset += _LENGTH.size
+
+    blobs = []
+    for length in lengths:
+        blobs.append(data[offset : offset + length])
+        offset += length
+    return CachedResult(blobs=blobs, inference_ms=inference_ms)
+
+
+class ResultCache:
+    """Two-tier cache of encoded results for seeded requests.
+
+    Entries are the encoded images of one request, each followed by its
+    derivatives, and the inference time they took. The memory tier is an
+    LRU bounded by `memory_max_bytes`; the optional disk tier under
+    `disk_dir` is bounded by `disk_max_bytes`, least recently used files
+    going first, and survives restarts. Disk hits are promoted to memory. A
+    budget of 0 disables a tier.
+
+    Workers may share `disk_dir`. Each keeps its own index of it, so a key
+    missing from the index is still looked up on disk, where another worker
+    may have written it; the budget is enforced per worker and the files
+    others evict are dropped from the index when found missing.
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int = 256 * MB,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 2048 * MB,
+    ):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir and disk_max_bytes else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, CachedResult]" = OrderedDict()
+        self._memory_bytes = 0
+
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            memory_max_bytes=int(os.getenv("RESULT_CACHE_MEMORY_MB", "256")) * MB,
+            disk_dir=os.getenv("RESULT_CACHE_DIR"),
+            disk_max_bytes=int(os.getenv("RESULT_CACHE_DISK_MB", "2048")) * MB,
+        )
+
+    async def get(self, key: str) -> Optional[CachedResult]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry
+
+        if self.disk_dir is not None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._put_memory(key, entry)
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, entry: CachedResult):
+        self._put_memory(key, entry)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            ),
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_max_bytes": self.memory_max_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "disk_max_bytes": self.disk_max_bytes if self.disk_dir else 0,
+        }
+
+    def _put_memory(self, key: str, entry: CachedResult):
+        size = entry.size_bytes
+        if size > self.memory_max_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.size_bytes
+
+        self._memory[key] = entry
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size_bytes
+            self.evictions += 1
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.bin"
+
+    def _load_disk_index(self):
+        """Rebuild the LRU order of the disk tier from file mtimes"""
+        entries = []
+        for path in self.disk_dir.glob("*.bin"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, key: str) -> Optional[CachedResult]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            # mtime doubles as the recency used after a restart
+            os.utime(path)
+        except FileNotFoundError:
+            with self._disk_lock:
+                self._forget_disk(key)
+            return None
+
+        with self._disk_lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            else:
+                # Written by another worker since the index was loaded
+                self._disk[key] = len(data)
+                self._disk_bytes += len(data)
+
+        return _unpack(data)
+
+    def _write_disk(self, key: str, entry: CachedResult):
+        data = _pack(entry)
+        if len(data) > self.disk_max_bytes:
+            return
+
+        # Unique temp name: workers may write the same key at once
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._disk_lock:
+            self._forget_disk(key)
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+
+            while self._disk_bytes > self.disk_max_bytes:
+                victim = next(iter(self._disk))
+                self._forget_disk(victim)
+                self._path(victim).unlink(missing_ok=True)
+                self.evictions += 1
+
+    def _forget_disk(self, key: str):
+        """Drop a key from the disk index. Caller must hold `_disk_lock`."""
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_bytes -= size
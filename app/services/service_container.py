@@ -0,0 +1,126 @@
+from app.services.api_key_service.api_key_cache import get_api_key_cache
+from app.services.api_key_service.database_service.database_service import (
+    DatabaseService,
+)
+from app.services.api_key_service.database_service.pocketbase_service import (
+    get_database_service,
+)
+from app.services.billing.service import BillingService
+from app.services.generator_service_config import (
+    GeneratorServiceConfig,
+    build_gen_service_config_from_env,
+)
+from app.services.idempotency import IdempotencyStore
+from app.services.image_encoder import ImageEncoder
+from app.services.image_generator import ImageGenerationService
+from app.services.inference.backend import InferenceBackend, build_inference_backend
+from app.services.jobs.image_job_service import ImageJobService
+from app.services.jobs.job_store import JobStore
+from app.services.metrics import MetricsRegistry
+from app.services.result_cache import ResultCache
+from app.services.stages import PostProcessingStages
+from app.services.storage.content_store import ContentAddressedStore
+from app.services.storage.uploader import ImageUploader
+from app.types.billing_dependency import get_billing_service
+
+
+class ServiceContainer:
+    """Long-lived services shared by every request of a worker.
+
+    Built once by the FastAPI lifespan and handed to resolvers through the
+    GraphQL context, so per-request work does not repeat device selection,
+    token writes or database logins.
+    """
+
+    def __init__(
+        self,
+        config: GeneratorServiceConfig,
+        billing_service: BillingService,
+        database: DatabaseService,
+        inference: InferenceBackend,
+        uploader: ImageUploader,
+        encoder: ImageEncoder,
+        stages: PostProcessingStages,
+        image_generation_service: ImageGenerationService,
+        image_job_service: ImageJobService,
+        idempotency: IdempotencyStore,
+    ):
+        self.config = config
+        self.billing_service = billing_service
+        self.database = database
+        self.inference = inference
+        self.uploader = uploader
+        self.encoder = encoder
+        self.stages = stages
+        self.image_generation_service = image_generation_service
+        self.image_job_service = image_job_service
+        self.idempotency = idempotency
+
+    @classmethod
+    def build(cls) -> "ServiceContainer":
+        config = build_gen_service_config_from_env()
+        database = get_database_service()
+        billing_service = get_billing_service()
+        inference = build_inference_backend(config)
+
+        uploader = ImageUploader.from_env()
+        MetricsRegistry.register("uploader", uploader.stats)
+
+        storage = ContentAddressedStore.from_env(uploader)
+        MetricsRegistry.register("image_storage", storage.stats)
+
+        encoder = ImageEncoder.from_env()
+        MetricsRegistry.register("image_encoder", encoder.stats)
+
+        result_cache = ResultCache.from_env()
+        MetricsRegistry.register("result_cache", result_cache.stats)
+
+        stages = PostProcessingStages.from_env()
+        MetricsRegistry.register("stages", stages.stats)
+
+        image_generation_service = ImageGenerationService(
+            config=config,
+            billing_service=billing_service,
+            inference=inference,
+            storage=storage,
+            encoder=encoder,
+            result_cache=result_cache,
+            stages=stages,
+        )
+
+        image_job_service = ImageJobService(
+            image_generation_service, JobStore.from_env()
+        )
+        MetricsRegistry.register("image_jobs", image_job_service.stats)
+
+        idempotency = IdempotencyStore.from_env()
+        MetricsRegistry.register("idempotency", idempotency.stats)
+
+        return cls(
+            config=config,
+            billing_service=billing_service,
+            database=database,
+            inference=inference,
+            uploader=uploader,
+            encoder=encoder,
+            stages=stages,
+            image_generation_service=image_generation_service,
+            image_job_service=image_job_service,
+            idempotency=idempotency,
+        )
+
+    def start(self):
+        """Start background work, e.g. prewarming models in local mode"""
+        self.inference.start()
+        get_api_key_cache().key_filter.start(self.database)
+
+    async def shutdown(self):
+        """Release resources held by the services"""
+        await self.idempotency.shutdown()
+        await get_api_key_cache().key_filter.shutdown()
+        await self.image_job_service.shutdown()
+        await self.inference.shutdown()
+        await self.stages.shutdown()
+        await self.uploader.shutdown()
+        self.encoder.shutdown()
+        await self.database.close()
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class Stage:
+    """A step of post-processing with its own workers and bounded queue.
+
+    Jobs are zero-argument coroutine functions. `run` waits for room in the
+    queue (backpressure on the stage before it), then for a worker to finish
+    the job. Utilization is the share of worker time spent running jobs.
+    """
+
+    def __init__(self, name: str, workers: int = 1, max_queue_size: int = 64):
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_queue_size = max(1, max_queue_size)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+        self.completed = 0
+        self.failed = 0
+        self.busy_ms = 0.0
+        self.wait_ms = 0.0
+        self._started_at = time.perf_counter()
+
+    async def run(self, job: Callable[[], Awaitable[Any]]) -> Any:
+        if self._queue is None:
+            self._start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((job, future, time.perf_counter()))
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        wall_ms = (time.perf_counter() - self._started_at) * 1000
+        done = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "max_queue_size": self.max_queue_size,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_ms": round(self.busy_ms, 2),
+            "utilization": (
+                self.busy_ms / (wall_ms * self.workers) if wall_ms else 0.0
+            ),
+            "avg_wait_ms": self.wait_ms / done if done else 0.0,
+        }
+
+    async def shutdown(self):
+        if self._queue is not None:
+            # Let queued jobs finish before stopping the workers
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def _start(self):
+        # Created lazily so the queue binds to the serving event loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"stage-{self.name}-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def _work(self):
+        while True:
+            job, future, queued_at = await self._queue.get()
+            if future.cancelled():
+                # The caller went away while the job was queued
+                self._queue.task_done()
+                continue
+
+            start = time.perf_counter()
+            self.wait_ms += (start - queued_at) * 1000
+            try:
+                result = await job()
+            except Exception as e:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                self.completed += 1
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                if not future.done():
+                    # The worker was cancelled mid-job
+                    future.cancel()
+                self.busy_ms += (time.perf_counter() - start) * 1000
+                self._queue.task_done()
+
+
+class PostProcessingStages:
+    """The stages an image goes through after inference: encode, upload,
+    then billing.
+
+    Inference itself is the first stage, run by the device's
+    InferenceExecutor, which is free for the next batch as soon as a
+    pipeline call returns.
+    """
+
+    def __init__(self, encode: Stage, upload: Stage, billing: Stage):
+        self.encode = encode
+        self.upload = upload
+        self.billing = billing
+
+    @classmethod
+    def from_env(cls) -> "PostProcessingStages":
+        max_queue_size = int(os.getenv("STAGE_QUEUE_SIZE", "64"))
+        return cls(
+            encode=Stage(
+                "encode",
+                workers=int(os.getenv("STAGE_ENCODE_WORKERS", "2")),
+                max_queue_size=max_queue_size,
+            ),
+            upload=Stage(
+                "upload",
+                workers=int(os.getenv("STAGE_UPLOAD_WORKERS", "4")),
+                max_queue_size=max_queue_size,
+            ),
+            billing=Stage(
+                "billing",
+                workers=int(os.getenv("STAGE_BILLING_WORKERS", "4")),
+                max_queue_size=max_queue_size,
+            ),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            stage.name: stage.stats()
+            for stage in (self.encode, self.upload, self.billing)
+        }
+
+    async def shutdown(self):
+        for stage in (self.encode, self.upload, self.billing):
+            await stage.shutdown()
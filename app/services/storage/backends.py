@@ -0,0 +1,135 @@
+import os
+import tempfile
+from pathlib import Path
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+
+class StorageBackend:
+    """Blocking object storage; ImageUploader runs it off the event loop"""
+
+    def put(self, key: str, data: bytes, content_type: str):
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def public_url(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class S3StorageBackend(StorageBackend):
+    """S3-compatible storage (Cloudflare R2).
+
+    One client is shared by all uploads; boto3 clients are thread-safe and
+    keep up to `max_pool_connections` TLS connections alive between calls.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        public_base_url: str,
+        endpoint_url: str = None,
+        access_key_id: str = None,
+        secret_access_key: str = None,
+        region_name: str = None,
+        max_pool_connections: int = 16,
+    ):
+        self.bucket = bucket
+        self.public_base_url = public_base_url
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            region_name=region_name,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                # ImageUploader does its own retries with backoff
+                retries={"total_max_attempts": 1},
+            ),
+        )
+
+    @classmethod
+    def from_env(cls, max_pool_connections: int = 16) -> "S3StorageBackend":
+        return cls(
+            bucket=os.getenv("R2_BUCKET_NAME"),
+            public_base_url=os.getenv("R2_PUBLIC_URL"),
+            endpoint_url=os.getenv("R2_ENDPOINT_URL"),
+            access_key_id=os.getenv("R2_ACCESS_KEY_ID"),
+            secret_access_key=os.getenv("R2_SECRET_ACCESS_KEY"),
+            region_name=os.getenv("R2_REGION_NAME"),
+            max_pool_connections=max_pool_connections,
+        )
+
+    def put(self, key: str, data: bytes, content_type: str):
+        self.client.put_object(
+            Bucket=self.bucket, Key=key, Body=data, ContentType=content_type
+        )
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return False
+            raise
+
+    def public_url(self, key: str) -> str:
+        return f"{self.public_base_url}/{key}"
+
+
+class LocalStorageBackend(StorageBackend):
+    """Writes objects under a local directory; for development and for
+    benchmarking the upload path without R2."""
+
+    def __init__(self, root: str, public_base_url: str = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.public_base_url = public_base_url or self.root.resolve().as_uri()
+
+    @classmethod
+    def from_env(cls) -> "LocalStorageBackend":
+        return cls(
+            root=os.path.expanduser(os.getenv("LOCAL_STORAGE_DIR", "/tmp/image_storage")),
+            public_base_url=os.getenv("LOCAL_STORAGE_PUBLIC_URL"),
+        )
+
+    def put(self, key: str, data: bytes, content_type: str):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename so readers never see a partial file. The temp name
+        # is unique: workers may store the same content-addressed key at once
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            # mkstemp creates the file owner-only; published images are public
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).exists()
+
+    def public_url(self, key: str) -> str:
+        return f"{self.public_base_url}/{key}"
+
+
+def build_storage_backend(max_pool_connections: int = 16) -> StorageBackend:
+    """Pick the backend from STORAGE_BACKEND (r2|local)"""
+    backend = os.getenv("STORAGE_BACKEND", "r2").lower()
+
+    if backend == "local":
+        return LocalStorageBackend.from_env()
+
+    if backend != "r2":
+        print(f"Warning: unknown STORAGE_BACKEND {backend}, using r2")
+
+    return S3StorageBackend.from_env(max_pool_connections)
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from app.services.storage.uploader import ImageUploader
+from app.types.enums import ImageFormat
+
+EXTENSIONS = {
+    ImageFormat.PNG: "png",
+    ImageFormat.JPEG: "jpg",
+    ImageFormat.WEBP: "webp",
+}
+
+
+def content_key(data: bytes, image_format: ImageFormat) -> str:
+    """Object key derived from the encoded bytes and their real format"""
+    digest = hashlib.sha256(data).hexdigest()
+    return f"images/{digest}.{EXTENSIONS[image_format]}"
+
+
+class ContentAddressedStore:
+    """Stores encoded images under their content hash.
+
+    Identical outputs map to the same key, so each blob is uploaded once.
+    A bounded in-memory index of keys known to exist lets repeats skip the
+    upload entirely; concurrent stores of the same blob share one upload.
+    A key enters the index only once its upload has succeeded, so a failed
+    background upload is retried by the next store of the same blob.
+    On an index miss the backend can optionally be asked first
+    (`check_remote`), trading a HEAD request for the upload after a restart.
+    """
+
+    def __init__(
+        self,
+        uploader: ImageUploader,
+        max_index_entries: int = 100_000,
+        check_remote: bool = False,
+    ):
+        self.uploader = uploader
+        self.max_index_entries = max_index_entries
+        self.check_remote = check_remote
+
+        self._index: "OrderedDict[str, None]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.requests = 0
+        self.dedup_hits = 0
+        self.uploads = 0
+        self.bytes_uploaded = 0
+        self.bytes_saved = 0
+        self.failed_uploads = 0
+
+    @classmethod
+    def from_env(cls, uploader: ImageUploader) -> "ContentAddressedStore":
+        return cls(
+            uploader,
+            max_index_entries=int(os.getenv("STORAGE_INDEX_MAX_ENTRIES", "100000")),
+            check_remote=os.getenv("STORAGE_CHECK_REMOTE", "0") == "1",
+        )
+
+    async def store(self, data: bytes, image_format: ImageFormat) -> str:
+        """Store `data` if it is not stored yet and return its public URL"""
+        # hashlib releases the GIL for large inputs
+        key = await asyncio.to_thread(content_key, data, image_format)
+        self.requests += 1
+
+        if key in self._index:
+            self._index.move_to_end(key)
+            self._record_hit(data)
+            return self.uploader.backend.public_url(key)
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            url = await asyncio.shield(in_flight)
+            self._record_hit(data)
+            return url
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            url, written = await self._store_missing(key, data, image_format)
+        except BaseException as e:
+            # Also on cancellation, so waiters never hang on this future
+            if not isinstance(e, Exception):
+                e = RuntimeError(f"Upload of {key} was cancelled")
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not warn
+            future.exception()
+            del self._in_flight[key]
+            raise
+
+        # Repeats get the URL right away but stay in flight until the object
+        # is written, so a background upload is not started twice
+        future.set_result(url)
+        written.add_done_callback(lambda done: self._written(key, future, done))
+        return url
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "dedup_hits": self.dedup_hits,
+            "dedup_ratio": self.dedup_hits / self.requests if self.requests else 0.0,
+            "uploads": self.uploads,
+            "bytes_uploaded": self.bytes_uploaded,
+            "bytes_saved": self.bytes_saved,
+            "failed_uploads": self.failed_uploads,
+            "index_entries": len(self._index),
+        }
+
+    async def _store_missing(
+        self, key: str, data: bytes, image_format: ImageFormat
+    ) -> Tuple[str, asyncio.Future]:
+        backend = self.uploader.backend
+        if self.check_remote and await asyncio.to_thread(backend.exists, key):
+            self._record_hit(data)
+            written = asyncio.get_running_loop().create_future()
+            written.set_result(None)
+            return backend.public_url(key), written
+
+        result = await self.uploader.upload(
+            key, data, f"image/{image_format.value.lower()}"
+        )
+        self.uploads += 1
+        self.bytes_uploaded += len(data)
+        return result
+
+    def _written(self, key: str, in_flight: asyncio.Future, written: asyncio.Future):
+        if self._in_flight.get(key) is in_flight:
+            del self._in_flight[key]
+        if written.cancelled() or written.exception() is not None:
+            # Never written; the next store uploads it again
+            self.failed_uploads += 1
+            return
+        self._remember(key)
+
+    def _record_hit(self, data: bytes):
+        self.dedup_hits += 1
+        self.bytes_saved += len(data)
+
+    def _remember(self, key: str):
+        self._index[key] = None
+        self._index.move_to_end(key)
+        while len(self._index) > self.max_index_entries:
+            self._index.popitem(last=False)
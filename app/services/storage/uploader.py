@@ -0,0 +1,155 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+
+from app.services.storage.backends import StorageBackend, build_storage_backend
+
+
+class ImageUploader:
+    """Long-lived uploader in front of a StorageBackend.
+
+    Uploads run on a small thread pool (sized like the backend's connection
+    pool) so the event loop never blocks on network I/O, and failed puts are
+    retried with exponential backoff and jitter.
+
+    With `background=True`, `upload` returns the public URL as soon as the
+    upload is queued. Clients may briefly see a 404 for it, and a put that
+    exhausts its retries is only visible in the `failed` counter and logs;
+    pending uploads are drained on shutdown. At most `max_pending` uploads,
+    each holding its payload, wait in the background; beyond that `upload`
+    waits for the put, so a slow backend slows requests instead of growing
+    memory.
+    """
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        max_workers: int = 16,
+        max_attempts: int = 3,
+        backoff_ms: float = 100,
+        background: bool = False,
+        max_pending: int = 64,
+    ):
+        self.backend = backend
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_ms = backoff_ms
+        self.background = background
+        self.max_pending = max_pending
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="uploader"
+        )
+        self._background_tasks: set = set()
+        self._pending_bytes = 0
+
+        self.uploaded = 0
+        self.uploaded_bytes = 0
+        self.failed = 0
+        self.retries = 0
+        self.upload_ms = 0.0
+        self.overflowed = 0
+
+    @classmethod
+    def from_env(cls) -> "ImageUploader":
+        max_workers = int(os.getenv("UPLOAD_MAX_CONNECTIONS", "16"))
+        return cls(
+            build_storage_backend(max_pool_connections=max_workers),
+            max_workers=max_workers,
+            max_attempts=int(os.getenv("UPLOAD_MAX_ATTEMPTS", "3")),
+            backoff_ms=float(os.getenv("UPLOAD_BACKOFF_MS", "100")),
+            background=os.getenv("UPLOAD_IN_BACKGROUND", "0") == "1",
+            max_pending=int(os.getenv("UPLOAD_MAX_PENDING", "64")),
+        )
+
+    async def upload(
+        self, key: str, data: bytes, content_type: str
+    ) -> Tuple[str, asyncio.Future]:
+        """Store `data` under `key`. Returns its public URL and a future that
+        completes once the object is written, or fails with the put; it is
+        already done unless the upload runs in the background."""
+        if self.background and len(self._background_tasks) < self.max_pending:
+            self._pending_bytes += len(data)
+            written = asyncio.create_task(
+                self._upload_in_background(key, data, content_type)
+            )
+            self._background_tasks.add(written)
+            written.add_done_callback(self._background_done)
+        else:
+            if self.background:
+                self.overflowed += 1
+            await self._upload(key, data, content_type)
+            written = asyncio.get_running_loop().create_future()
+            written.set_result(None)
+
+        return self.backend.public_url(key), written
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "background": self.background,
+            "uploaded": self.uploaded,
+            "uploaded_bytes": self.uploaded_bytes,
+            "failed": self.failed,
+            "retries": self.retries,
+            "pending_background": len(self._background_tasks),
+            "pending_bytes": self._pending_bytes,
+            "max_pending": self.max_pending,
+            "overflowed": self.overflowed,
+            "avg_upload_ms": self.upload_ms / self.uploaded if self.uploaded else 0.0,
+        }
+
+    async def shutdown(self):
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    async def _upload(self, key: str, data: bytes, content_type: str):
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._put_with_retry, key, data, content_type
+            )
+        except Exception:
+            self.failed += 1
+            raise
+
+    async def _upload_in_background(
+        self, key: str, data: bytes, content_type: str
+    ):
+        try:
+            await self._upload(key, data, content_type)
+        except Exception as e:
+            print(f"Background upload of {key} failed: {e}")
+            raise
+        finally:
+            self._pending_bytes -= len(data)
+
+    def _background_done(self, task: asyncio.Task):
+        self._background_tasks.discard(task)
+        # Logged above; mark retrieved in case nobody awaits the future
+        if not task.cancelled():
+            task.exception()
+
+    def _put_with_retry(self, key: str, data: bytes, content_type: str):
+        start = time.perf_counter()
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.backend.put(key, data, content_type)
+                break
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    raise
+                self.retries += 1
+                delay_ms = self.backoff_ms * 2 ** (attempt - 1)
+                delay_ms *= random.uniform(0.5, 1.5)
+                print(
+                    f"Upload of {key} failed ({e}), retry {attempt} in {delay_ms:.0f}ms"
+                )
+                time.sleep(delay_ms / 1000)
+
+        self.uploaded += 1
+        self.uploaded_bytes += len(data)
+        self.upload_ms += (time.perf_counter() - start) * 1000
@@ -1,4 +1,3 @@
-import io
 import torch
 
 from app.types.image_generation_input import ImageGenerationInput
@@ -42,11 +41,3 @@ def merge_inference_params(
 
     return inference_params
 
-
-def get_bytes(image_gen_input, image):
-    byte_stream = io.BytesIO()
-    image.save(byte_stream, format=image_gen_input.image_format.value)
-
-    print("Image converted to bytes")
-
-    return byte_stream
@@ -1,6 +1,9 @@
+from app.services.api_key_service.database_service.pocketbase_service import (
+    get_database_service,
+)
 from app.services.billing.service import BillingService
 from app.services.billing.stripe.stripe_billing_service import StripeBillingService
 
 
 def get_billing_service() -> BillingService:
-    return StripeBillingService()
+    return StripeBillingService(get_database_service())
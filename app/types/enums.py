@@ -27,3 +27,25 @@ class ModelType(Enum):
     # STYLEGAN2_ADA = "stylegan2-ada-pytorch"
     DEEPFLOYD_V1 = "DeepFloyd/IF-I-XL-v1.0"
     MOCK = "mock"
+
+
+@strawberry.enum
+class ModelReadinessState(Enum):
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+
+@strawberry.enum
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@strawberry.enum
+class DeliveryMode(Enum):
+    URL_ONLY = "url_only"
+    INLINE_ONLY = "inline_only"
+    BOTH = "both"
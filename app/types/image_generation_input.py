@@ -1,10 +1,39 @@
-from typing import Optional
+from typing import List, Optional
 import strawberry
 
-from app.types.enums import ImageFormat, ImageStyle, ModelType
+from app.types.enums import DeliveryMode, ImageFormat, ImageStyle, ModelType
 from app.types.scalars import PromptString, ImageCount
 
 
+@strawberry.input(description="Encoder settings; unset fields use Pillow's defaults")
+class EncodingOptions:
+    png_compress_level: Optional[int] = strawberry.field(
+        default=None, description="PNG zlib level, 0 (fastest) to 9 (smallest)"
+    )
+    jpeg_quality: Optional[int] = strawberry.field(
+        default=None, description="JPEG quality, 1 to 95"
+    )
+    jpeg_progressive: Optional[bool] = None
+    webp_quality: Optional[int] = strawberry.field(
+        default=None, description="WEBP quality, 0 to 100"
+    )
+    webp_method: Optional[int] = strawberry.field(
+        default=None, description="WEBP effort, 0 (fastest) to 6 (smallest)"
+    )
+    webp_lossless: Optional[bool] = None
+
+
+@strawberry.input(description="A resized copy produced from each generated image")
+class DerivativeSpec:
+    width: int = strawberry.field(description="Width in pixels, up to 4096")
+    height: Optional[int] = strawberry.field(
+        default=None, description="Height in pixels; omit to keep the aspect ratio"
+    )
+    image_format: Optional[ImageFormat] = strawberry.field(
+        default=None, description="Defaults to the request's imageFormat"
+    )
+
+
 @strawberry.input
 class ImageGenerationInput:
     prompt: PromptString
@@ -22,3 +51,29 @@ class ImageGenerationInput:
     )
 
     num_inference_steps: Optional[int] = None
+
+    seed: Optional[int] = strawberry.field(
+        default=None,
+        description=(
+            "Seed for reproducible output; image i uses seed + i. Seeded "
+            "requests are served from the result cache when repeated."
+        ),
+    )
+
+    delivery: DeliveryMode = strawberry.field(
+        default=DeliveryMode.BOTH,
+        description=(
+            "How images are returned: uploaded (url), inline (imageBase64) or "
+            "both. Fields left out of the selection set are skipped as well."
+        ),
+    )
+
+    encoding: Optional[EncodingOptions] = None
+
+    derivatives: Optional[List[DerivativeSpec]] = strawberry.field(
+        default=None,
+        description=(
+            "Up to 8 resized copies of every image, encoded from the same "
+            "output and uploaded unless delivery is INLINE_ONLY"
+        ),
+    )
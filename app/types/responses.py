@@ -1,12 +1,27 @@
+import base64
 from typing import Optional, List
 import strawberry
-from .enums import ImageFormat, ImageStyle
+from .enums import (
+    ImageFormat,
+    ImageStyle,
+    JobStatus,
+    ModelReadinessState,
+    ModelType,
+)
+
+
+@strawberry.type
+class ImageDerivative:
+    image_format: ImageFormat
+    width: int
+    height: int
+    size_bytes: int
+    url: Optional[str] = None
 
 
 @strawberry.type
 class ImageGenerationResult:
     id: str
-    image_base64: str
     created_at: str
     prompt: str
     image_format: ImageFormat
@@ -14,6 +29,29 @@ class ImageGenerationResult:
     height: int
     style: ImageStyle
     url: Optional[str] = None
+    encode_ms: Optional[float] = strawberry.field(
+        default=None, description="Time spent encoding this image"
+    )
+    size_bytes: Optional[int] = strawberry.field(
+        default=None, description="Size of the encoded image"
+    )
+    seed: Optional[int] = strawberry.field(
+        default=None, description="Seed this image was generated with"
+    )
+    derivatives: Optional[List[ImageDerivative]] = strawberry.field(
+        default=None, description="Resized copies, in the order requested"
+    )
+    # Encoded image, kept only when inline delivery was requested
+    image_bytes: strawberry.Private[Optional[bytes]] = None
+
+    @strawberry.field(
+        description="Base64 encoded image; null unless delivered inline"
+    )
+    def image_base64(self) -> Optional[str]:
+        # Encoded on demand so results fetched without this field skip it
+        if self.image_bytes is None:
+            return None
+        return base64.b64encode(self.image_bytes).decode("utf-8")
 
 
 @strawberry.type
@@ -27,3 +65,39 @@ class ImageGenerationResponse:
     success: bool
     results: Optional[List[ImageGenerationResult]] = None
     error: Optional[ImageGenerationError] = None
+
+
+@strawberry.type
+class ModelReadiness:
+    model_type: ModelType
+    state: ModelReadinessState
+    error: Optional[str] = None
+    warmup_ms: Optional[float] = None
+
+
+@strawberry.type
+class Readiness:
+    ready: bool
+    models: List[ModelReadiness]
+
+
+@strawberry.type
+class ImageJob:
+    id: str
+    status: JobStatus
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    results: Optional[List[ImageGenerationResult]] = None
+    error: Optional[ImageGenerationError] = None
+
+
+@strawberry.type
+class ImageJobProgress:
+    step: int
+    total_steps: int
+    elapsed_ms: float
+    eta_ms: float
+    preview_base64: Optional[str] = strawberry.field(
+        default=None, description="Low-resolution PNG decoded from the latents"
+    )
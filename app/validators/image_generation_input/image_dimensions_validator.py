@@ -1,23 +1,32 @@
 # validators/image_dimensions.py
-from graphql import ValidationRule, GraphQLError
+from typing import List
+
+from graphql import GraphQLError, IntValueNode, ValidationRule, get_named_type
+
+
+def image_dimension_errors(name: str, value: int) -> List[str]:
+    """Why `value` is not a valid image `name` (width or height), if it is not"""
+    errors = []
+    if value < 64 or value > 1024:
+        errors.append(f"Image {name} must be between 64 and 1024 pixels")
+    if value % 64 != 0:
+        errors.append(f"Image {name} must be a multiple of 64")
+    return errors
 
 
 class ImageDimensionsValidator(ValidationRule):
-    def enter_field(self, node, *args) -> None:
-        if node.name.value in ["width", "height"]:
-            try:
-                value = int(node.value.value)
-                if value < 64 or value > 1024:
-                    self.report_error(
-                        GraphQLError(
-                            f"Image {node.name.value} must be between 64 and 1024 pixels"
-                        )
-                    )
-                if value % 64 != 0:
-                    self.report_error(
-                        GraphQLError(
-                            f"Image {node.name.value} must be a multiple of 64"
-                        )
-                    )
-            except (AttributeError, ValueError):
-                self.report_error(GraphQLError(f"Invalid value for {node.name.value}"))
+    """Rejects literal sizes before execution. Sizes passed in variables are
+    not known here; ImageGenerationService.generate checks those."""
+
+    def enter_object_field(self, node, *args) -> None:
+        # Only the generated size; derivative and output sizes have own limits
+        parent_type = get_named_type(self.context.get_parent_input_type())
+        if getattr(parent_type, "name", None) != "ImageGenerationInput":
+            return
+        if node.name.value not in ["width", "height"]:
+            return
+        if not isinstance(node.value, IntValueNode):
+            return
+
+        for error in image_dimension_errors(node.name.value, int(node.value.value)):
+            self.report_error(GraphQLError(error))
@@ -0,0 +1,80 @@
+"""Benchmark the Bloom filter used to reject unknown API keys.
+
+    python benchmarks/api_key_filter.py [--keys 1000,10000,100000,1000000] [--probes 200000]
+
+For each key count, builds the filter the way ApiKeyFilter.rebuild sizes it
+(twice the key count, at least 1024) from random hashed keys and reports the
+build time, memory, the false-positive rate measured with `--probes` unknown
+keys against the estimated and target rates, and the cost of a lookup. The
+database read of a real rebuild comes on top of the build time.
+"""
+
+import argparse
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from rich.console import Console
+from rich.table import Table
+
+from app.services.api_key_service.api_key_filter import BloomFilter
+from app.services.api_key_service.helpers.api_key_generation import (
+    generate_api_key,
+    hash_api_key,
+)
+
+
+def random_hashed_keys(count: int) -> list:
+    return [secrets.token_hex(32) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", default="1000,10000,100000,1000000")
+    parser.add_argument("--probes", type=int, default=200_000)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    args = parser.parse_args()
+
+    # Probes go through the same hashing as a request's key
+    probes = [hash_api_key(generate_api_key()) for _ in range(args.probes)]
+
+    table = Table(title=f"Bloom filter, target error rate {args.error_rate}")
+    table.add_column("keys", justify="right")
+    table.add_column("build", justify="right")
+    table.add_column("size", justify="right")
+    table.add_column("hashes", justify="right")
+    table.add_column("measured FP", justify="right")
+    table.add_column("estimated FP", justify="right")
+    table.add_column("lookup", justify="right")
+
+    for count in (int(k) for k in args.keys.split(",")):
+        hashed_keys = random_hashed_keys(count)
+
+        start = time.perf_counter()
+        bloom = BloomFilter(max(1024, 2 * count), args.error_rate)
+        for hashed_key in hashed_keys:
+            bloom.add(hashed_key)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        false_positives = sum(1 for probe in probes if probe in bloom)
+        lookup_us = (time.perf_counter() - start) * 1e6 / len(probes)
+
+        table.add_row(
+            f"{count:,}",
+            f"{build_ms:.1f}ms",
+            f"{bloom.size_bytes / 1024:.0f}KB",
+            str(bloom.num_hashes),
+            f"{false_positives / len(probes):.5f}",
+            f"{bloom.estimated_false_positive_rate():.5f}",
+            f"{lookup_us:.2f}us",
+        )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
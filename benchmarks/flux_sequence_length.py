@@ -0,0 +1,120 @@
+"""Benchmark FLUX per-step latency for each T5 sequence length bucket.
+
+    python benchmarks/flux_sequence_length.py [--model FLUX_1_SCHNELL] [--steps 8] [--runs 3]
+
+Loads the model the way the service does (MODEL_CACHE_DIR, HF_TOKEN) and
+runs the same short prompt with `max_sequence_length` set to each bucket of
+the model's PipelineConfig. Denoising steps are timed from the step
+callback, so text encoding and VAE decoding are reported separately as the
+remainder of the call. Also prints the bucket SequenceLengthSelector would
+pick for the prompt.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+from dotenv import load_dotenv
+from rich.console import Console
+from rich.table import Table
+
+from app.services.generator_service_config import build_gen_service_config_from_env
+from app.services.inference.sequence_length import pick_bucket
+from app.services.model_loaders.load_model import load_model
+from app.services.model_pipeline_registry.pipeline_registry import PipelineRegistry
+from app.types.enums import ModelType
+
+
+def synchronize(device: str):
+    if device == "cuda":
+        torch.cuda.synchronize()
+    elif device == "mps":
+        torch.mps.synchronize()
+
+
+def run(pipeline, device: str, prompt: str, params: dict, sequence_length: int):
+    step_times = []
+
+    def on_step_end(pipe, step, timestep, callback_kwargs):
+        synchronize(device)
+        step_times.append(time.perf_counter())
+        return callback_kwargs
+
+    synchronize(device)
+    start = time.perf_counter()
+    pipeline(
+        prompt,
+        **{**params, "max_sequence_length": sequence_length},
+        callback_on_step_end=on_step_end,
+        output_type="np",
+    )
+    synchronize(device)
+    total_ms = (time.perf_counter() - start) * 1000
+
+    # The first interval includes encoding; time steps after it
+    steps = [b - a for a, b in zip(step_times, step_times[1:])]
+    per_step_ms = sum(steps) * 1000 / len(steps) if steps else 0.0
+    return per_step_ms, total_ms - per_step_ms * len(step_times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="FLUX_1_SCHNELL")
+    parser.add_argument("--prompt", default="a red fox in the snow, golden hour")
+    parser.add_argument("--steps", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    load_dotenv()
+    model_type = ModelType[args.model]
+    pipeline_config = PipelineRegistry.get(model_type)
+    buckets = pipeline_config.sequence_length_buckets
+    if not buckets:
+        sys.exit(f"{model_type.name} has no sequence_length_buckets")
+
+    config = build_gen_service_config_from_env()
+    pipeline = load_model(model_type, config)
+    params = {**pipeline_config.inference_params, "num_inference_steps": args.steps}
+    cap = params.get("max_sequence_length", max(buckets))
+
+    num_tokens = len(pipeline.tokenizer_2(args.prompt).input_ids)
+    selected = pick_bucket(num_tokens, buckets, cap)
+
+    # Warm up kernels and allocator before timing
+    run(pipeline, config.device, args.prompt, params, min(buckets))
+
+    table = Table(title=f"{model_type.name}, {args.steps} steps, {num_tokens} tokens")
+    table.add_column("max_sequence_length", justify="right")
+    table.add_column("per step", justify="right")
+    table.add_column("encode + decode", justify="right")
+    table.add_column("vs cap", justify="right")
+
+    results = {}
+    for bucket in sorted(b for b in set(buckets) | {cap} if b <= cap):
+        runs = [
+            run(pipeline, config.device, args.prompt, params, bucket)
+            for _ in range(args.runs)
+        ]
+        results[bucket] = (
+            min(r[0] for r in runs),
+            min(r[1] for r in runs),
+        )
+
+    for bucket, (per_step_ms, other_ms) in results.items():
+        label = f"{bucket}{' (selected)' if bucket == selected else ''}"
+        table.add_row(
+            label,
+            f"{per_step_ms:.1f}ms",
+            f"{other_ms:.0f}ms",
+            f"{per_step_ms / results[cap][0]:.0%}",
+        )
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Compare handing generated images between processes by pickling them
+through a pipe versus parking them in shared memory and sending only a
+descriptor (app/services/inference/shared_buffers.py).
+
+    python benchmarks/shared_memory_handoff.py [--iterations 50]
+
+Times are per image, measured in the receiving process from the request to
+a materialized PIL image (raw RGB) or `bytes` (PNG), i.e. including the
+receiver's copy out of shared memory.
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from PIL import Image
+from rich.console import Console
+from rich.table import Table
+
+from app.services.inference.shared_buffers import (
+    SharedBufferExporter,
+    import_bytes,
+    import_image,
+)
+
+SIZES = [512, 1024]
+
+
+def make_payloads(size: int):
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+    png = io.BytesIO()
+    image.save(png, format="PNG", compress_level=1)
+    return image, png.getvalue()
+
+
+def producer(conn, size: int):
+    """Child process: answer each request with an image or PNG bytes"""
+    image, png = make_payloads(size)
+    exporter = SharedBufferExporter()
+
+    while True:
+        request = conn.recv()
+        if request is None:
+            break
+
+        payload = image if request[1] == "rgb" else png
+        if request[0] == "pickle":
+            conn.send(payload)
+        elif request[1] == "rgb":
+            conn.send(exporter.export_image(payload))
+        else:
+            conn.send(exporter.export_bytes(payload))
+
+
+def measure(conn, transport: str, kind: str, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        conn.send((transport, kind))
+        reply = conn.recv()
+        if transport == "shm":
+            reply = import_image(reply) if kind == "rgb" else import_bytes(reply)
+        elif kind == "rgb":
+            reply.load()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Median is robust to the first, cold-cache iterations
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    table = Table(title="Image hand-off between processes (ms per image)")
+    table.add_column("Payload", style="cyan")
+    table.add_column("Bytes", justify="right")
+    table.add_column("Pickle", justify="right", style="magenta")
+    table.add_column("Shared memory", justify="right", style="green")
+    table.add_column("Speedup", justify="right")
+
+    ctx = multiprocessing.get_context("spawn")
+    for size in SIZES:
+        parent, child = ctx.Pipe()
+        process = ctx.Process(target=producer, args=(child, size))
+        process.start()
+
+        image, png = make_payloads(size)
+        for kind, label, nbytes in [
+            ("rgb", f"{size}x{size} RGB", size * size * 3),
+            ("png", f"{size}x{size} PNG", len(png)),
+        ]:
+            pickled = measure(parent, "pickle", kind, args.iterations)
+            shared = measure(parent, "shm", kind, args.iterations)
+            table.add_row(
+                label,
+                f"{nbytes:,}",
+                f"{pickled:.2f}",
+                f"{shared:.2f}",
+                f"{pickled / shared:.1f}x",
+            )
+
+        parent.send(None)
+        process.join()
+
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
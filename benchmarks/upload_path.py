@@ -0,0 +1,138 @@
+"""Benchmark the image upload path without R2.
+
+    python benchmarks/upload_path.py [--images 200] [--size 1024] [--latency-ms 80]
+
+Compares the old per-image `boto3.client(...)` construction with the shared
+client, then pushes encoded images through ImageUploader backed by
+LocalStorageBackend, awaited and in background mode, while measuring how
+late a 1ms ticker on the event loop fires (loop stall). `--latency-ms`
+adds a simulated round trip to every put to stand in for R2.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import boto3
+import numpy as np
+from PIL import Image
+from rich.console import Console
+from rich.table import Table
+
+from app.services.storage.backends import LocalStorageBackend
+from app.services.storage.uploader import ImageUploader
+
+
+def encoded_image(size: int) -> bytes:
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+    byte_stream = io.BytesIO()
+    image.save(byte_stream, format="PNG", compress_level=1)
+    return byte_stream.getvalue()
+
+
+class SlowLocalStorageBackend(LocalStorageBackend):
+    def __init__(self, root: str, latency_ms: float):
+        super().__init__(root)
+        self.latency_ms = latency_ms
+
+    def put(self, key: str, data: bytes, content_type: str):
+        time.sleep(self.latency_ms / 1000)
+        super().put(key, data, content_type)
+
+
+def client_construction_ms(iterations: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        boto3.client(
+            "s3",
+            endpoint_url="https://example.invalid",
+            aws_access_key_id="x",
+            aws_secret_access_key="x",
+            region_name="auto",
+        )
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+async def max_loop_lag_ms(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, (time.perf_counter() - start) * 1000 - 1)
+    return worst
+
+
+async def run_uploads(
+    root: str, data: bytes, images: int, latency_ms: float, background: bool
+):
+    # Room for every upload in the background, to measure the queue itself
+    uploader = ImageUploader(
+        SlowLocalStorageBackend(root, latency_ms),
+        background=background,
+        max_pending=images,
+    )
+    stop = asyncio.Event()
+    lag = asyncio.create_task(max_loop_lag_ms(stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(uploader.upload(f"images/{i}.png", data, "image/png") for i in range(images))
+    )
+    returned_ms = (time.perf_counter() - start) * 1000
+
+    await uploader.shutdown()
+    stored_ms = (time.perf_counter() - start) * 1000
+
+    stop.set()
+    return returned_ms, stored_ms, await lag
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--size", type=int, default=1024)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    data = encoded_image(args.size)
+    console = Console()
+    console.print(
+        f"boto3.client construction: {client_construction_ms():.1f}ms per call "
+        "(previously paid for every generation request)"
+    )
+
+    table = Table(
+        title=(
+            f"{args.images} uploads of {len(data) / 1024:.0f}KB to a local "
+            f"directory, {args.latency_ms:.0f}ms simulated latency"
+        )
+    )
+    table.add_column("Mode", style="cyan")
+    table.add_column("URLs returned ms", justify="right")
+    table.add_column("All stored ms", justify="right")
+    table.add_column("Max loop stall ms", justify="right", style="magenta")
+
+    for background in (False, True):
+        with tempfile.TemporaryDirectory() as root:
+            returned_ms, stored_ms, lag_ms = asyncio.run(
+                run_uploads(root, data, args.images, args.latency_ms, background)
+            )
+        table.add_row(
+            "background" if background else "awaited",
+            f"{returned_ms:.1f}",
+            f"{stored_ms:.1f}",
+            f"{lag_ms:.1f}",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()